@@ -0,0 +1,98 @@
+"""
+Проверка и бенчмарк локальной копии каталога на заглушке API магазина.
+Выполняет полную синхронизацию каталога, изменяет и удаляет товары
+в заглушке, выполняет инкрементальную и повторную полную синхронизацию
+и проверяет, что локальный каталог это отразил. Затем сравнивает задержку
+поиска по локальному каталогу (SQLite FTS5) и через API.
+
+Запуск из корня репозитория (каталог создается во временной папке):
+    python -m benchmarks.bench_catalog_search --catalog-size 5000 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.mock_opencart import MockOpenCart
+from configs import config
+
+
+async def _measure(search, queries: list[str]) -> list[float]:
+    """
+    Последовательно выполняет поиски и возвращает задержку каждого в мс.
+    """
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        await search(query)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+def _report(name: str, timings: list[float]) -> None:
+    """
+    Выводит сводку по задержкам.
+    """
+    quantiles = statistics.quantiles(timings, n=100)
+    print(f"{name:<8} p50 = {quantiles[49]:8.2f} ms  p95 = {quantiles[94]:8.2f} ms")
+
+async def main(catalog_size: int, latency: float, searches: int) -> None:
+    """
+    Запускает заглушку, синхронизирует каталог и сравнивает поиск.
+    """
+    # Модули импортируются после настройки пути к каталогу
+    from src.database.process_database_catalog import (  # pylint: disable=import-outside-toplevel
+        count_catalog_products,
+    )
+    from src.utils import connect_api  # pylint: disable=import-outside-toplevel
+    from src.utils.catalog_sync import sync_catalog  # pylint: disable=import-outside-toplevel
+    from src.utils.http_client import (  # pylint: disable=import-outside-toplevel
+        close_session,
+        create_session,
+    )
+
+    mock = MockOpenCart(latency=latency, catalog_size=catalog_size)
+    await mock.start()
+    await create_session()
+    try:
+        started = time.perf_counter()
+        synced = await sync_catalog(full=True)
+        print(f"full sync: {synced} products in {time.perf_counter() - started:.2f} s")
+        assert await count_catalog_products() == catalog_size
+
+        mock.touch_product(1, name='Перфоратор обновленный')
+        mock.touch_product(catalog_size + 1, name='Новый шуруповерт')
+        mock.reset_stats()
+        synced = await connect_api.search_local('перфоратор')
+        assert synced is None
+        synced = await sync_catalog()
+        print(f"delta sync: {synced} products, {mock.requests_count} requests")
+        assert synced == 2
+        assert (await connect_api.search_local('перфоратор'))[0].product_id == '1'
+        assert (await connect_api.search_local('шуруп'))[0].name == 'Новый шуруповерт'
+
+        mock.remove_product(2)
+        await sync_catalog(full=True)
+        assert await count_catalog_products() == catalog_size
+        assert (await connect_api.search_local(f'{4810000000000 + 3}')) is not None
+        print("delta, removal and barcode lookup: ok")
+
+        queries = [f'Товар {index * 7 % catalog_size + 1}' for index in range(searches)]
+        _report('local', await _measure(connect_api.search_local, queries))
+        _report('api', await _measure(connect_api.get_search_results, queries))
+    finally:
+        await close_session()
+        await mock.stop()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--catalog-size', type=int, default=2000)
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--searches', type=int, default=200)
+    args = parser.parse_args()
+    config.CATALOG_DB_PATH = os.path.join(tempfile.mkdtemp(), 'catalog.db')
+    logging.disable(logging.INFO)
+    asyncio.run(main(args.catalog_size, args.latency, args.searches))
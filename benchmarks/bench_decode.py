@@ -0,0 +1,135 @@
+"""
+Бенчмарк распознавания штрихкодов на фото.
+Формирует синтетические фото (штрихкод EAN-13 на зашумленном фоне, JPEG)
+и распознает их одновременно: в потоке цикла событий, как раньше, и в пуле
+процессов decode_pool с разным количеством процессов. Выводит количество
+распознанных фото в секунду, ускорение относительно цикла событий,
+максимальную задержку цикла событий (насколько в это время задерживались
+бы ответы другим пользователям) и число отклоненных при заполненной очереди.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_decode --photos 200 --workers 1 2 4
+"""
+
+# pylint: disable=no-member
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+from io import BytesIO
+
+import cv2
+import numpy as np
+from barcode import EAN13
+from barcode.writer import ImageWriter
+
+from src.utils.barcod_ import decode_barcode_bytes
+from src.utils.decode_pool import DecodePool, DecodeQueueFullError
+
+
+def make_photos(count: int, width: int, height: int) -> list[tuple[str, bytes]]:
+    """
+    Формирует фото со штрихкодами.
+
+    :return: Список (ожидаемый номер штрихкода, JPEG).
+    """
+    rng = np.random.default_rng(0)
+    photos = []
+    for index in range(count):
+        number = f'481{index:09d}'
+        buffer = BytesIO()
+        code = EAN13(number, writer=ImageWriter())
+        code.write(buffer)
+        label = cv2.imdecode(np.frombuffer(buffer.getvalue(), np.uint8), cv2.IMREAD_COLOR)
+        photo = rng.integers(90, 200, size=(height, width, 3), dtype=np.uint8)
+        top = (height - label.shape[0]) // 2
+        left = (width - label.shape[1]) // 2
+        photo[top:top + label.shape[0], left:left + label.shape[1]] = label
+        encoded = cv2.imencode('.jpg', photo, [cv2.IMWRITE_JPEG_QUALITY, 85])[1].tobytes()
+        photos.append((code.get_fullcode(), encoded))
+    return photos
+
+async def measure_lag(stop: asyncio.Event, interval: float = 0.01) -> float:
+    """
+    Измеряет максимальную задержку цикла событий, пока не установлен stop.
+
+    :return: Максимальная задержка в мс.
+    """
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - started - interval)
+    return worst * 1000
+
+async def run_scans(photos: list[tuple[str, bytes]], pool: DecodePool | None) -> dict:
+    """
+    Распознает все фото одновременно в цикле событий (pool=None) или в пуле.
+
+    :return: Словарь с результатами.
+    """
+    stop = asyncio.Event()
+    lag = asyncio.create_task(measure_lag(stop))
+    await asyncio.sleep(0)
+
+    async def scan(photo: bytes) -> str | None:
+        if pool is None:
+            return decode_barcode_bytes(photo).text
+        try:
+            return (await pool.run(decode_barcode_bytes, photo)).text
+        except DecodeQueueFullError:
+            return None
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(scan(photo) for _, photo in photos))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    decoded = sum(1 for (expected, _), result in zip(photos, results) if result == expected)
+    return {
+        'scans_per_s': len(photos) / elapsed,
+        'decoded': decoded,
+        'max_lag_ms': await lag,
+        'rejected': pool.rejected if pool is not None else 0,
+    }
+
+async def main(args: argparse.Namespace) -> None:
+    """
+    Запускает распознавание в цикле событий и в пулах разного размера и выводит сравнение.
+    """
+    photos = make_photos(args.photos, args.width, args.height)
+    print(f"photos = {len(photos)}  size = {args.width}x{args.height}  cpu = {os.cpu_count()}")
+    baseline = await run_scans(photos, None)
+    rows = [('event loop', baseline)]
+    for workers in args.workers:
+        pool = DecodePool(workers, args.queue_size, args.queue_timeout)
+        pool.start()
+        try:
+            # Прогрев: процессы уже запущены, первая задача загружает библиотеки
+            await asyncio.gather(*(pool.run(os.getpid) for _ in range(workers)))
+            rows.append((f'pool x{workers}', await run_scans(photos, pool)))
+        finally:
+            pool.shutdown()
+    for name, result in rows:
+        print(
+            f"{name:<12} {result['scans_per_s']:8.1f} scans/s  "
+            f"(x{result['scans_per_s'] / baseline['scans_per_s']:.2f})  "
+            f"decoded {result['decoded']}/{len(photos)}  "
+            f"max loop lag {result['max_lag_ms']:8.1f} ms  rejected {result['rejected']}"
+            )
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--photos', type=int, default=200)
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=960)
+    parser.add_argument(
+        '--workers', type=int, nargs='+',
+        default=sorted({1, max(1, (os.cpu_count() or 1) // 2), os.cpu_count() or 1})
+        )
+    parser.add_argument('--queue-size', type=int, default=1000)
+    parser.add_argument('--queue-timeout', type=float, default=60.0)
+    # Логирование отключается, чтобы измерять только распознавание
+    logging.disable(logging.CRITICAL)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,146 @@
+"""
+Бенчмарк этапов распознавания штрихкодов на наборе фото.
+Распознает каждое фото набора с заданным порядком этапов и выводит для
+каждого этапа количество попыток, долю успехов, среднее время попытки и
+долю фото, распознанных этим этапом, а также сравнение с прежним
+одиночным проходом по фото в исходном размере (этап full).
+
+Набор фото - каталог с изображениями (--corpus), ожидаемый штрихкод берется
+из имени файла до первого '_' (например, 4810268034503_blur.jpg), файлы
+с другим именем считаются фото без известного штрихкода. Без --corpus
+формируется синтетический набор: четкие, размытые, темные, зашумленные
+и повернутые фото.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_decode_stages --photos 40
+    python -m benchmarks.bench_decode_stages --corpus data/scans --stages downscale,rotate,full
+"""
+
+# pylint: disable=no-member
+
+import argparse
+import logging
+import os
+import time
+from io import BytesIO
+
+import cv2
+import numpy as np
+from barcode import EAN13
+from barcode.writer import ImageWriter
+
+from configs import config
+from src.utils.barcod_ import decode_barcode_bytes
+from src.utils.barcode_stages import StageStats, resolve_stages
+
+
+DEGRADATIONS = ('clean', 'blur', 'dark', 'noise', 'rotate30', 'rotate45')
+
+
+def _degrade(photo: np.ndarray, kind: str, rng: np.random.Generator) -> np.ndarray:
+    """
+    Ухудшает фото одним из способов DEGRADATIONS.
+    """
+    if kind == 'blur':
+        return cv2.GaussianBlur(photo, (0, 0), 3.5)
+    if kind == 'dark':
+        return (photo * 0.25 + 20).astype(np.uint8)
+    if kind == 'noise':
+        noise = rng.normal(0, 45, photo.shape)
+        return np.clip(photo + noise, 0, 255).astype(np.uint8)
+    if kind.startswith('rotate'):
+        height, width = photo.shape[:2]
+        matrix = cv2.getRotationMatrix2D((width / 2, height / 2), int(kind[6:]), 1.0)
+        return cv2.warpAffine(photo, matrix, (width, height), borderValue=(150, 150, 150))
+    return photo
+
+def make_corpus(count: int, width: int, height: int) -> list[tuple[str, str, bytes]]:
+    """
+    Формирует синтетический набор фото.
+
+    :return: Список (вид фото, ожидаемый номер штрихкода, JPEG).
+    """
+    rng = np.random.default_rng(0)
+    corpus = []
+    for index in range(count):
+        kind = DEGRADATIONS[index % len(DEGRADATIONS)]
+        buffer = BytesIO()
+        code = EAN13(f'481{index:09d}', writer=ImageWriter())
+        code.write(buffer)
+        label = cv2.imdecode(np.frombuffer(buffer.getvalue(), np.uint8), cv2.IMREAD_COLOR)
+        photo = np.full((height, width, 3), 150, dtype=np.uint8)
+        top = (height - label.shape[0]) // 2
+        left = (width - label.shape[1]) // 2
+        photo[top:top + label.shape[0], left:left + label.shape[1]] = label
+        photo = _degrade(photo, kind, rng)
+        encoded = cv2.imencode('.jpg', photo, [cv2.IMWRITE_JPEG_QUALITY, 85])[1].tobytes()
+        corpus.append((kind, code.get_fullcode(), encoded))
+    return corpus
+
+def load_corpus(path: str) -> list[tuple[str, str, bytes]]:
+    """
+    Загружает набор фото из каталога.
+
+    :return: Список (имя файла, ожидаемый номер штрихкода или '', содержимое файла).
+    """
+    corpus = []
+    for name in sorted(os.listdir(path)):
+        if not name.lower().endswith(('.jpg', '.jpeg', '.png', '.webp')):
+            continue
+        stem = os.path.splitext(name)[0].split('_')[0]
+        with open(os.path.join(path, name), 'rb') as photo:
+            corpus.append((name, stem if stem.isdigit() else '', photo.read()))
+    return corpus
+
+def run(
+    corpus: list[tuple[str, str, bytes]], stages: tuple[str, ...], max_side: int
+    ) -> tuple[StageStats, int, float]:
+    """
+    Распознает все фото набора.
+
+    :return: Статистика этапов, количество верно распознанных фото и среднее время на фото в мс.
+    """
+    stats = StageStats()
+    correct = 0
+    started = time.perf_counter()
+    for _, expected, photo in corpus:
+        result = decode_barcode_bytes(photo, stages, max_side)
+        stats.record(result)
+        if result.text is not None and (not expected or result.text == expected):
+            correct += 1
+    return stats, correct, (time.perf_counter() - started) / len(corpus) * 1000
+
+def main(args: argparse.Namespace) -> None:
+    """
+    Распознает набор фото с заданными этапами и одиночным проходом и выводит сравнение.
+    """
+    if args.corpus:
+        corpus = load_corpus(args.corpus)
+    else:
+        corpus = make_corpus(args.photos, args.width, args.height)
+    stages = resolve_stages(args.stages.split(','))
+    print(f"photos = {len(corpus)}  stages = {','.join(stages)}")
+    # Прежний одиночный проход - этап full, с max_side=0 он всегда выполняется
+    for title, order, max_side in (
+        ('single pass (full)', ('full',), 0),
+        ('staged', stages, config.DECODE_FAST_MAX_SIDE),
+        ):
+        stats, correct, per_photo = run(corpus, order, max_side)
+        print(f"{title:<20} decoded {correct}/{len(corpus)}  {per_photo:8.2f} ms / photo")
+        for name, stage in stats.stats()['stages'].items():
+            print(
+                f"    {name:<14} attempts {stage['attempts']:<5} hits {stage['hits']:<5} "
+                f"hit rate {stage['hit_rate']:6.1%}  {stage['avg_ms']:8.2f} ms / attempt  "
+                f"share {stage['share_of_photos']:6.1%}"
+                )
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--corpus', help='Каталог с фото')
+    parser.add_argument('--photos', type=int, default=60)
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=960)
+    parser.add_argument('--stages', default=','.join(config.DECODE_STAGES))
+    # Логирование отключается, чтобы измерять только распознавание
+    logging.disable(logging.CRITICAL)
+    main(parser.parse_args())
@@ -0,0 +1,108 @@
+"""
+Бенчмарк извлечения краткого описания товара из HTML.
+Сравнивает прежнюю реализацию (дерево BeautifulSoup и регулярное выражение
+для каждого результата) с потоковым разбором из src.utils.description
+без кеша и с кешем по товару, а также проверяет, что результаты совпадают.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_description --results 20 --repeat 200
+"""
+
+import argparse
+import re
+import time
+
+from bs4 import BeautifulSoup
+
+from benchmarks.mock_opencart import make_product
+from src.utils.description import DescriptionCache, NO_DESCRIPTION, extract_first_sentence
+
+
+SHOWN_SEARCH_RESULTS = 4
+
+LONG_TAIL = ''.join(
+    f'<p>Характеристика {index}: значение {index}. Дополнительные сведения.</p>'
+    for index in range(40)
+    )
+
+
+def extract_with_soup(description: str | None) -> str:
+    """
+    Прежняя реализация извлечения описания из get_search_results.
+    """
+    if description is None:
+        return NO_DESCRIPTION
+    soup = BeautifulSoup(description, 'html.parser')
+    soup = soup.find('div').text
+    match = re.match(r"[^.!?]*[.!?]", soup)
+    if match:
+        return match.group(0)
+    return NO_DESCRIPTION
+
+def make_search_results(count: int) -> list[dict]:
+    """
+    Формирует результаты поиска с описаниями реалистичной длины.
+    """
+    products = []
+    for product_id in range(1, count + 1):
+        product = make_product(product_id)
+        product['description'] = product['description'].replace('</div>', f'{LONG_TAIL}</div>')
+        products.append(product)
+    return products
+
+def run_soup(products: list[dict]) -> None:
+    """
+    Один поиск в стиле прежней реализации: разбираются все результаты.
+    """
+    for product in products:
+        extract_with_soup(product['description'])
+
+def run_streaming(products: list[dict]) -> None:
+    """
+    Один поиск с потоковым разбором только показываемых результатов.
+    """
+    for product in products[:SHOWN_SEARCH_RESULTS]:
+        extract_first_sentence(product['description'])
+
+def run_cached(products: list[dict], cache: DescriptionCache) -> None:
+    """
+    Один поиск с потоковым разбором и кешем по товару.
+    """
+    for product in products[:SHOWN_SEARCH_RESULTS]:
+        cache.get(product['product_id'], product['description'])
+
+def _measure(name: str, search, repeat: int) -> float:
+    """
+    Выполняет поиск repeat раз и выводит среднее время одного поиска.
+    """
+    started = time.perf_counter()
+    for _ in range(repeat):
+        search()
+    per_search = (time.perf_counter() - started) / repeat * 1000
+    print(f"{name:<22} {per_search:8.3f} ms / search")
+    return per_search
+
+def main(results: int, repeat: int) -> None:
+    """
+    Проверяет совпадение результатов и сравнивает реализации.
+    """
+    products = make_search_results(results)
+    for product in products:
+        assert extract_with_soup(product['description']) == \
+            extract_first_sentence(product['description'])
+
+    cache = DescriptionCache(maxsize=1000)
+    baseline = _measure('beautifulsoup (all)', lambda: run_soup(products), repeat)
+    streaming = _measure('streaming (shown)', lambda: run_streaming(products), repeat)
+    cached = _measure('streaming + cache', lambda: run_cached(products, cache), repeat)
+    print(
+        f"speedup: streaming x{baseline / streaming:.1f}, "
+        f"with cache x{baseline / cached:.1f}; cache {cache.stats()}"
+        )
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--results', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+    main(args.results, args.repeat)
@@ -0,0 +1,115 @@
+"""
+Бенчмарк общей HTTP-сессии против новой сессии на каждый запрос.
+Имитирует обработку поиска с тремя результатами (информация о товаре
+и количество для каждого товара и проверка изображения) на локальной
+заглушке API магазина и выводит среднюю и p95 задержку одного поиска,
+а также количество открытых TCP-соединений.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_http_session --searches 200 --latency 0.002
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+
+import aiohttp
+
+from benchmarks.mock_opencart import MockOpenCart
+from configs import config
+from src.utils import connect_api
+from src.utils.check import check_image_exists
+from src.utils.http_client import close_session, create_session
+
+
+PRODUCT_IDS = ('1', '2', '3')
+
+
+async def _get_with_new_session(url: str, params: dict) -> dict | None:
+    """
+    Запрос в стиле прежней реализации: новая сессия на каждый вызов.
+    """
+    async with aiohttp.ClientSession() as session:
+        async with session.get(url, params=params) as response:
+            if response.status == 200:
+                return await response.json()
+            return None
+
+async def _head_with_new_session(url: str) -> bool:
+    """
+    Проверка изображения в стиле прежней реализации.
+    """
+    async with aiohttp.ClientSession() as session:
+        async with session.head(url) as response:
+            return response.status == 200
+
+async def search_new_sessions() -> None:
+    """
+    Один поиск с новой сессией на каждый запрос к API.
+    """
+    for product_id in PRODUCT_IDS:
+        params = {'id': product_id, 'token': connect_api.cache['token']}
+        await _get_with_new_session(config.URL_API_PRODUCT, params)
+        await _get_with_new_session(config.URL_API_QUATITY_BY_PRODUCT_ID, params)
+    await _head_with_new_session(f'{config.IMAGE_URL}catalog/products/1.jpg')
+
+async def search_shared_session() -> None:
+    """
+    Один поиск через функции connect_api, использующие общую сессию.
+    """
+    for product_id in PRODUCT_IDS:
+        await connect_api.connect_product_to_id(product_id)
+        await connect_api.get_product_quatity(product_id)
+    await check_image_exists(f'{config.IMAGE_URL}catalog/products/1.jpg')
+
+async def _measure(search, count: int) -> list[float]:
+    """
+    Последовательно выполняет поиски и возвращает задержку каждого в мс.
+    """
+    timings = []
+    for _ in range(count):
+        started = time.perf_counter()
+        await search()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+def _report(name: str, timings: list[float], connections: int) -> None:
+    """
+    Выводит сводку по задержкам.
+    """
+    p95 = statistics.quantiles(timings, n=20)[-1]
+    print(
+        f"{name:<16} mean = {statistics.mean(timings):7.2f} ms  "
+        f"p95 = {p95:7.2f} ms  tcp connections = {connections}"
+        )
+
+async def main(searches: int, latency: float) -> None:
+    """
+    Запускает заглушку и сравнивает оба варианта.
+    """
+    mock = MockOpenCart(latency=latency)
+    await mock.start()
+    # Токен кладется в кеш заранее, чтобы сравнивать только запросы к товарам
+    connect_api.cache['token'] = mock.token
+    try:
+        timings = await _measure(search_new_sessions, searches)
+        _report('new session', timings, mock.connections_count)
+
+        mock.reset_stats()
+        await create_session()
+        timings = await _measure(search_shared_session, searches)
+        _report('shared session', timings, mock.connections_count)
+    finally:
+        await close_session()
+        await mock.stop()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--searches', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.0)
+    args = parser.parse_args()
+    # Логирование отключается, чтобы измерять только сетевую часть
+    logging.disable(logging.INFO)
+    asyncio.run(main(args.searches, args.latency))
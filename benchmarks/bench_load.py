@@ -0,0 +1,179 @@
+"""
+Нагрузочный бенчмарк функций connect_api на локальной заглушке API магазина.
+Запускает заданное количество вызовов с фиксированной параллельностью
+и выводит пропускную способность, задержки p50/p95/p99, количество ошибок
+и количество запросов, дошедших до заглушки.
+
+Сценарии: search (connect_search), product (connect_product_to_id),
+quantity (get_product_quatity), attributes (connect_product_attributes_to_id),
+card (get_user_by_card_code) и mixed (смесь всех в пропорциях обычной работы бота).
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_load --scenario mixed --requests 2000 --concurrency 50 \\
+        --latency-dist lognormal --latency 0.05 --spread 0.03 --error-rate 0.01
+"""
+
+import argparse
+import asyncio
+from collections import Counter
+import logging
+import random
+import statistics
+import time
+from typing import Awaitable, Callable
+
+from benchmarks.mock_opencart import LATENCY_DISTRIBUTIONS, MockOpenCart, make_latency
+from src.utils import connect_api
+from src.utils.customer_cache import customer_cache
+from src.utils.http_client import close_session, create_session, transfer_stats
+from src.utils.product_cache import product_cache
+from src.utils.search_cache import search_cache
+
+
+SCENARIO_WEIGHTS = {
+    'search': 5,
+    'product': 3,
+    'quantity': 3,
+    'attributes': 1,
+    'card': 1,
+}
+"""
+Доли вызовов в сценарии mixed.
+"""
+
+
+def make_operations(catalog_size: int, rng: random.Random) -> dict[str, Callable[[], Awaitable]]:
+    """
+    Создает функции одного вызова для каждого сценария.
+
+    :param catalog_size: Размер каталога заглушки.
+    :param rng: Генератор случайных чисел.
+    :return: Словарь {сценарий: функция без аргументов, возвращающая корутину}.
+    """
+    def product_id() -> str:
+        return str(rng.randint(1, catalog_size))
+
+    return {
+        'search': lambda: connect_api.connect_search(f'Товар {product_id()}'),
+        'product': lambda: connect_api.connect_product_to_id(product_id()),
+        'quantity': lambda: connect_api.get_product_quatity(product_id()),
+        'attributes': lambda: connect_api.connect_product_attributes_to_id(product_id()),
+        'card': lambda: connect_api.get_user_by_card_code(f'{rng.randint(1, 99999):05d}'),
+    }
+
+async def run_load(
+    operation: Callable[[], Awaitable],
+    requests: int,
+    concurrency: int
+    ) -> tuple[list[float], Counter, float]:
+    """
+    Асинхронно выполняет requests вызовов operation в concurrency потоков.
+
+    :return: Задержки вызовов в мс, счетчик ошибок по типу и общее время в секундах.
+    """
+    timings = []
+    errors = Counter()
+    remaining = iter(range(requests))
+
+    async def worker() -> None:
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                result = await operation()
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                errors[type(e).__name__] += 1
+            else:
+                if result is None:
+                    errors['None'] += 1
+            timings.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return timings, errors, time.perf_counter() - started
+
+def report(name: str, timings: list[float], errors: Counter, elapsed: float, upstream: int) -> None:
+    """
+    Выводит сводку по одному сценарию.
+    """
+    if len(timings) > 1:
+        quantiles = statistics.quantiles(timings, n=100)
+        p50, p95, p99 = quantiles[49], quantiles[94], quantiles[98]
+    else:
+        p50 = p95 = p99 = timings[0] if timings else 0.0
+    print(
+        f"{name:<11} {len(timings) / elapsed:9.1f} req/s  "
+        f"p50 = {p50:8.2f} ms  p95 = {p95:8.2f} ms  p99 = {p99:8.2f} ms  "
+        f"upstream = {upstream:6d}  errors = {dict(errors)}"
+        )
+
+async def main(args: argparse.Namespace) -> None:
+    """
+    Запускает заглушку и выполняет выбранные сценарии.
+    """
+    rng = random.Random(args.seed)
+    mock = MockOpenCart(
+        latency=make_latency(args.latency_dist, args.latency, args.spread, rng),
+        catalog_size=args.catalog_size,
+        error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate,
+        hang_time=args.hang_time,
+        seed=args.seed,
+        compress=args.compress,
+        etag=args.etag,
+    )
+    await mock.start()
+    await create_session()
+    operations = make_operations(args.catalog_size, rng)
+    names = list(SCENARIO_WEIGHTS)
+    weights = list(SCENARIO_WEIGHTS.values())
+
+    # Сценарий выбирается заново при каждом вызове
+    def mixed() -> Awaitable:
+        return operations[rng.choices(names, weights)[0]]()
+
+    operations['mixed'] = mixed
+    scenarios = names + ['mixed'] if args.scenario == 'all' else [args.scenario]
+    try:
+        await connect_api.get_token()
+        for scenario in scenarios:
+            if not args.warm:
+                product_cache.clear()
+                search_cache.clear()
+                customer_cache.clear()
+            mock.reset_stats()
+            timings, errors, elapsed = await run_load(
+                operations[scenario], args.requests, args.concurrency
+                )
+            report(scenario, timings, errors, elapsed, mock.requests_count)
+        print(f"product cache: {product_cache.stats()}")
+        print(f"search cache: {search_cache.stats()}")
+        print(f"customer cache: {customer_cache.stats()}")
+        print(f"transfer: {transfer_stats.stats()}")
+        deduplicated = connect_api.api_single_flight.stats()['deduplicated_total']
+        print(f"single-flight: {deduplicated} deduplicated")
+    finally:
+        await close_session()
+        await mock.stop()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scenario', choices=[*SCENARIO_WEIGHTS, 'mixed', 'all'], default='all')
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--latency-dist', choices=LATENCY_DISTRIBUTIONS, default='constant')
+    parser.add_argument('--latency', type=float, default=0.01)
+    parser.add_argument('--spread', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--timeout-rate', type=float, default=0.0)
+    parser.add_argument('--hang-time', type=float, default=60.0)
+    parser.add_argument('--catalog-size', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--compress', action='store_true', help='сжимать ответы заглушки')
+    parser.add_argument('--etag', action='store_true', help='ETag и ответы 304 в заглушке')
+    parser.add_argument(
+        '--warm', action='store_true',
+        help='не очищать кеши перед каждым сценарием'
+        )
+    # Логирование отключается, чтобы измерять только работу с API
+    logging.disable(logging.CRITICAL)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,140 @@
+"""
+Бенчмарк разбора ответов API в словари и в записи src.utils.models.
+Для каждого товара разбираются три ответа (информация о товаре, количество
+по магазинам, атрибуты) и сохраняются в список, как в кеше product_cache.
+Сравниваются стандартный json со словарями, orjson со словарями и orjson
+с записями со __slots__: время разбора на товар и прирост RSS процесса
+на 10 000 закешированных товаров. Каждый вариант выполняется в отдельном
+процессе, чтобы освобожденная память одного варианта не влияла на другой.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_models --products 10000 --description-paragraphs 20
+"""
+
+import argparse
+import gc
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+from benchmarks.mock_opencart import make_product
+from src.utils import models
+
+
+VARIANTS = ('json-dict', 'orjson-dict', 'orjson-model')
+
+QUANTITY_BODY = json.dumps([{'quantity': '12.0000'}, {'quantity': '3.5000'}]).encode()
+
+ATTRIBUTES_BODY = json.dumps([{
+    'attribute_group_id': '1',
+    'name': 'Основные',
+    'attribute': [
+        {'attribute_id': '1', 'name': 'Вес', 'text': '1 кг'},
+        {'attribute_id': '2', 'name': 'Страна', 'text': 'Беларусь'},
+    ],
+}]).encode()
+
+
+def _rss() -> int:
+    """
+    Возвращает текущий RSS процесса в байтах (на Linux по /proc, иначе пиковый RSS).
+    """
+    try:
+        with open('/proc/self/statm', encoding='utf-8') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def make_bodies(products: int, description_paragraphs: int) -> list[tuple[bytes, ...]]:
+    """
+    Формирует тела ответов API для каждого товара.
+    """
+    tail = ''.join(
+        f'<p>Характеристика {index}: значение {index}. Дополнительные сведения.</p>'
+        for index in range(description_paragraphs)
+        )
+    bodies = []
+    for product_id in range(1, products + 1):
+        product = make_product(product_id)
+        product['description'] = product['description'].replace('</div>', f'{tail}</div>')
+        bodies.append((
+            json.dumps(product).encode(),
+            # Каждый ответ разбирается отдельно, как при запросе к API
+            bytes(QUANTITY_BODY),
+            bytes(ATTRIBUTES_BODY),
+        ))
+    return bodies
+
+def decode(variant: str, body: tuple[bytes, ...]) -> tuple:
+    """
+    Разбирает ответы одного товара выбранным способом.
+    """
+    info, quantity, attributes = body
+    if variant == 'json-dict':
+        return json.loads(info), json.loads(quantity), json.loads(attributes)
+    if variant == 'orjson-dict':
+        return models.json_loads(info), models.json_loads(quantity), models.json_loads(attributes)
+    return (
+        models.ProductInfo.from_api(models.json_loads(info)),
+        models.StoreQuantities.from_api(models.json_loads(quantity)),
+        models.parse_attributes(models.json_loads(attributes)),
+    )
+
+def run_variant(variant: str, products: int, description_paragraphs: int) -> dict:
+    """
+    Разбирает ответы всех товаров и измеряет время и прирост RSS.
+    """
+    bodies = make_bodies(products, description_paragraphs)
+    gc.collect()
+    rss_before = _rss()
+    started = time.perf_counter()
+    cached = [decode(variant, body) for body in bodies]
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    rss_after = _rss()
+    assert len(cached) == products
+    return {
+        'variant': variant,
+        'decode_us': elapsed / products * 1e6,
+        'rss_mb_per_10k': (rss_after - rss_before) / products * 10_000 / 2 ** 20,
+    }
+
+def main(products: int, description_paragraphs: int) -> None:
+    """
+    Запускает каждый вариант в отдельном процессе и выводит сравнение.
+    """
+    if not models.HAS_ORJSON:
+        print("orjson не установлен: варианты orjson используют стандартный json")
+    results = []
+    for variant in VARIANTS:
+        output = subprocess.run(
+            [
+                sys.executable, '-m', 'benchmarks.bench_models', '--variant', variant,
+                '--products', str(products),
+                '--description-paragraphs', str(description_paragraphs),
+            ],
+            check=True, capture_output=True, text=True
+            ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    baseline = results[0]
+    for result in results:
+        print(
+            f"{result['variant']:<14} {result['decode_us']:8.2f} us / product  "
+            f"RSS {result['rss_mb_per_10k']:7.2f} MB / 10k products  "
+            f"(time x{baseline['decode_us'] / result['decode_us']:.1f}, "
+            f"memory x{baseline['rss_mb_per_10k'] / max(result['rss_mb_per_10k'], 1e-9):.1f})"
+            )
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--products', type=int, default=10_000)
+    parser.add_argument('--description-paragraphs', type=int, default=20)
+    parser.add_argument('--variant', choices=VARIANTS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.variant:
+        print(json.dumps(run_variant(args.variant, args.products, args.description_paragraphs)))
+    else:
+        main(args.products, args.description_paragraphs)
@@ -0,0 +1,161 @@
+"""
+Бенчмарк выбора размера фото для распознавания штрихкода.
+Для каждого фото синтетического набора (см. bench_decode_stages) формирует
+размеры, как их хранит Telegram (90, 320, 800, 1280 и 2560 пикселей по
+большей стороне, JPEG), и распознает фото через read_photo_barcode
+с заглушкой бота: с выбором наименьшего достаточного размера и, для
+сравнения, всегда по самому большому размеру (SCAN_MIN_PHOTO_SIDE больше
+любого размера). Выводит скачанные байты, время на фото, количество
+распознанных фото и статистику photo_scan_stats по размерам. Кеш
+распознанных фото не используется.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_photo_sizes --photos 30
+"""
+
+# pylint: disable=no-member
+
+import argparse
+import asyncio
+import logging
+import time
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+from aiogram.types import PhotoSize
+
+from benchmarks.bench_decode_stages import make_corpus
+from configs import config
+from src.telegram_bot import process_bot
+from src.utils import photo_sizes
+from src.utils.decode_pool import decode_pool
+
+
+TELEGRAM_SIDES = (90, 320, 800, 1280, 2560)
+
+
+class FakeBot:
+    """
+    Заглушка бота: отдает содержимое размеров фото по file_id.
+    """
+
+    def __init__(self, files: dict[str, bytes]):
+        self.files = files
+
+    async def get_file(self, file_id: str) -> SimpleNamespace:
+        """
+        Возвращает файл, путь к которому совпадает с file_id.
+        """
+        return SimpleNamespace(file_path=file_id)
+
+    async def download_file(self, file_path: str, destination) -> None:
+        """
+        Записывает содержимое размера фото в destination.
+        """
+        destination.write(self.files[file_path])
+
+
+class NoScanCache:
+    """
+    Заглушка кеша распознанных фото, чтобы каждое фото распознавалось заново.
+    """
+
+    async def get(self, _file_unique_id: str) -> None:
+        """
+        Всегда сообщает, что фото еще не распознавалось.
+        """
+        return None
+
+    async def set(self, _file_unique_id: str, _barcode: str) -> None:
+        """
+        Ничего не сохраняет.
+        """
+        return None
+
+
+def make_message(index: int, photo: bytes, files: dict[str, bytes]) -> SimpleNamespace:
+    """
+    Формирует сообщение с размерами фото, как их хранит Telegram.
+    """
+    image = cv2.imdecode(np.frombuffer(photo, np.uint8), cv2.IMREAD_COLOR)
+    # Исходное фото с камеры телефона - самый большой размер
+    image = cv2.resize(image, None, fx=2, fy=2, interpolation=cv2.INTER_CUBIC)
+    height, width = image.shape[:2]
+    sizes = []
+    for side in TELEGRAM_SIDES:
+        scale = side / max(height, width)
+        resized = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        encoded = cv2.imencode('.jpg', resized, [cv2.IMWRITE_JPEG_QUALITY, 87])[1].tobytes()
+        file_id = f'{index}_{side}'
+        files[file_id] = encoded
+        sizes.append(PhotoSize(
+            file_id=file_id, file_unique_id=file_id,
+            width=resized.shape[1], height=resized.shape[0], file_size=len(encoded)
+            ))
+    return SimpleNamespace(
+        photo=sizes, from_user=SimpleNamespace(id=index, full_name='bench')
+        )
+
+async def run(messages: list, bot: FakeBot, expected: list[str], min_side: int) -> dict:
+    """
+    Распознает все фото с заданным минимальным размером.
+
+    :return: Словарь с результатами.
+    """
+    stats = photo_sizes.PhotoScanStats()
+    process_bot.photo_scan_stats = stats
+    original_order = process_bot.scan_order
+    process_bot.scan_order = lambda sizes: original_order(sizes, min_side)
+    started = time.perf_counter()
+    try:
+        results = [await process_bot.read_photo_barcode(message, bot) for message in messages]
+    finally:
+        process_bot.scan_order = original_order
+    elapsed = time.perf_counter() - started
+    return {
+        'ms_per_photo': elapsed / len(messages) * 1000,
+        'correct': sum(1 for result, code in zip(results, expected) if result == code),
+        'stats': stats.stats(),
+    }
+
+async def main(args: argparse.Namespace) -> None:
+    """
+    Сравнивает выбор наименьшего достаточного размера со скачиванием самого большого.
+    """
+    # Штрихкод занимает около 40% ширины фото, как на снимке телефоном
+    corpus = make_corpus(args.photos, 1280, 960)
+    files: dict[str, bytes] = {}
+    messages = [make_message(index, photo, files) for index, (_, _, photo) in enumerate(corpus)]
+    expected = [code for _, code, _ in corpus]
+    bot = FakeBot(files)
+    process_bot.scan_cache = NoScanCache()
+    decode_pool.start()
+    try:
+        for title, min_side in (
+            ('largest only', max(TELEGRAM_SIDES) + 1),
+            (f'smallest >= {args.min_side}', args.min_side),
+            ):
+            result = await run(messages, bot, expected, min_side)
+            stats = result['stats']
+            print(
+                f"{title:<18} decoded {result['correct']}/{len(messages)}  "
+                f"{result['ms_per_photo']:8.1f} ms / photo  "
+                f"downloaded {stats['downloaded_bytes'] / 2 ** 20:7.2f} MB  "
+                f"escalations {stats['escalations']}"
+                )
+            for label, size in stats['sizes'].items():
+                print(
+                    f"    {label:>5} px  attempts {size['attempts']:<4} hits {size['hits']:<4} "
+                    f"{size['avg_ms']:8.1f} ms / attempt"
+                    )
+    finally:
+        decode_pool.shutdown()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--photos', type=int, default=30)
+    parser.add_argument('--min-side', type=int, default=config.SCAN_MIN_PHOTO_SIDE)
+    # Логирование отключается, чтобы измерять только распознавание
+    logging.disable(logging.CRITICAL)
+    asyncio.run(main(parser.parse_args()))
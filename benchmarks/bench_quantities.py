@@ -0,0 +1,80 @@
+"""
+Бенчмарк получения количества нескольких товаров по магазинам.
+Сравнивает запросы по каждому товару с пакетным эндпоинтом заглушки
+для разного числа показываемых товаров и магазинов: выводит время
+получения и форматирования количества и число запросов к заглушке.
+Кеш количества очищается перед каждым вызовом.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_quantities --products 1 3 10 --stores 2 3 --latency 0.02
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+
+from benchmarks.mock_opencart import MockOpenCart
+from configs import config
+from src.utils import connect_api
+from src.utils.check import format_store_quantities
+from src.utils.http_client import close_session, create_session
+from src.utils.product_cache import product_cache
+from src.utils.quantity_service import get_quantities
+
+
+async def measure(mock: MockOpenCart, products: int, repeat: int) -> tuple[float, float]:
+    """
+    Получает и форматирует количество товаров repeat раз.
+
+    :return: Среднее время в мс и среднее число запросов к заглушке на вызов.
+    """
+    product_ids = [str(product_id) for product_id in range(1, products + 1)]
+    mock.reset_stats()
+    elapsed = 0.0
+    for _ in range(repeat):
+        product_cache.clear()
+        started = time.perf_counter()
+        quantities = await get_quantities(product_ids)
+        rows = format_store_quantities(list(quantities.values()))
+        elapsed += time.perf_counter() - started
+        assert len(rows) == products and all(len(row) == len(config.STORES) for row in rows)
+    return elapsed / repeat * 1000, mock.requests_count / repeat
+
+async def main(args: argparse.Namespace) -> None:
+    """
+    Запускает заглушку для каждого числа магазинов и режима запроса и выводит сравнение.
+    """
+    default_stores = list(config.STORES)
+    for stores in args.stores:
+        config.STORES = [f'Магазин {index + 1}' for index in range(stores)]
+        for bulk in (False, True):
+            mock = MockOpenCart(
+                latency=args.latency, catalog_size=max(args.products),
+                stores=stores, bulk_quantity=bulk
+                )
+            await mock.start()
+            await create_session()
+            try:
+                await connect_api.get_token()
+                for products in args.products:
+                    per_call, upstream = await measure(mock, products, args.repeat)
+                    print(
+                        f"stores = {stores}  {'bulk' if bulk else 'per-product':<12} "
+                        f"products = {products:<3} {per_call:8.2f} ms  "
+                        f"upstream requests = {upstream:.1f}"
+                        )
+            finally:
+                await close_session()
+                await mock.stop()
+    config.STORES = default_stores
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--products', type=int, nargs='+', default=[1, 3, 10])
+    parser.add_argument('--stores', type=int, nargs='+', default=[2, 3])
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--repeat', type=int, default=20)
+    # Логирование отключается, чтобы измерять только работу с API
+    logging.disable(logging.CRITICAL)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,95 @@
+"""
+Бенчмарк планировщика запросов к API на локальной заглушке API магазина.
+Измеряет задержку поисков пользователей без фоновой нагрузки и во время
+фоновой нагрузки (запросы товаров с приоритетом BACKGROUND), а затем выводит
+метрики планировщика: глубину очереди и время ожидания по приоритетам.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_scheduler --searches 200 --background 2000 \\
+        --max-in-flight 10 --reserved 4 --latency 0.02
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import time
+
+from benchmarks.mock_opencart import MockOpenCart
+from src.utils import connect_api
+from src.utils.http_client import close_session, create_session
+from src.utils.request_scheduler import Priority, priority_scope, request_scheduler
+from src.utils.search_cache import search_cache
+
+
+async def run_searches(searches: int, catalog_size: int, rng: random.Random) -> list[float]:
+    """
+    Асинхронно выполняет поиски пользователей по одному и возвращает задержки в мс.
+    """
+    timings = []
+    for _ in range(searches):
+        search_cache.clear()
+        started = time.perf_counter()
+        await connect_api.get_search_results(f'Товар {rng.randint(1, catalog_size)}')
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+async def run_background(requests: int, concurrency: int, catalog_size: int) -> None:
+    """
+    Асинхронно выполняет фоновые запросы товаров в concurrency потоков.
+    """
+    remaining = iter(range(requests))
+
+    async def worker() -> None:
+        with priority_scope(Priority.BACKGROUND):
+            for index in remaining:
+                await connect_api.get_product_quatity(str(index % catalog_size + 1))
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+def report(name: str, timings: list[float]) -> None:
+    """
+    Выводит сводку по задержкам.
+    """
+    quantiles = statistics.quantiles(timings, n=100)
+    print(f"{name:<16} p50 = {quantiles[49]:8.2f} ms  p95 = {quantiles[94]:8.2f} ms")
+
+async def main(args: argparse.Namespace) -> None:
+    """
+    Запускает заглушку и сравнивает задержку поисков без фоновой нагрузки и с ней.
+    """
+    request_scheduler.max_in_flight = args.max_in_flight
+    request_scheduler.reserved_slots = args.reserved
+    rng = random.Random(args.seed)
+    mock = MockOpenCart(latency=args.latency, catalog_size=args.catalog_size)
+    await mock.start()
+    await create_session()
+    try:
+        await connect_api.get_token()
+        report('idle', await run_searches(args.searches, args.catalog_size, rng))
+
+        background = asyncio.create_task(run_background(
+            args.background, args.background_concurrency, args.catalog_size
+            ))
+        await asyncio.sleep(args.latency)
+        report('with background', await run_searches(args.searches, args.catalog_size, rng))
+        await background
+        print(f"scheduler: {request_scheduler.stats()}")
+    finally:
+        await close_session()
+        await mock.stop()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--searches', type=int, default=200)
+    parser.add_argument('--background', type=int, default=3000)
+    parser.add_argument('--background-concurrency', type=int, default=50)
+    parser.add_argument('--max-in-flight', type=int, default=10)
+    parser.add_argument('--reserved', type=int, default=4)
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--catalog-size', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=None)
+    # Логирование отключается, чтобы измерять только работу с API
+    logging.disable(logging.CRITICAL)
+    asyncio.run(main(parser.parse_args()))
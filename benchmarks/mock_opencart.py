@@ -0,0 +1,343 @@
+"""
+Локальная заглушка API магазина OpenCart для бенчмарков.
+Модуль поднимает aiohttp-сервер, который отвечает на те же маршруты,
+что и API магазина (авторизация, поиск, товар, атрибуты, количество,
+клиент по карте, пакетное количество), и перенастраивает URL в `configs.config`
+на этот сервер.
+Задержка ответов задается распределением, доля ошибок и размер каталога
+настраиваются. Заглушка может сжимать ответы и отвечать на условные
+запросы (ETag / If-None-Match) статусом 304.
+"""
+
+import asyncio
+from collections import Counter
+from datetime import datetime, timedelta
+import hashlib
+import json
+import math
+import random
+from typing import Callable
+
+from aiohttp import web
+
+from configs import config
+
+
+ROUTE_LOGIN = 'api/login'
+ROUTE_SEARCH = 'api/search/searchProducts'
+ROUTE_PRODUCT = 'api/product/fetchProductById'
+ROUTE_PRODUCT_ATTRIBUTES = 'api/product/fetchProductAttributesById'
+ROUTE_QUATITY = 'api/product/fetchProductQuantityById'
+ROUTE_QUATITY_BULK = 'api/product/fetchProductsQuantity'
+ROUTE_CUSTOMER_BY_CARD = 'api/card/fetchCustomerByCard'
+ROUTE_PRODUCTS_LIST = 'api/product/fetchProducts'
+
+MODIFIED_BASE = datetime(2025, 1, 1)
+
+
+def make_product(product_id: int) -> dict:
+    """
+    Формирует данные товара в формате ответа API магазина.
+
+    :param product_id: Идентификатор товара.
+    :return: Словарь с данными товара.
+    """
+    return {
+        'product_id': str(product_id),
+        'name': f'Товар {product_id}',
+        'model': f'{100000 + product_id}',
+        'ean': f'{4810000000000 + product_id}',
+        'sku': f'{product_id % 97 + 0.99:.2f}',
+        'upc': 'шт/',
+        'image': f'catalog/products/{product_id}.jpg',
+        'category': 'Инструменты',
+        'description': (
+            f'<div><p>Описание товара {product_id}. Подходит для дома и дачи! '
+            f'Гарантия 12 месяцев.</p></div>'
+            ),
+        'url': f'https://example.com/index.php?route=product/product&product_id={product_id}',
+        'date_modified': '2024-01-01 00:00:00',
+    }
+
+LATENCY_DISTRIBUTIONS = ('constant', 'uniform', 'normal', 'lognormal', 'exponential')
+"""
+Распределения задержки ответа, которые поддерживает make_latency.
+"""
+
+
+def make_latency(
+    distribution: str,
+    mean: float,
+    spread: float = 0.0,
+    rng: random.Random | None = None
+    ) -> Callable[[], float]:
+    """
+    Создает функцию, возвращающую задержку ответа из заданного распределения.
+
+    :param distribution: Одно из LATENCY_DISTRIBUTIONS.
+    :param mean: Средняя задержка в секундах.
+    :param spread: Разброс в секундах: половина ширины для 'uniform',
+    стандартное отклонение для 'normal' и 'lognormal'.
+    :param rng: Генератор случайных чисел (для воспроизводимости).
+    :return: Функция без аргументов, возвращающая задержку в секундах.
+    """
+    rng = rng or random.Random()
+    if distribution == 'constant':
+        return lambda: mean
+    if distribution == 'uniform':
+        return lambda: max(rng.uniform(mean - spread, mean + spread), 0.0)
+    if distribution == 'normal':
+        return lambda: max(rng.gauss(mean, spread), 0.0)
+    if distribution == 'lognormal':
+        if mean <= 0:
+            return lambda: 0.0
+        # Параметры подбираются так, чтобы среднее и отклонение совпадали с заданными
+        sigma2 = math.log1p((spread / mean) ** 2)
+        mu = math.log(mean) - sigma2 / 2
+        return lambda: rng.lognormvariate(mu, sigma2 ** 0.5)
+    if distribution == 'exponential':
+        return lambda: rng.expovariate(1 / mean) if mean > 0 else 0.0
+    raise ValueError(f"Неизвестное распределение задержки: {distribution}")
+
+class MockOpenCart:
+    """
+    Заглушка API магазина OpenCart на aiohttp.
+
+    :param latency: Задержка ответа в секундах или функция, возвращающая
+    задержку для каждого запроса (см. make_latency).
+    :param catalog_size: Количество товаров в каталоге заглушки.
+    :param error_rate: Доля запросов (от 0 до 1), на которые отвечается статусом 500.
+    :param timeout_rate: Доля запросов, ответ на которые задерживается на hang_time.
+    :param hang_time: Задержка "зависшего" ответа в секундах.
+    :param seed: Начальное значение генератора случайных чисел.
+    :param compress: Сжимать ответы, если клиент передал Accept-Encoding.
+    :param etag: Добавлять ETag к ответам и отвечать 304 на совпадающий If-None-Match.
+    :param stores: Количество магазинов в ответах о количестве товара.
+    :param bulk_quantity: Включить в конфигурации пакетный эндпоинт количества.
+    """
+
+    def __init__(
+        self,
+        latency: float | Callable[[], float] = 0.0,
+        catalog_size: int = 100,
+        error_rate: float = 0.0,
+        timeout_rate: float = 0.0,
+        hang_time: float = 60.0,
+        seed: int | None = None,
+        compress: bool = False,
+        etag: bool = False,
+        stores: int = 2,
+        bulk_quantity: bool = False
+        ):
+        self.latency = latency
+        self.compress = compress
+        self.etag = etag
+        self.stores = stores
+        self.bulk_quantity = bulk_quantity
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.hang_time = hang_time
+        self._rng = random.Random(seed)
+        self.catalog = {
+            str(product_id): make_product(product_id)
+            for product_id in range(1, catalog_size + 1)
+        }
+        self.requests_count = 0
+        self.connections_count = 0
+        self.route_counts = Counter()
+        self.errors_count = 0
+        self.not_modified_count = 0
+        self.token_generation = 1
+        self._modified_counter = 0
+        self._peers = set()
+        self._runner: web.AppRunner | None = None
+        self.base_url = ''
+
+    def reset_stats(self) -> None:
+        """
+        Сбрасывает счетчики запросов и соединений.
+        """
+        self.requests_count = 0
+        self.connections_count = 0
+        self.route_counts.clear()
+        self.errors_count = 0
+        self.not_modified_count = 0
+        self._peers.clear()
+
+    @property
+    def token(self) -> str:
+        """
+        Действующий токен авторизации.
+        """
+        return f'mock-token-{self.token_generation}'
+
+    def touch_product(self, product_id: int, name: str | None = None) -> None:
+        """
+        Изменяет товар (или добавляет новый) и обновляет дату его изменения.
+
+        :param product_id: Идентификатор товара.
+        :param name: Новое название товара.
+        """
+        product = self.catalog.setdefault(str(product_id), make_product(product_id))
+        if name is not None:
+            product['name'] = name
+        # Каждое изменение получает дату на секунду позже предыдущего
+        self._modified_counter += 1
+        modified = MODIFIED_BASE + timedelta(seconds=self._modified_counter)
+        product['date_modified'] = modified.strftime('%Y-%m-%d %H:%M:%S')
+
+    def remove_product(self, product_id: int) -> None:
+        """
+        Удаляет товар из каталога заглушки.
+
+        :param product_id: Идентификатор товара.
+        """
+        self.catalog.pop(str(product_id), None)
+
+    def quantity(self) -> list[dict]:
+        """
+        Формирует количество товара по магазинам в формате ответа API.
+        """
+        quantities = ['12.0000', '3.5000']
+        quantities += [f'{store}.0000' for store in range(len(quantities), self.stores)]
+        return [{'quantity': quantity} for quantity in quantities[:self.stores]]
+
+    def revoke_token(self) -> None:
+        """
+        Отзывает выданный токен, как если бы сервер сбросил сессию API.
+        """
+        self.token_generation += 1
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        """
+        Обрабатывает запрос к index.php и выбирает ответ по параметру route.
+        """
+        self.requests_count += 1
+        route = request.query.get('route', '')
+        self.route_counts[route or request.method] += 1
+        latency = self.latency() if callable(self.latency) else self.latency
+        if self.timeout_rate and self._rng.random() < self.timeout_rate:
+            latency = self.hang_time
+        if latency:
+            await asyncio.sleep(latency)
+        if self.error_rate and self._rng.random() < self.error_rate:
+            self.errors_count += 1
+            return web.json_response({'error': 'Internal Server Error'}, status=500)
+
+        if request.method == 'HEAD':
+            # Изображения с именем на missing считаются отсутствующими
+            status = 404 if request.match_info['tail'].startswith('missing') else 200
+            return web.Response(status=status, headers={'Content-Length': '0'})
+        if route == ROUTE_LOGIN:
+            return web.json_response({'success': 'ok', 'token': self.token})
+        if request.query.get('token') != self.token:
+            return web.json_response({
+                'error': {'warning': 'Warning: You do not have permission to access the API!'}
+            })
+        if route == ROUTE_SEARCH:
+            text = request.query.get('search', '').lower()
+            found = [
+                product for product in self.catalog.values()
+                if text in product['name'].lower() or text in (product['model'], product['ean'])
+            ][:20]
+            return web.json_response({product['product_id']: product for product in found})
+        if route == ROUTE_PRODUCTS_LIST:
+            page = int(request.query.get('page', 1))
+            limit = int(request.query.get('limit', 100))
+            modified_since = request.query.get('modified_since', '')
+            products = [
+                product for product in self.catalog.values()
+                if product['date_modified'] > modified_since
+            ]
+            return web.json_response({
+                'products': products[(page - 1) * limit:page * limit],
+                'total': len(products),
+            })
+        if route == ROUTE_PRODUCT:
+            return web.json_response(self.catalog.get(request.query.get('id'), False))
+        if route == ROUTE_PRODUCT_ATTRIBUTES:
+            return web.json_response([{
+                'attribute_group_id': '1',
+                'name': 'Основные',
+                'attribute': [
+                    {'attribute_id': '1', 'name': 'Вес', 'text': '1 кг'},
+                    {'attribute_id': '2', 'name': 'Страна', 'text': 'Беларусь'},
+                ],
+            }])
+        if route == ROUTE_QUATITY:
+            return web.json_response(self.quantity())
+        if route == ROUTE_QUATITY_BULK:
+            ids = request.query.get('ids', '').split(',')
+            return web.json_response({
+                product_id: self.quantity() for product_id in ids if product_id in self.catalog
+            })
+        if route == ROUTE_CUSTOMER_BY_CARD:
+            return web.json_response({
+                'customer_id': '1',
+                'custom_field': json.dumps({'2': 'Р00000002', '3': '31.12.2030', '4': '15.40'}),
+            })
+        return web.json_response({'error': 'Unknown route'}, status=404)
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        """
+        Запускает сервер заглушки и перенастраивает URL API в конфигурации.
+
+        :return: Базовый URL сервера заглушки.
+        """
+        @web.middleware
+        async def count_connections(request: web.Request, handler):
+            # Новое TCP-соединение определяется по уникальному адресу клиента
+            if request.transport is not None:
+                self._peers.add(request.transport.get_extra_info('peername'))
+                self.connections_count = len(self._peers)
+            return await handler(request)
+
+        @web.middleware
+        async def conditional_and_compress(request: web.Request, handler):
+            response = await handler(request)
+            if request.method != 'GET' or response.status != 200 or response.body is None:
+                return response
+            if self.etag:
+                etag = f'"{hashlib.md5(response.body).hexdigest()}"'
+                if request.headers.get('If-None-Match') == etag:
+                    self.not_modified_count += 1
+                    return web.Response(status=304, headers={'ETag': etag})
+                response.headers['ETag'] = etag
+            if self.compress:
+                response.enable_compression()
+            return response
+
+        app = web.Application(middlewares=[count_connections, conditional_and_compress])
+        app.router.add_route('*', '/index.php', self._handle)
+        app.router.add_route('HEAD', '/images/{tail:.*}', self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]  # pylint: disable=protected-access
+        self.base_url = f'http://{host}:{port}'
+
+        config.URL_API_LOGIN = f'{self.base_url}/index.php?route={ROUTE_LOGIN}'
+        config.URL_API_SEARCH = f'{self.base_url}/index.php?route={ROUTE_SEARCH}'
+        config.URL_API_PRODUCT = f'{self.base_url}/index.php?route={ROUTE_PRODUCT}'
+        config.URL_API_PRODUCT_ATTRIBUTES = (
+            f'{self.base_url}/index.php?route={ROUTE_PRODUCT_ATTRIBUTES}'
+            )
+        config.URL_API_QUATITY_BY_PRODUCT_ID = f'{self.base_url}/index.php?route={ROUTE_QUATITY}'
+        config.URL_API_QUATITY_BY_PRODUCT_IDS = (
+            f'{self.base_url}/index.php?route={ROUTE_QUATITY_BULK}' if self.bulk_quantity else ''
+            )
+        config.URL_API_CUSTOMER_BY_CARD = (
+            f'{self.base_url}/index.php?route={ROUTE_CUSTOMER_BY_CARD}'
+            )
+        config.URL_API_PRODUCTS_LIST = f'{self.base_url}/index.php?route={ROUTE_PRODUCTS_LIST}'
+        config.IMAGE_URL = f'{self.base_url}/images/'
+        return self.base_url
+
+    async def stop(self) -> None:
+        """
+        Останавливает сервер заглушки.
+        """
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -34,6 +34,51 @@ def get_ids_from_env(env_var: str) -> list[int]:
         return [int(id_str) for id_str in ids_str.split(',')]
     return []
 
+def get_rates_from_env(env_var: str) -> dict[str, float]:
+    """
+    Получает частоту запросов по эндпоинтам из переменной окружения.
+
+    Переменная содержит пары "адрес=запросов в секунду", разделенные запятыми.
+    Если переменная окружения не установлена или пуста, возвращается пустой словарь.
+
+    :param env_var: Имя переменной окружения.
+    :return: Словарь {адрес эндпоинта: запросов в секунду}.
+
+    Пример использования:
+    >>> os.environ['MY_RATES'] = 'https://example.com/api/search=10,https://example.com/api/card=2'
+    >>> get_rates_from_env('MY_RATES')
+    {'https://example.com/api/search': 10.0, 'https://example.com/api/card': 2.0}
+    """
+    rates_str = os.getenv(env_var)
+    rates = {}
+    if rates_str:
+        for pair in rates_str.split(','):
+            endpoint, _, rate = pair.strip().rpartition('=')
+            rates[endpoint] = float(rate)
+    return rates
+
+def get_list_from_env(env_var: str, separator: str = ';') -> list[str]:
+    """
+    Получает список строк из переменной окружения.
+
+    Элементы разделяются separator (по умолчанию ';', так как адреса
+    содержат запятые), пробелы по краям удаляются, пустые элементы пропускаются.
+    Если переменная окружения не установлена или пуста, возвращается пустой список.
+
+    :param env_var: Имя переменной окружения.
+    :param separator: Разделитель элементов.
+    :return: Список строк.
+
+    Пример использования:
+    >>> os.environ['MY_LIST'] = 'Гродно, ул. Первая 1; Гродно, ул. Вторая 2'
+    >>> get_list_from_env('MY_LIST')
+    ['Гродно, ул. Первая 1', 'Гродно, ул. Вторая 2']
+    """
+    values_str = os.getenv(env_var)
+    if values_str:
+        return [value.strip() for value in values_str.split(separator) if value.strip()]
+    return []
+
 TOKEN = os.getenv('TOKEN')
 """
 Токен для доступа к боту в Telegram.
@@ -79,6 +124,12 @@ URL_API_QUATITY_BY_PRODUCT_ID = os.getenv('URL_API_QUATITY_BY_PRODUCT_ID')
 URL для получения информации о количестве продукта по id через API.
 """
 
+URL_API_QUATITY_BY_PRODUCT_IDS = os.getenv('URL_API_QUATITY_BY_PRODUCT_IDS', '')
+"""
+URL пакетного получения количества нескольких продуктов (параметр 'ids' через запятую).
+Если не задан, количество запрашивается отдельно для каждого продукта.
+"""
+
 URL_SHOP = os.getenv('URL_SHOP')
 """
 URL сайта.
@@ -170,3 +221,399 @@ COMMAND_RESTART_BOT_MESSAGE = os.getenv('COMMAND_RESTART_BOT_MESSAGE')
 """
 Команда для отправки сообщения пользователю о перезапуске бота.
 """
+
+HTTP_POOL_LIMIT = int(os.getenv('HTTP_POOL_LIMIT', '100'))
+"""
+Максимальное количество одновременных соединений в пуле HTTP-клиента.
+"""
+
+HTTP_POOL_LIMIT_PER_HOST = int(os.getenv('HTTP_POOL_LIMIT_PER_HOST', '20'))
+"""
+Максимальное количество одновременных соединений с одним хостом.
+"""
+
+HTTP_DNS_CACHE_TTL = int(os.getenv('HTTP_DNS_CACHE_TTL', '300'))
+"""
+Время жизни кеша DNS в секундах.
+"""
+
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv('HTTP_KEEPALIVE_TIMEOUT', '60'))
+"""
+Время в секундах, в течение которого неиспользуемое соединение остается открытым.
+"""
+
+HTTP_REQUEST_TIMEOUT = float(os.getenv('HTTP_REQUEST_TIMEOUT', '30'))
+"""
+Общий таймаут одного HTTP-запроса к API в секундах.
+"""
+
+API_TOKEN_TTL = int(os.getenv('API_TOKEN_TTL', '3600'))
+"""
+Время жизни токена авторизации API в кеше в секундах.
+"""
+
+API_TOKEN_REFRESH_MARGIN = int(os.getenv('API_TOKEN_REFRESH_MARGIN', '300'))
+"""
+За сколько секунд до истечения времени жизни токен обновляется в фоне.
+"""
+
+API_TOKEN_RETRY_INTERVAL = int(os.getenv('API_TOKEN_RETRY_INTERVAL', '30'))
+"""
+Через сколько секунд повторить фоновое обновление токена после неудачи.
+"""
+
+PRODUCT_CACHE_MAXSIZE = int(os.getenv('PRODUCT_CACHE_MAXSIZE', '5000'))
+"""
+Максимальное количество товаров в кеше информации и атрибутов товаров.
+"""
+
+PRODUCT_PRICE_TTL = int(os.getenv('PRODUCT_PRICE_TTL', '600'))
+"""
+Время жизни в кеше информации о товаре в секундах. API отдает название,
+категорию и изображение одной записью с ценой, поэтому запись живет
+столько же, сколько цена.
+"""
+
+PRODUCT_ATTRIBUTES_TTL = int(os.getenv('PRODUCT_ATTRIBUTES_TTL', '86400'))
+"""
+Время жизни в кеше атрибутов товара в секундах.
+"""
+
+PRODUCT_QUANTITY_TTL = int(os.getenv('PRODUCT_QUANTITY_TTL', '60'))
+"""
+Время жизни в кеше количества товара по магазинам в секундах.
+"""
+
+SEARCH_CACHE_MAXSIZE = int(os.getenv('SEARCH_CACHE_MAXSIZE', '1000'))
+"""
+Максимальное количество поисковых запросов в кеше результатов поиска.
+"""
+
+SEARCH_CACHE_TTL = int(os.getenv('SEARCH_CACHE_TTL', '300'))
+"""
+Время в секундах, в течение которого результат поиска считается свежим.
+"""
+
+SEARCH_CACHE_STALE_TTL = int(os.getenv('SEARCH_CACHE_STALE_TTL', '3600'))
+"""
+Время в секундах после устаревания, в течение которого результат поиска
+возвращается сразу, а его обновление выполняется в фоне.
+"""
+
+SEARCH_CACHE_STEMMING = os.getenv('SEARCH_CACHE_STEMMING', 'false').lower() == 'true'
+"""
+Приводить ли слова поискового запроса к основе (nltk) при формировании ключа кеша.
+"""
+
+PRODUCT_FANOUT_LIMIT = int(os.getenv('PRODUCT_FANOUT_LIMIT', '10'))
+"""
+Максимальное количество одновременных запросов к API при загрузке данных нескольких товаров.
+"""
+
+PRODUCT_CALL_TIMEOUT = float(os.getenv('PRODUCT_CALL_TIMEOUT', '10'))
+"""
+Таймаут в секундах на один запрос данных товара при параллельной загрузке.
+"""
+
+API_BREAKER_FAILURE_THRESHOLD = int(os.getenv('API_BREAKER_FAILURE_THRESHOLD', '5'))
+"""
+Количество ошибок подряд, после которого запросы к эндпоинту API временно прекращаются.
+"""
+
+API_BREAKER_RECOVERY_TIME = float(os.getenv('API_BREAKER_RECOVERY_TIME', '30'))
+"""
+Время в секундах, через которое к недоступному эндпоинту API отправляется пробный запрос.
+"""
+
+API_LATENCY_WINDOW = int(os.getenv('API_LATENCY_WINDOW', '200'))
+"""
+Количество последних задержек эндпоинта API, по которым рассчитывается таймаут.
+"""
+
+API_TIMEOUT_PERCENTILE = float(os.getenv('API_TIMEOUT_PERCENTILE', '99'))
+"""
+Процентиль задержек эндпоинта API, от которого рассчитывается таймаут.
+"""
+
+API_TIMEOUT_MULTIPLIER = float(os.getenv('API_TIMEOUT_MULTIPLIER', '3'))
+"""
+Множитель процентиля задержек при расчете таймаута запроса к API.
+"""
+
+API_TIMEOUT_MIN = float(os.getenv('API_TIMEOUT_MIN', '1'))
+"""
+Минимальный таймаут запроса к API в секундах.
+"""
+
+API_TIMEOUT_MAX = float(os.getenv('API_TIMEOUT_MAX', '15'))
+"""
+Максимальный таймаут запроса к API в секундах, используется, пока задержек накоплено мало.
+"""
+
+API_RETRY_ATTEMPTS = int(os.getenv('API_RETRY_ATTEMPTS', '3'))
+"""
+Максимальное количество попыток запроса к API при временных ошибках.
+"""
+
+API_RETRY_BACKOFF_BASE = float(os.getenv('API_RETRY_BACKOFF_BASE', '0.2'))
+"""
+Начальная пауза в секундах перед повтором запроса к API, удваивается с каждой попыткой.
+"""
+
+API_RETRY_BACKOFF_MAX = float(os.getenv('API_RETRY_BACKOFF_MAX', '2'))
+"""
+Максимальная пауза в секундах перед повтором запроса к API.
+"""
+
+API_REQUEST_DEADLINE = float(os.getenv('API_REQUEST_DEADLINE', '10'))
+"""
+Общий срок в секундах на запрос к API с учетом всех повторов и повторной авторизации.
+"""
+
+DESCRIPTION_CACHE_MAXSIZE = int(os.getenv('DESCRIPTION_CACHE_MAXSIZE', '5000'))
+"""
+Максимальное количество кратких описаний товаров в кеше.
+"""
+
+URL_API_PRODUCTS_LIST = os.getenv('URL_API_PRODUCTS_LIST')
+"""
+URL для постраничного получения списка товаров через API (параметры page, limit
+и modified_since - товары, измененные позже указанной даты). Локальная копия
+каталога синхронизируется, только если задан этот адрес и SEARCH_BACKEND = 'local'.
+"""
+
+SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', 'api')
+"""
+Где выполняется поиск товаров: 'api' - через API магазина,
+'local' - по локальной копии каталога с обращением к API, если ничего не найдено.
+"""
+
+CATALOG_DB_PATH = os.getenv('CATALOG_DB_PATH', 'data/catalog/catalog.db')
+"""
+Путь к базе данных SQLite с локальной копией каталога товаров.
+"""
+
+CATALOG_SYNC_INTERVAL = float(os.getenv('CATALOG_SYNC_INTERVAL', '900'))
+"""
+Интервал в секундах между синхронизациями локальной копии каталога.
+"""
+
+CATALOG_FULL_SYNC_INTERVAL = float(os.getenv('CATALOG_FULL_SYNC_INTERVAL', '86400'))
+"""
+Интервал в секундах между полными синхронизациями каталога, в остальное время
+загружаются только измененные товары.
+"""
+
+CATALOG_SYNC_PAGE_SIZE = int(os.getenv('CATALOG_SYNC_PAGE_SIZE', '500'))
+"""
+Количество товаров на одной странице при синхронизации каталога.
+"""
+
+CATALOG_SEARCH_LIMIT = int(os.getenv('CATALOG_SEARCH_LIMIT', '20'))
+"""
+Максимальное количество товаров в результате поиска по локальному каталогу.
+"""
+
+CATALOG_MAX_AGE = float(os.getenv('CATALOG_MAX_AGE', '3600'))
+"""
+Время в секундах после последней успешной синхронизации, по истечении которого
+локальный каталог считается устаревшим и поиск выполняется через API.
+"""
+
+IMAGE_CACHE_MAXSIZE = int(os.getenv('IMAGE_CACHE_MAXSIZE', '5000'))
+"""
+Максимальное количество URL изображений в кеше проверки существования изображений.
+"""
+
+IMAGE_CACHE_POSITIVE_TTL = float(os.getenv('IMAGE_CACHE_POSITIVE_TTL', '21600'))
+"""
+Время в секундах, в течение которого помнится, что изображение товара существует.
+"""
+
+IMAGE_CACHE_NEGATIVE_TTL = float(os.getenv('IMAGE_CACHE_NEGATIVE_TTL', '600'))
+"""
+Время в секундах, в течение которого помнится, что изображения товара нет.
+Меньше, чем для найденных изображений, чтобы загруженное позже фото быстро появилось в карточке.
+"""
+
+IMAGE_CACHE_PREWARM = os.getenv('IMAGE_CACHE_PREWARM', 'true').lower() == 'true'
+"""
+Проверять в фоне изображения товаров из результатов поиска до того, как пользователь их откроет.
+"""
+
+CUSTOMER_CACHE_MAXSIZE = int(os.getenv('CUSTOMER_CACHE_MAXSIZE', '2000'))
+"""
+Максимальное количество карт в кеше данных покупателей.
+"""
+
+CUSTOMER_CACHE_TTL = float(os.getenv('CUSTOMER_CACHE_TTL', '60'))
+"""
+Время жизни в секундах данных покупателя по номеру карты в кеше.
+Короткое, так как баланс карты меняется после каждой покупки.
+"""
+
+API_SCHEDULER_MAX_IN_FLIGHT = int(os.getenv('API_SCHEDULER_MAX_IN_FLIGHT', '20'))
+"""
+Максимальное количество одновременно выполняемых запросов к API магазина.
+"""
+
+API_SCHEDULER_RESERVED_SLOTS = int(os.getenv('API_SCHEDULER_RESERVED_SLOTS', '5'))
+"""
+Количество слотов одновременных запросов, зарезервированных за запросами
+пользователей и проверками карт. Фоновые задачи их не занимают.
+"""
+
+API_SCHEDULER_RATE = float(os.getenv('API_SCHEDULER_RATE', '0'))
+"""
+Максимальная частота запросов к одному эндпоинту API в секунду, 0 - без ограничения.
+"""
+
+API_SCHEDULER_ENDPOINT_RATES = get_rates_from_env('API_SCHEDULER_ENDPOINT_RATES')
+"""
+Частота запросов для отдельных эндпоинтов в формате "адрес=запросов в секунду",
+через запятую. Переопределяет API_SCHEDULER_RATE.
+"""
+
+API_SCHEDULER_BACKGROUND_RATE_SHARE = float(
+    os.getenv('API_SCHEDULER_BACKGROUND_RATE_SHARE', '0.5')
+    )
+"""
+Доля частоты запросов эндпоинта, которую могут занять фоновые задачи.
+"""
+
+API_SCHEDULER_RESERVED_TOKENS = float(os.getenv('API_SCHEDULER_RESERVED_TOKENS', '2'))
+"""
+Сколько запросов из допустимой частоты эндпоинта фоновые задачи оставляют
+запросам пользователей и проверкам карт: фоновый запрос выполняется, только
+если после него пользователь может сразу отправить еще столько запросов.
+"""
+
+WARMUP_ENABLED = os.getenv('WARMUP_ENABLED', 'true').lower() == 'true'
+"""
+Прогревать кеши по самым частым запросам пользователей перед запуском опроса Telegram.
+"""
+
+WARMUP_TIME_BUDGET = float(os.getenv('WARMUP_TIME_BUDGET', '20'))
+"""
+Максимальное время прогрева кешей при запуске в секундах.
+"""
+
+WARMUP_REQUEST_BUDGET = int(os.getenv('WARMUP_REQUEST_BUDGET', '300'))
+"""
+Максимальное количество запросов к API при прогреве кешей.
+"""
+
+WARMUP_QUERY_LIMIT = int(os.getenv('WARMUP_QUERY_LIMIT', '50'))
+"""
+Количество самых частых запросов каждого типа (по слову, по коду и штрихкоду) для прогрева.
+"""
+
+WARMUP_CONCURRENCY = int(os.getenv('WARMUP_CONCURRENCY', '8'))
+"""
+Количество одновременных запросов прогрева.
+"""
+
+CONDITIONAL_CACHE_MAXSIZE = int(os.getenv('CONDITIONAL_CACHE_MAXSIZE', '5000'))
+"""
+Максимальное количество ответов API с ETag / Last-Modified, сохраняемых
+для условных запросов информации и атрибутов товара.
+"""
+
+INVALIDATION_TOKEN = os.getenv('INVALIDATION_TOKEN', '')
+"""
+Токен для запросов к серверу сброса кеша (заголовок "Authorization: Bearer <токен>").
+Если не задан, сервер сброса кеша не запускается.
+"""
+
+INVALIDATION_HOST = os.getenv('INVALIDATION_HOST', '127.0.0.1')
+"""
+Адрес, на котором сервер сброса кеша принимает запросы.
+"""
+
+INVALIDATION_PORT = int(os.getenv('INVALIDATION_PORT', '8081'))
+"""
+Порт сервера сброса кеша.
+"""
+
+INVALIDATION_BATCH_SIZE = int(os.getenv('INVALIDATION_BATCH_SIZE', '100'))
+"""
+Максимальное количество товаров, обрабатываемых сервером сброса кеша за один пакет.
+"""
+
+INVALIDATION_BATCH_INTERVAL = float(os.getenv('INVALIDATION_BATCH_INTERVAL', '0.5'))
+"""
+Сколько секунд копить изменения товаров перед обработкой неполного пакета.
+"""
+
+INVALIDATION_DEFAULT_ACTION = os.getenv('INVALIDATION_DEFAULT_ACTION', 'invalidate')
+"""
+Действие по умолчанию для изменений товаров: 'invalidate' (сбросить кеш)
+или 'refresh' (сбросить и сразу загрузить заново).
+"""
+
+STORES = get_list_from_env('STORES') or [
+    'Гродно, пр. Космонавтов 2Г',
+    'Гродно, ул. Дзержинского 118',
+]
+"""
+Магазины в порядке, в котором API возвращает количество товара, через ';'.
+"""
+
+QUANTITY_BATCH_SIZE = int(os.getenv('QUANTITY_BATCH_SIZE', '50'))
+"""
+Максимальное количество товаров в одном пакетном запросе количества.
+"""
+
+DECODE_WORKERS = int(os.getenv('DECODE_WORKERS', '0'))
+"""
+Количество процессов распознавания штрихкодов на фото. 0 - по количеству ядер процессора.
+"""
+
+DECODE_QUEUE_SIZE = int(os.getenv('DECODE_QUEUE_SIZE', '16'))
+"""
+Сколько фото может ждать распознавания сверх занятых процессов. Остальные
+запросы ждут свободного места не дольше DECODE_QUEUE_TIMEOUT.
+"""
+
+DECODE_QUEUE_TIMEOUT = float(os.getenv('DECODE_QUEUE_TIMEOUT', '10'))
+"""
+Сколько секунд фото может ждать места в очереди распознавания, прежде чем
+пользователю будет предложено отправить фото позже.
+"""
+
+DECODE_STAGES = get_list_from_env('DECODE_STAGES', ',') or [
+    'downscale', 'full', 'contrast', 'threshold', 'rotate', 'gradient_crop',
+]
+"""
+Этапы распознавания штрихкода на фото в порядке применения, через ','.
+Следующий этап выполняется, только если предыдущие не нашли штрихкод.
+Доступные этапы: downscale, full, contrast, threshold, rotate, gradient_crop.
+"""
+
+DECODE_FAST_MAX_SIDE = int(os.getenv('DECODE_FAST_MAX_SIDE', '800'))
+"""
+Размер большей стороны фото в пикселях для первого, быстрого этапа распознавания (downscale).
+"""
+
+SCAN_CACHE_DB_PATH = os.getenv('SCAN_CACHE_DB_PATH', 'data/scan_cache/scan_cache.db')
+"""
+Путь к базе данных SQLite с распознанными штрихкодами фото (file_unique_id фото Telegram).
+"""
+
+SCAN_CACHE_MAXSIZE = int(os.getenv('SCAN_CACHE_MAXSIZE', '20000'))
+"""
+Максимальное количество распознанных фото в кеше, давно не использованные удаляются.
+"""
+
+SCAN_MIN_PHOTO_SIDE = int(os.getenv('SCAN_MIN_PHOTO_SIDE', '800'))
+"""
+Минимальный размер большей стороны фото в пикселях, с которого начинается
+распознавание штрихкода. Сначала скачивается наименьший размер фото не меньше
+этого, большие размеры скачиваются, только если штрихкод не распознан.
+"""
+
+STATS_LOG_INTERVAL = float(os.getenv('STATS_LOG_INTERVAL', '300'))
+"""
+Интервал в секундах, с которым статистика распознавания фото записывается
+в лог stats_reporter_log.log. Если 0, статистика пишется только при остановке бота.
+"""
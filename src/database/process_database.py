@@ -641,6 +641,47 @@ async def popular_search_query() -> list | None:
         logger.error("Произошла ошибка в функции popular_search_query: %s", e)
         return None
 
+# Самые частые поисковые запросы для прогрева кеша
+async def get_top_search_queries(
+    event_names: tuple[str, ...],
+    limit: int
+    ) -> list[tuple[str, int]] | None:
+    """
+    Асинхронная функция для получения самых частых поисковых запросов
+    указанных типов событий (например, '30' - поиск по слову,
+    '31' - по коду товара, '32' и '33' - по штрихкоду).
+    Учитываются только успешные поиски. В отличие от popular_search_query
+    возвращает сами запросы, а не текст отчета.
+
+    :param event_names: Типы событий поиска.
+    :param limit: Максимальное количество запросов.
+    :return: Список пар (запрос, количество) по убыванию количества или None при ошибке.
+    """
+    try:
+        logger.info("Попытка выполнения функции get_top_search_queries")
+        placeholders = ', '.join('?' for _ in event_names)
+        async with aiosqlite.connect('data/statisctics/user_database.db') as db:
+            query = f"""
+            SELECT event_query, COUNT(*) as count
+            FROM user_events
+            WHERE event_query IS NOT NULL
+            AND event_name IN ({placeholders})
+            AND event_result = '1'
+            GROUP BY event_query
+            ORDER BY count DESC
+            LIMIT ?
+            """
+            async with db.execute(query, (*event_names, limit)) as cursor:
+                results = await cursor.fetchall()
+                logger.info(
+                    "Функция get_top_search_queries выполнилась, получено %s запросов",
+                    len(results)
+                    )
+                return [(result[0], result[1]) for result in results]
+    except aiosqlite.Error as e:
+        logger.error("Произошла ошибка в функции get_top_search_queries: %s", e)
+        return None
+
 # Функция для определения периода суток
 async def get_time_of_day(hour: int) -> str | None:
     """
@@ -0,0 +1,297 @@
+"""
+Модуль для асинхронной работы с локальной копией каталога товаров в SQLite.
+Этот модуль предоставляет функции для создания таблиц каталога и полнотекстового
+индекса FTS5, пакетной записи товаров, удаления товаров, пропавших из магазина,
+хранения отметок синхронизации и поиска товаров по индексу.
+"""
+import logging
+from logging.handlers import RotatingFileHandler
+import os
+
+import aiosqlite
+
+from configs import config
+
+
+logging.basicConfig(level=logging.INFO)
+
+# Установка размера файла логов в 8 МБ
+MAX_BYTES = 8 * 1024 * 1024  # 8 МБ в байтах
+
+# Создание обработчика файлов с ограничением размера и ротацией
+file_handler = RotatingFileHandler(
+    "logs/process_database_catalog_log.log",
+    maxBytes=MAX_BYTES,  # Установка максимального размера файла логов
+    backupCount=30,  # Количество файлов логов, которые будут храниться
+    encoding="utf-8",
+)
+
+# Формат сообщений
+formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(formatter)
+
+# Добавление обработчика в логгер
+logger = logging.getLogger('process_database_catalog_logger')
+logger.addHandler(file_handler)
+
+CATALOG_COLUMNS = ('product_id', 'name', 'model', 'ean', 'description', 'url', 'image')
+"""
+Поля товара, которые хранятся в локальном каталоге.
+"""
+
+
+# Создание таблиц каталога
+async def create_catalog_tables(db_path: str = config.CATALOG_DB_PATH) -> None:
+    """
+    Асинхронная функция для создания таблиц локального каталога.
+
+    Создает таблицу 'products' с данными товаров, полнотекстовый индекс
+    'products_fts' (FTS5) по названию, коду, штрихкоду и описанию
+    и таблицу 'catalog_meta' с отметками синхронизации.
+
+    :param db_path: Путь к файлу базы данных каталога.
+    :return: None
+    """
+    try:
+        logger.info("Попытка выполнения функции create_catalog_tables")
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        async with aiosqlite.connect(db_path) as db:
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS products (
+                    product_id INTEGER PRIMARY KEY,
+                    name TEXT,
+                    model TEXT,
+                    ean TEXT,
+                    description TEXT,
+                    url TEXT,
+                    image TEXT,
+                    date_modified TEXT,
+                    sync_id INTEGER
+                )
+            ''')
+            await db.execute('CREATE INDEX IF NOT EXISTS products_model ON products (model)')
+            await db.execute('CREATE INDEX IF NOT EXISTS products_ean ON products (ean)')
+            await db.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+                    name, model, ean, description,
+                    content='products', content_rowid='product_id',
+                    tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+                )
+            ''')
+            # Индекс обновляется триггерами при любом изменении таблицы products
+            await db.executescript('''
+                CREATE TRIGGER IF NOT EXISTS products_ai AFTER INSERT ON products BEGIN
+                    INSERT INTO products_fts (rowid, name, model, ean, description)
+                    VALUES (new.product_id, new.name, new.model, new.ean, new.description);
+                END;
+                CREATE TRIGGER IF NOT EXISTS products_ad AFTER DELETE ON products BEGIN
+                    INSERT INTO products_fts (products_fts, rowid, name, model, ean, description)
+                    VALUES ('delete', old.product_id, old.name, old.model, old.ean,
+                        old.description);
+                END;
+                CREATE TRIGGER IF NOT EXISTS products_au AFTER UPDATE ON products BEGIN
+                    INSERT INTO products_fts (products_fts, rowid, name, model, ean, description)
+                    VALUES ('delete', old.product_id, old.name, old.model, old.ean,
+                        old.description);
+                    INSERT INTO products_fts (rowid, name, model, ean, description)
+                    VALUES (new.product_id, new.name, new.model, new.ean, new.description);
+                END;
+            ''')
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS catalog_meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            ''')
+            await db.commit()
+        logger.info("Функция create_catalog_tables выполнилась")
+    except aiosqlite.Error as e:
+        logger.error("Произошла ошибка в функции create_catalog_tables: %s", e)
+
+# Пакетная запись товаров
+async def upsert_products(
+    products: list[dict],
+    sync_id: int,
+    db_path: str = config.CATALOG_DB_PATH
+    ) -> int | None:
+    """
+    Асинхронная функция для добавления или обновления товаров в каталоге.
+
+    :param products: Список товаров с полями CATALOG_COLUMNS и 'date_modified'.
+    :param sync_id: Номер синхронизации, которой получены товары.
+    :param db_path: Путь к файлу базы данных каталога.
+    :return: Количество записанных товаров или None при ошибке.
+    """
+    try:
+        async with aiosqlite.connect(db_path) as db:
+            await db.executemany('''
+                INSERT INTO products (
+                    product_id, name, model, ean, description, url, image,
+                    date_modified, sync_id
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (product_id) DO UPDATE SET
+                    name = excluded.name,
+                    model = excluded.model,
+                    ean = excluded.ean,
+                    description = excluded.description,
+                    url = excluded.url,
+                    image = excluded.image,
+                    date_modified = excluded.date_modified,
+                    sync_id = excluded.sync_id
+            ''', [
+                (
+                    *(product.get(column) for column in CATALOG_COLUMNS),
+                    product.get('date_modified'),
+                    sync_id
+                )
+                for product in products
+            ])
+            await db.commit()
+        return len(products)
+    except aiosqlite.Error as e:
+        logger.error("Произошла ошибка в функции upsert_products: %s", e)
+        return None
+
+# Удаление товаров, которых больше нет в магазине
+async def delete_products_not_in_sync(
+    sync_id: int,
+    db_path: str = config.CATALOG_DB_PATH
+    ) -> int | None:
+    """
+    Асинхронная функция для удаления товаров, не полученных полной синхронизацией.
+
+    :param sync_id: Номер завершенной полной синхронизации.
+    :param db_path: Путь к файлу базы данных каталога.
+    :return: Количество удаленных товаров или None при ошибке.
+    """
+    try:
+        async with aiosqlite.connect(db_path) as db:
+            cursor = await db.execute(
+                'DELETE FROM products WHERE sync_id IS NOT ?', (sync_id,)
+                )
+            await db.commit()
+            return cursor.rowcount
+    except aiosqlite.Error as e:
+        logger.error("Произошла ошибка в функции delete_products_not_in_sync: %s", e)
+        return None
+
+# Чтение отметки синхронизации
+async def get_catalog_meta(key: str, db_path: str = config.CATALOG_DB_PATH) -> str | None:
+    """
+    Асинхронная функция для чтения значения из таблицы 'catalog_meta'.
+
+    :param key: Ключ значения (например, 'last_modified').
+    :param db_path: Путь к файлу базы данных каталога.
+    :return: Значение или None, если его нет.
+    """
+    try:
+        async with aiosqlite.connect(db_path) as db:
+            async with db.execute(
+                'SELECT value FROM catalog_meta WHERE key = ?', (key,)
+            ) as cursor:
+                result = await cursor.fetchone()
+                return result[0] if result else None
+    except aiosqlite.Error as e:
+        logger.error("Произошла ошибка в функции get_catalog_meta: %s", e)
+        return None
+
+# Запись отметки синхронизации
+async def set_catalog_meta(key: str, value: str, db_path: str = config.CATALOG_DB_PATH) -> None:
+    """
+    Асинхронная функция для записи значения в таблицу 'catalog_meta'.
+
+    :param key: Ключ значения.
+    :param value: Значение.
+    :param db_path: Путь к файлу базы данных каталога.
+    :return: None
+    """
+    try:
+        async with aiosqlite.connect(db_path) as db:
+            await db.execute(
+                'INSERT OR REPLACE INTO catalog_meta (key, value) VALUES (?, ?)', (key, value)
+                )
+            await db.commit()
+    except aiosqlite.Error as e:
+        logger.error("Произошла ошибка в функции set_catalog_meta: %s", e)
+
+# Количество товаров в каталоге
+async def count_catalog_products(db_path: str = config.CATALOG_DB_PATH) -> int | None:
+    """
+    Асинхронная функция для подсчета товаров в локальном каталоге.
+
+    :param db_path: Путь к файлу базы данных каталога.
+    :return: Количество товаров или None при ошибке.
+    """
+    try:
+        async with aiosqlite.connect(db_path) as db:
+            async with db.execute('SELECT COUNT(*) FROM products') as cursor:
+                result = await cursor.fetchone()
+                return result[0]
+    except aiosqlite.Error as e:
+        logger.error("Произошла ошибка в функции count_catalog_products: %s", e)
+        return None
+
+def build_fts_query(text: str) -> str | None:
+    """
+    Составляет запрос FTS5 из поискового текста: каждое слово ищется
+    как префикс, все слова должны встретиться в товаре.
+
+    :param text: Нормализованный поисковый запрос.
+    :return: Запрос FTS5 или None, если в тексте нет слов.
+
+    Пример использования:
+    >>> build_fts_query('дрель makita')
+    '"дрель"* "makita"*'
+    """
+    words = [word.replace('"', '""') for word in text.split()]
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+# Поиск товаров по локальному каталогу
+async def search_catalog(
+    text: str,
+    limit: int = config.CATALOG_SEARCH_LIMIT,
+    db_path: str = config.CATALOG_DB_PATH
+    ) -> list[dict] | None:
+    """
+    Асинхронная функция для поиска товаров в локальном каталоге.
+
+    Запрос из цифр сначала ищется как точный код товара или штрихкод,
+    затем выполняется полнотекстовый поиск с ранжированием bm25,
+    в котором совпадение в названии весит больше, чем в описании.
+
+    :param text: Нормализованный поисковый запрос.
+    :param limit: Максимальное количество товаров в результате.
+    :param db_path: Путь к файлу базы данных каталога.
+    :return: Список товаров с полями CATALOG_COLUMNS или None при ошибке.
+    """
+    columns = ', '.join(f'products.{column}' for column in CATALOG_COLUMNS)
+    try:
+        async with aiosqlite.connect(db_path) as db:
+            if text.isdigit():
+                async with db.execute(
+                    f'SELECT {columns} FROM products WHERE model = ? OR ean = ? LIMIT ?',
+                    (text, text, limit)
+                ) as cursor:
+                    rows = await cursor.fetchall()
+                if rows:
+                    return [dict(zip(CATALOG_COLUMNS, row)) for row in rows]
+
+            fts_query = build_fts_query(text)
+            if fts_query is None:
+                return []
+            async with db.execute(f'''
+                SELECT {columns}
+                FROM products_fts
+                JOIN products ON products.product_id = products_fts.rowid
+                WHERE products_fts MATCH ?
+                ORDER BY bm25(products_fts, 10.0, 5.0, 5.0, 1.0)
+                LIMIT ?
+            ''', (fts_query, limit)) as cursor:
+                rows = await cursor.fetchall()
+            return [dict(zip(CATALOG_COLUMNS, row)) for row in rows]
+    except aiosqlite.Error as e:
+        logger.error("Произошла ошибка в функции search_catalog: %s", e)
+        return None
@@ -0,0 +1,160 @@
+"""
+Модуль для асинхронной работы с кешем распознанных фото в SQLite.
+Этот модуль предоставляет функции для создания таблицы распознанных
+штрихкодов (по file_unique_id фото Telegram), чтения последних
+использованных записей, записи результатов и отметок использования
+и удаления давно не использованных записей.
+"""
+import logging
+from logging.handlers import RotatingFileHandler
+import os
+
+import aiosqlite
+
+from configs import config
+
+
+logging.basicConfig(level=logging.INFO)
+
+# Установка размера файла логов в 8 МБ
+MAX_BYTES = 8 * 1024 * 1024  # 8 МБ в байтах
+
+# Создание обработчика файлов с ограничением размера и ротацией
+file_handler = RotatingFileHandler(
+    "logs/process_database_scans_log.log",
+    maxBytes=MAX_BYTES,  # Установка максимального размера файла логов
+    backupCount=30,  # Количество файлов логов, которые будут храниться
+    encoding="utf-8",
+)
+
+# Формат сообщений
+formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(formatter)
+
+# Добавление обработчика в логгер
+logger = logging.getLogger('process_database_scans_logger')
+logger.addHandler(file_handler)
+
+
+# Создание таблицы распознанных фото
+async def create_scan_table(db_path: str = config.SCAN_CACHE_DB_PATH) -> None:
+    """
+    Асинхронная функция для создания таблицы 'scans' с распознанными
+    штрихкодами фото и временем последнего использования записи.
+
+    :param db_path: Путь к файлу базы данных кеша распознанных фото.
+    :return: None
+    """
+    try:
+        logger.info("Попытка выполнения функции create_scan_table")
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        async with aiosqlite.connect(db_path) as db:
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS scans (
+                    file_unique_id TEXT PRIMARY KEY,
+                    barcode TEXT NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            ''')
+            await db.execute('CREATE INDEX IF NOT EXISTS scans_last_used ON scans (last_used)')
+            await db.commit()
+        logger.info("Функция create_scan_table выполнилась")
+    except aiosqlite.Error as e:
+        logger.error("Произошла ошибка в функции create_scan_table: %s", e)
+
+# Чтение последних использованных записей
+async def load_scans(
+    limit: int,
+    db_path: str = config.SCAN_CACHE_DB_PATH
+    ) -> list[tuple[str, str]] | None:
+    """
+    Асинхронная функция для чтения последних использованных записей.
+
+    :param limit: Максимальное количество записей.
+    :param db_path: Путь к файлу базы данных кеша распознанных фото.
+    :return: Список (file_unique_id, штрихкод) от давно использованных
+    к недавно использованным или None при ошибке.
+    """
+    try:
+        async with aiosqlite.connect(db_path) as db:
+            async with db.execute(
+                'SELECT file_unique_id, barcode FROM '
+                '(SELECT * FROM scans ORDER BY last_used DESC LIMIT ?) ORDER BY last_used',
+                (limit,)
+            ) as cursor:
+                return [tuple(row) for row in await cursor.fetchall()]
+    except aiosqlite.Error as e:
+        logger.error("Произошла ошибка в функции load_scans: %s", e)
+        return None
+
+# Запись распознанного фото
+async def save_scan(
+    file_unique_id: str,
+    barcode: str,
+    last_used: float,
+    db_path: str = config.SCAN_CACHE_DB_PATH
+    ) -> None:
+    """
+    Асинхронная функция для записи штрихкода фото и времени его использования.
+
+    :param file_unique_id: Уникальный идентификатор фото Telegram.
+    :param barcode: Распознанный штрихкод.
+    :param last_used: Время использования (time.time()).
+    :param db_path: Путь к файлу базы данных кеша распознанных фото.
+    :return: None
+    """
+    try:
+        async with aiosqlite.connect(db_path) as db:
+            await db.execute(
+                'INSERT OR REPLACE INTO scans (file_unique_id, barcode, last_used) '
+                'VALUES (?, ?, ?)',
+                (file_unique_id, barcode, last_used)
+                )
+            await db.commit()
+    except aiosqlite.Error as e:
+        logger.error("Произошла ошибка в функции save_scan: %s", e)
+
+# Пакетная запись отметок использования
+async def touch_scans(
+    touched: list[tuple[float, str]],
+    db_path: str = config.SCAN_CACHE_DB_PATH
+    ) -> int | None:
+    """
+    Асинхронная функция для обновления времени использования записей одной транзакцией.
+
+    :param touched: Список (время использования, file_unique_id).
+    :param db_path: Путь к файлу базы данных кеша распознанных фото.
+    :return: Количество обновленных записей или None при ошибке.
+    """
+    try:
+        async with aiosqlite.connect(db_path) as db:
+            await db.executemany(
+                'UPDATE scans SET last_used = ? WHERE file_unique_id = ?', touched
+                )
+            await db.commit()
+            return len(touched)
+    except aiosqlite.Error as e:
+        logger.error("Произошла ошибка в функции touch_scans: %s", e)
+        return None
+
+# Удаление давно не использованных записей
+async def trim_scans(max_entries: int, db_path: str = config.SCAN_CACHE_DB_PATH) -> int | None:
+    """
+    Асинхронная функция для удаления записей сверх max_entries последних использованных.
+
+    :param max_entries: Сколько последних использованных записей оставить.
+    :param db_path: Путь к файлу базы данных кеша распознанных фото.
+    :return: Количество удаленных записей или None при ошибке.
+    """
+    try:
+        async with aiosqlite.connect(db_path) as db:
+            cursor = await db.execute(
+                'DELETE FROM scans WHERE file_unique_id NOT IN '
+                '(SELECT file_unique_id FROM scans ORDER BY last_used DESC LIMIT ?)',
+                (max_entries,)
+                )
+            await db.commit()
+            return cursor.rowcount
+    except aiosqlite.Error as e:
+        logger.error("Произошла ошибка в функции trim_scans: %s", e)
+        return None
@@ -26,7 +26,7 @@ from aiogram import Bot, Dispatcher, F, Router
 from aiogram.enums import ParseMode
 from aiogram.filters import Command, CommandStart
 from aiogram.fsm.context import FSMContext
-from aiogram.types import Message, BufferedInputFile
+from aiogram.types import BufferedInputFile, CallbackQuery, Message
 
 from src.telegram_bot.other_button import (
     add_discont_card,
@@ -76,9 +76,18 @@ from src.telegram_bot.states_class import (
     FormProduct,
     FormDiscontCard,
     FormSendingAdv,
+    ProductDetails,
     UserStates
 )
 from src.telegram_bot import process_bot
+from src.utils.cache_warmup import warm_up_caches
+from src.utils.catalog_sync import start_catalog_sync, stop_catalog_sync
+from src.utils.connect_api import start_token_refresher, stop_token_refresher
+from src.utils.decode_pool import decode_pool
+from src.utils.http_client import close_session, create_session
+from src.utils.invalidation_server import start_invalidation_server, stop_invalidation_server
+from src.utils.scan_cache import scan_cache
+from src.utils.stats_reporter import start_stats_reporter, stop_stats_reporter
 from configs import config
 
 
@@ -362,6 +371,23 @@ async def process_search_general_wrapper(message: Message, state: FSMContext, bo
         # Передача управления в функцию process_bot.process_search
         await process_bot.process_search_general(message, state, bot)
 
+# Обработчик кнопок "Наличие" и "Характеристики" под карточкой товара
+@form_router.callback_query(ProductDetails.filter())
+async def process_product_details_wrapper(
+    callback: CallbackQuery, callback_data: ProductDetails, bot: Bot
+    ) -> None:
+    """
+    Обработчик нажатия кнопок "Наличие" и "Характеристики" под карточкой товара.
+    Передает управление в функцию process_bot.process_product_details.
+
+    :param callback: Объект нажатия кнопки.
+    :param callback_data: Данные кнопки (действие и идентификатор товара).
+    :param bot: Объект бота для взаимодействия с Telegram API.
+    :return: None
+    """
+    logger.info("Выполнение функции process_product_details_wrapper")
+    await process_bot.process_product_details(callback, callback_data, bot)
+
 #--------------------------------------------------------------КОНЕЦ МЕНЮ ПОИСКА ТОВАРА------------------------------------------------------------------------------------------#
 
 
@@ -1337,9 +1363,42 @@ async def main():
     """
     Основная функция запуска бота.
     Запускает бота в режиме опроса (polling) для получения обновлений от Telegram.
+    Перед запуском создает пул процессов распознавания штрихкодов
+    и общую HTTP-сессию, запускает фоновое обновление
+    токена API, синхронизацию локального каталога и сервер сброса кеша
+    по событиям магазина, загружает кеш распознанных фото и прогревает
+    кеши по самым частым запросам пользователей, а после остановки
+    завершает фоновые задачи.
     """
     logger.info("Запуск бота")
-    await dp.start_polling(gemma_bot)
+    # Процессы распознавания штрихкодов создаются до запуска остальных фоновых задач
+    decode_pool.start()
+    # Общая HTTP-сессия для всех запросов к API магазина
+    await create_session()
+    # Токен API обновляется в фоне до истечения срока его жизни
+    start_token_refresher()
+    # Локальная копия каталога для поиска без обращения к API
+    start_catalog_sync()
+    # Сервер, принимающий от магазина изменения товаров для сброса кеша
+    await start_invalidation_server()
+    # Штрихкоды ранее распознанных фото загружаются из базы данных
+    await scan_cache.load()
+    # Статистика распознавания фото периодически записывается в лог
+    start_stats_reporter()
+    try:
+        if config.WARMUP_ENABLED:
+            # Кеши прогреваются до начала опроса, время прогрева ограничено
+            await warm_up_caches()
+        await dp.start_polling(gemma_bot)
+    finally:
+        await stop_stats_reporter()
+        # Время использования распознанных фото сохраняется до остановки
+        await scan_cache.flush()
+        await stop_invalidation_server()
+        await stop_catalog_sync()
+        await stop_token_refresher()
+        await close_session()
+        decode_pool.shutdown()
 
 if __name__ == "__main__":
     # Запуск асинхронного цикла событий
@@ -6,7 +6,6 @@
 """
 from datetime import datetime
 import logging
-import json
 from logging.handlers import RotatingFileHandler
 import os
 
@@ -24,7 +23,7 @@ from aiogram.types import (
 from aiogram.exceptions import TelegramForbiddenError
 
 from src.utils.collecting_all_statistics import save_all_stats_to_excel
-from src.utils.connect_api import get_user_by_card_code
+from src.utils.connect_api import get_customer_by_card
 from src.database.process_database_message import (
     get_id_message,
     get_id_message_user_type,
@@ -350,9 +349,8 @@ async def balance_discont_card(message: Message, state: FSMContext) -> None:
             id_usr = str(message.from_user.id)
             number_card = data_id[id_usr] # Номер карты
             # Данные о пользователе из базы данных
-            customer_info = await get_user_by_card_code(number_card)
-            custom_fifeld = json.loads(customer_info['custom_field']) # Поле кастом филд
-            balance = custom_fifeld['4'] # Накопленная сумма на карте
+            customer_info = await get_customer_by_card(number_card)
+            balance = customer_info.balance # Накопленная сумма на карте
             if balance is None or balance == '':
                 balance = '0'
 
@@ -9,18 +9,20 @@ import asyncio
 import logging
 from logging.handlers import RotatingFileHandler
 import os
-import json
 import re
+import time
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
+from io import BytesIO
 
 from aiohttp import TooManyRedirects
 from aiogram import Bot
 from aiogram.fsm.context import FSMContext
-from aiogram.types import FSInputFile, InlineKeyboardButton, Message
+from aiogram.types import CallbackQuery, FSInputFile, InlineKeyboardButton, Message
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 from configs import config
-from src.utils.barcod_ import generate_barcode, return_barcode
+from src.utils.barcod_ import DECODE_STAGES, generate_barcode, return_barcode
 from src.utils.check import (
     add_data_to_json,
     censor_swear_words,
@@ -28,24 +30,27 @@ from src.utils.check import (
     find_matching_key,
     format_product_attributes,
     find_user_id,
+    format_product_stock,
     format_product_text,
-    quatity_discount,
     rate_limit,
 )
+from src.utils.circuit_breaker import CircuitOpenError
 from src.utils.connect_api import (
-    connect_product_attributes_to_id,
-    connect_product_to_id,
     connect_search,
-    get_card_field_two,
-    get_product_quatity,
-    get_user_by_card_code,
+    get_customer_by_card,
+    is_api_degraded,
 )
+from src.utils.decode_pool import DecodeQueueFullError
+from src.utils.models import SearchHit
+from src.utils.photo_sizes import photo_scan_stats, scan_order, size_label
+from src.utils.product_loader import load_product_bundles
 from src.utils.read_json import read_json_file, update_json_file
+from src.utils.scan_cache import scan_cache
 from src.database.process_database import insert_data
 from src.database.process_database_message import insert_message_data
 from src.telegram_bot.menus import general_menu, start_bot
 from src.telegram_bot.other_button import handle_privacy_agreement_if_not
-from src.telegram_bot.states_class import FormAsk
+from src.telegram_bot.states_class import FormAsk, ProductDetails
 
 
 
@@ -71,6 +76,167 @@ file_handler.setFormatter(formatter)
 logger = logging.getLogger('process_bot_logger')
 logger.addHandler(file_handler)
 
+DETAILS_STOCK = 'stock'
+"""
+Действие кнопки "Наличие": показать количество товара по магазинам.
+"""
+
+DETAILS_ATTRIBUTES = 'attributes'
+"""
+Действие кнопки "Характеристики": показать атрибуты товара.
+"""
+
+API_DEGRADED_NOTE = (
+    "\n⚠️ Сервер магазина сейчас отвечает с перебоями, "
+    "цены и наличие могут быть неактуальны."
+    )
+
+
+def degraded_note() -> str:
+    """
+    Возвращает предупреждение для ответа пользователю, если API магазина
+    сейчас недоступен и данные могут быть взяты из кеша.
+
+    :return: Текст предупреждения или пустая строка.
+    """
+    if is_api_degraded():
+        return API_DEGRADED_NOTE
+    return ""
+
+def add_product_buttons(builder: InlineKeyboardBuilder, product_data: SearchHit) -> None:
+    """
+    Добавляет кнопку-ссылку на товар и под ней кнопки "Наличие" и "Характеристики",
+    по которым наличие и характеристики товара загружаются только при нажатии.
+
+    :param builder: Построитель inline-клавиатуры ответа.
+    :param product_data: Товар из результатов поиска.
+    :return: None
+    """
+    builder.row(InlineKeyboardButton(text=product_data.name, url=product_data.url))
+    builder.row(
+        InlineKeyboardButton(
+            text="Наличие",
+            callback_data=ProductDetails(
+                action=DETAILS_STOCK, product_id=product_data.product_id
+                ).pack()
+            ),
+        InlineKeyboardButton(
+            text="Характеристики",
+            callback_data=ProductDetails(
+                action=DETAILS_ATTRIBUTES, product_id=product_data.product_id
+                ).pack()
+            ),
+        )
+
+async def answer_api_unavailable(message: Message, bot: Bot) -> None:
+    """
+    Асинхронно сообщает пользователю, что API магазина временно недоступен
+    и данных для ответа в кеше нет.
+
+    :param message: Объект сообщения пользователя.
+    :param bot: Объект бота для взаимодействия с Telegram API.
+    :return: None
+    """
+    await message.answer(
+        "К сожалению, сервер магазина сейчас временно недоступен. "
+        "Пожалуйста, повторите запрос через несколько минут."
+        )
+    await bot.send_sticker(
+        chat_id=message.chat.id,
+        sticker="CAACAgQAAxkBAAEMfytmlSZ1A6vs-8mvAAHW5bfgjYWjWNgAAmUNAAKQnOlQenL3YIArH3s1BA"
+        )
+
+async def answer_decode_busy(message: Message, bot: Bot) -> None:
+    """
+    Асинхронно сообщает пользователю, что фото сейчас не распознать: очередь
+    распознавания заполнена или процесс распознавания перезапускается.
+
+    :param message: Объект сообщения пользователя.
+    :param bot: Объект бота для взаимодействия с Telegram API.
+    :return: None
+    """
+    await message.answer(
+        "Сейчас очень много фото на распознавании. "
+        "Пожалуйста, отправьте фото еще раз через несколько секунд."
+        )
+    await bot.send_sticker(
+        chat_id=message.chat.id,
+        sticker="CAACAgQAAxkBAAEMfytmlSZ1A6vs-8mvAAHW5bfgjYWjWNgAAmUNAAKQnOlQenL3YIArH3s1BA"
+        )
+
+async def read_photo_barcode(message: Message, bot: Bot) -> str | None:
+    """
+    Асинхронно распознает штрихкод на фото из сообщения пользователя.
+    Сначала штрихкод ищется в кеше распознанных фото по file_unique_id,
+    и только если фото еще не распознавалось, оно скачивается в память
+    и распознается. Скачивается наименьший достаточный размер фото (см. photo_sizes),
+    большие размеры - только если штрихкод не распознан. Быстрый этап downscale
+    не повторяется для больших размеров, если предыдущий размер был не больше
+    DECODE_FAST_MAX_SIDE. Успешно распознанный штрихкод сохраняется в кеш.
+
+    :param message: Объект сообщения пользователя, содержащий фото.
+    :param bot: Объект бота для взаимодействия с Telegram API.
+    :return: Текст штрихкода или None, если распознать не удалось.
+    :raises DecodeQueueFullError: Если очередь распознавания заполнена.
+    :raises BrokenProcessPool: Если процесс распознавания аварийно завершился.
+    """
+    largest_photo = message.photo[-1]
+    number_barcode = await scan_cache.get(largest_photo.file_unique_id)
+    if number_barcode is not None:
+        logger.info(
+            "В функции read_photo_barcode штрихкод %s фото %s пользователя "
+            "id = %s name = %s взят из кеша",
+            number_barcode, largest_photo.file_unique_id,
+            message.from_user.id, (message.from_user.full_name)
+            )
+        return number_barcode
+    photo_sizes = scan_order(message.photo)
+    downloaded_bytes = 0
+    attempts = 0
+    previous_side = None
+    for index, photo in enumerate(photo_sizes):
+        # Промежуточные размеры распознаются только быстрым этапом,
+        # все этапы предобработки выполняются для самого большого размера
+        stages = DECODE_STAGES if index == len(photo_sizes) - 1 else DECODE_STAGES[:1]
+        # Если предыдущий размер не больше DECODE_FAST_MAX_SIDE, уменьшенная
+        # копия этого размера повторила бы уже не распознанное фото
+        if (
+            previous_side is not None
+            and previous_side <= config.DECODE_FAST_MAX_SIDE
+            and stages[:1] == ('downscale',)
+            ):
+            stages = stages[1:]
+        if not stages:
+            continue
+        attempts += 1
+        previous_side = max(photo.width, photo.height)
+        started = time.perf_counter()
+        file = await bot.get_file(photo.file_id)
+        file_path = file.file_path
+        # Скачиваем файл в память, без записи на диск
+        downloaded_file = BytesIO()
+        await bot.download_file(file_path, destination=downloaded_file)
+        photo_bytes = downloaded_file.getvalue()
+        downloaded_bytes += len(photo_bytes)
+        logger.info(
+            "В функции read_photo_barcode Скачал файл  = %s (%sx%s, %s байт) от пользователя "
+            "id = %s name = %s",
+            file_path, photo.width, photo.height, len(photo_bytes),
+            message.from_user.id, (message.from_user.full_name)
+            )
+        number_barcode = await return_barcode(photo_bytes, stages)
+        photo_scan_stats.record_attempt(
+            size_label(photo), number_barcode is not None, time.perf_counter() - started
+            )
+        if number_barcode is not None:
+            break
+    photo_scan_stats.record_photo(
+        number_barcode is not None, attempts, downloaded_bytes, largest_photo.file_size or 0
+        )
+    if number_barcode is not None:
+        await scan_cache.set(largest_photo.file_unique_id, number_barcode)
+    return number_barcode
+
 
 async def process_privacy_agreement(message: Message, state: FSMContext, bot:Bot) -> None:
     """
@@ -257,13 +423,17 @@ async def process_search(message: Message, state: FSMContext, bot: Bot) -> None:
             builder_all = InlineKeyboardBuilder()
 
             if len(product_information) == 1:
-                product_data_1 = product_information.get('product_0')
-
-                # Цена
-                product_information_to_id_1 = await connect_product_to_id(
-                    product_data_1.get('product_id')
-                    )
-                img_url = f'{config.IMAGE_URL}{product_information_to_id_1['image']}'
+                product_data_1 = product_information[0]
+                product_id_1 = product_data_1.product_id
+
+                # Наличие изображения проверяется одновременно с загрузкой данных товара
+                img_url = f'{config.IMAGE_URL}{product_data_1.image}'
+                image_check = asyncio.create_task(check_image_exists(img_url))
+                # Для краткой карточки нужна только цена, наличие загружается по кнопке
+                product_bundle_1 = (await load_product_bundles(
+                    [product_id_1], with_quantity=False, required=('info',)
+                    ))[product_id_1]
+                product_information_to_id_1 = product_bundle_1['info']
 
                 await bot.send_sticker(
                     chat_id=message.chat.id,
@@ -271,33 +441,19 @@ async def process_search(message: Message, state: FSMContext, bot: Bot) -> None:
                     "Ln2EpdIWNMSAACagsAAoPUcVFBVwGQCY7yJDUE"
                     )
 
-                if await check_image_exists(img_url):
+                if await image_check:
                     await message.answer(img_url) # картинка
                 else:
                     await message.answer('Изображение не найдено.')
-                # Количество по магазинам
-                product_id_1 = product_data_1.get('product_id')
-                product_data_1_quantity = await get_product_quatity(product_id_1)
-                product_data_1_quantity = quatity_discount(product_data_1_quantity)
-                product_data_1_quantity_store_1 =  product_data_1_quantity[0]
-                product_data_1_quantity_store_2 = product_data_1_quantity[1]
-
                 product_text_1 = format_product_text(
                     product_data_1,
-                    product_information_to_id_1,
-                    product_data_1_quantity_store_1,
-                    product_data_1_quantity_store_2
+                    product_information_to_id_1
                     )
 
                 all_product_text = product_text_1
 
                 await message.answer("Возможно вы искали эти товары:")
-                builder_all.row(
-                    InlineKeyboardButton(
-                        text=product_data_1.get('name'),
-                        url=product_data_1.get('url')
-                        )
-                    )
+                add_product_buttons(builder_all, product_data_1)
                 builder_all.row(
                     InlineKeyboardButton(
                         text="Искать на сайте",
@@ -310,40 +466,34 @@ async def process_search(message: Message, state: FSMContext, bot: Bot) -> None:
                     user_type, 30, 1, datetime.now(),
                     message.text, 1
                     )
-                await message.answer(all_product_text, reply_markup=builder_all.as_markup())
+                await message.answer(
+                    all_product_text + degraded_note(),
+                    reply_markup=builder_all.as_markup()
+                    )
                 logger.info(
                     "В функции process_search Пользователю id = %s name = %s "
                     "отправлено сообщение - all_product_text количество товаров = 1",
                     message.from_user.id, (message.from_user.full_name)
                     )
             elif len(product_information) == 2:
-                for i in range(2):
-                    product_data = product_information.get(f'product_{i}')
+                products_data = product_information[:2]
+                # Цены всех товаров загружаются одновременно, наличие - по кнопке
+                product_bundles = await load_product_bundles(
+                    [product_data.product_id for product_data in products_data],
+                    with_quantity=False,
+                    required=('info',)
+                    )
+                for product_data in products_data:
                     # Цена
-                    product_information_to_id = await connect_product_to_id(
-                        product_data.get('product_id')
-                        )
-                    # Количество по магазинам
-                    product_id = product_data.get('product_id')
-                    product_data_quantity = await get_product_quatity(product_id)
-                    product_data_quantity = quatity_discount(product_data_quantity)
-                    product_data_quantity_store_1 = product_data_quantity[0]
-                    product_data_quantity_store_2 = product_data_quantity[1]
+                    product_information_to_id = product_bundles[product_data.product_id]['info']
 
                     product_text = format_product_text(
                         product_data,
-                        product_information_to_id,
-                        product_data_quantity_store_1,
-                        product_data_quantity_store_2
+                        product_information_to_id
                         )
                     all_product_text += f"{product_text}\n"
 
-                    builder_all.row(
-                        InlineKeyboardButton(
-                            text=product_data.get('name'),
-                            url=product_data.get('url')
-                            )
-                        )
+                    add_product_buttons(builder_all, product_data)
 
                 await bot.send_sticker(
                     chat_id=message.chat.id,
@@ -357,7 +507,10 @@ async def process_search(message: Message, state: FSMContext, bot: Bot) -> None:
                         url=f"https://example.com/search={product_name}"
                         )
                     )
-                await message.answer(all_product_text, reply_markup=builder_all.as_markup())
+                await message.answer(
+                    all_product_text + degraded_note(),
+                    reply_markup=builder_all.as_markup()
+                    )
 
                 await insert_data(
                     message.from_user.id, user_type, 30, 1,
@@ -370,33 +523,25 @@ async def process_search(message: Message, state: FSMContext, bot: Bot) -> None:
                     message.from_user.id, (message.from_user.full_name)
                     )
             else:
-                for i in range(1, 4):  # Цикл от 1 до 3
-                    product_data = product_information.get(f'product_{i}')
+                # Товары с 1 по 3
+                products_data = product_information[1:4]
+                # Цены всех товаров загружаются одновременно, наличие - по кнопке
+                product_bundles = await load_product_bundles(
+                    [product_data.product_id for product_data in products_data],
+                    with_quantity=False,
+                    required=('info',)
+                    )
+                for product_data in products_data:
                     # Цена
-                    product_information_to_id = await connect_product_to_id(
-                        product_data.get('product_id')
-                        )
-                    # Количество по магазинам
-                    product_id = product_data.get('product_id')
-                    product_data_quantity = await get_product_quatity(product_id)
-                    product_data_quantity = quatity_discount(product_data_quantity)
-                    product_data_quantity_store_1 = product_data_quantity[0]
-                    product_data_quantity_store_2 = product_data_quantity[1]
+                    product_information_to_id = product_bundles[product_data.product_id]['info']
 
                     product_text = format_product_text(
                         product_data,
-                        product_information_to_id,
-                        product_data_quantity_store_1,
-                        product_data_quantity_store_2
+                        product_information_to_id
                         )
                     all_product_text += f"{product_text}\n"
 
-                    builder_all.row(
-                        InlineKeyboardButton(
-                            text=product_data.get('name'),
-                            url=product_data.get('url')
-                            )
-                        )
+                    add_product_buttons(builder_all, product_data)
 
                 await bot.send_sticker(
                     chat_id=message.chat.id,
@@ -410,7 +555,10 @@ async def process_search(message: Message, state: FSMContext, bot: Bot) -> None:
                         url=f"https://example.com/search={product_name}"
                         )
                     )
-                await message.answer(all_product_text, reply_markup=builder_all.as_markup())
+                await message.answer(
+                    all_product_text + degraded_note(),
+                    reply_markup=builder_all.as_markup()
+                    )
                 logger.info(
                     "В функции process_search Пользователю id = %s name = %s "
                     "отправлено сообщение - all_product_text  количество товаров = 3",
@@ -420,6 +568,17 @@ async def process_search(message: Message, state: FSMContext, bot: Bot) -> None:
                     message.from_user.id, user_type, 30, 1,
                     datetime.now(), message.text, 1
                     )
+        except CircuitOpenError as e:
+            logger.error(
+                "В функции process_search Пользователь id = %s name = %s "
+                "по запросу = %s не получил ответ, API недоступен: - %s",
+                message.from_user.id, (message.from_user.full_name), product_name, e
+                )
+            await answer_api_unavailable(message, bot)
+            await insert_data(
+                message.from_user.id, user_type, 30, 1,
+                datetime.now(), message.text, 0
+                )
         except (TooManyRedirects, AttributeError, TypeError) as e:
             logger.error(
                 "В функции process_search Пользователь id = %s name = %s "
@@ -493,53 +652,47 @@ async def process_code_search(message: Message, state: FSMContext, bot: Bot) ->
             all_product_text = ""
             builder_all = InlineKeyboardBuilder()
 
-            product_data_1 = product_information.get('product_0')
+            product_data_1 = product_information[0]
+            product_id_1 = product_data_1.product_id
 
-            # Цена
-            product_information_to_id_1 = await connect_product_to_id(
-                product_data_1.get('product_id')
-                )
-            img_url = f'{config.IMAGE_URL}{product_information_to_id_1['image']}'
+            # Наличие изображения проверяется одновременно с загрузкой данных товара
+            img_url = f'{config.IMAGE_URL}{product_data_1.image}'
+            image_check = asyncio.create_task(check_image_exists(img_url))
+            # Цена и количество по магазинам загружаются одновременно
+            # Для краткой карточки нужна только цена, наличие загружается по кнопке
+            product_bundle_1 = (await load_product_bundles(
+                [product_id_1], with_quantity=False, required=('info',)
+                ))[product_id_1]
+            product_information_to_id_1 = product_bundle_1['info']
 
             await bot.send_sticker(
                 chat_id=message.chat.id,
                 sticker="CAACAgQAAxkBAAEMfy1mlSaAh1BFYWCvj0Ln2EpdIWNMSAACagsAAoPUcVFBVwGQCY7yJDUE"
                 )
 
-            if await check_image_exists(img_url):
+            if await image_check:
                 await message.answer(img_url) # картинка
             else:
                 await message.answer('Изображение не найдено.')
-            # Количество по магазинам
-            product_id_1 = product_data_1.get('product_id')
-            product_data_1_quantity = await get_product_quatity(product_id_1)
-            product_data_1_quantity = quatity_discount(product_data_1_quantity)
-            product_data_1_quantity_store_1 =  product_data_1_quantity[0]
-            product_data_1_quantity_store_2 = product_data_1_quantity[1]
-
             product_text_1 = format_product_text(
                 product_data_1,
-                product_information_to_id_1,
-                product_data_1_quantity_store_1,
-                product_data_1_quantity_store_2
+                product_information_to_id_1
                 )
 
             all_product_text = product_text_1
 
             await message.answer("Возможно вы искали этот товар:")
-            builder_all.row(
-                InlineKeyboardButton(
-                    text=product_data_1.get('name'),
-                    url=product_data_1.get('url')
-                    )
-                )
+            add_product_buttons(builder_all, product_data_1)
             builder_all.row(
                 InlineKeyboardButton(
                     text="Искать на сайте",
                     url=f"https://example.com/search={code_product}"
                     )
                 )
-            await message.answer(all_product_text, reply_markup=builder_all.as_markup())
+            await message.answer(
+                all_product_text + degraded_note(),
+                reply_markup=builder_all.as_markup()
+                )
 
             await insert_data(
                 message.from_user.id, user_type, 31, 1,
@@ -551,6 +704,17 @@ async def process_code_search(message: Message, state: FSMContext, bot: Bot) ->
                 "отправлено сообщение - all_product_text количество товаров = 1",
                 message.from_user.id, (message.from_user.full_name)
                 )
+        except CircuitOpenError as e:
+            logger.error(
+                "В функции process_code_search Пользователь id = %s name = %s "
+                "по запросу = %s не получил ответ, API недоступен: - %s",
+                message.from_user.id, (message.from_user.full_name), code_product, e
+                )
+            await answer_api_unavailable(message, bot)
+            await insert_data(
+                message.from_user.id, user_type, 31, 1,
+                datetime.now(), message.text, 0
+                )
         except (TooManyRedirects, AttributeError, TypeError) as e:
             logger.error(
                 "В функции process_code_search Пользователь id = %s name = %s "
@@ -630,36 +794,27 @@ async def process_input_barcode(message: Message, state: FSMContext, bot: Bot) -
                 )
             product_information = await connect_search(barcode_name)
 
-            product_data_1 = product_information.get('product_0')
-            # Количество по магазинам
-            product_id_1 = product_data_1.get('product_id')
-            product_data_1_quantity = await get_product_quatity(product_id_1)
-            product_data_1_quantity = quatity_discount(product_data_1_quantity)
-            product_data_1_quantity_store_1 =  product_data_1_quantity[0]
-            product_data_1_quantity_store_2 = product_data_1_quantity[1]
+            product_data_1 = product_information[0]
+            product_id_1 = product_data_1.product_id
+            # Наличие изображения проверяется одновременно с загрузкой данных товара
+            img_url = f'{config.IMAGE_URL}{product_data_1.image}'
+            image_check = asyncio.create_task(check_image_exists(img_url))
+            # Наличие и характеристики загружаются по кнопкам под карточкой товара
+            product_bundle_1 = (await load_product_bundles(
+                [product_id_1], with_quantity=False, required=('info',)
+                ))[product_id_1]
 
             product_text_1 = (
-                f"<strong>{product_data_1.get('name')}</strong>\n"
-                f"{product_data_1.get('description')}\n"
+                f"<strong>{product_data_1.name}</strong>\n"
+                f"{product_data_1.description}\n"
                 )
 
-            product_information_to_id = await connect_product_to_id(
-                product_data_1.get('product_id')
-                )
-
-            product_attributes_to_id = await connect_product_attributes_to_id(
-                product_data_1.get('product_id')
-                )
+            product_information_to_id = product_bundle_1['info']
 
             all_product_text = product_text_1
 
             builder_all = InlineKeyboardBuilder()
-            builder_all.row(
-                InlineKeyboardButton(
-                    text=product_data_1.get('name'),
-                    url=product_data_1.get('url')
-                    )
-                )
+            add_product_buttons(builder_all, product_data_1)
             builder_all.row(
                 InlineKeyboardButton(
                     text="Искать на сайте",
@@ -668,30 +823,21 @@ async def process_input_barcode(message: Message, state: FSMContext, bot: Bot) -
                 )
 
             # Ответ по штрихкоду
-            img_url = f'{config.IMAGE_URL}{product_information_to_id['image']}'
-
             await bot.send_sticker(
                 chat_id=message.chat.id,
                 sticker="CAACAgQAAxkBAAEMfy1mlSaAh1BFYWCvj0Ln2EpdIWNMSAACagsAAoPUcVFBVwGQCY7yJDUE"
                 )
 
-            if await check_image_exists(img_url):
+            if await image_check:
                 await message.answer(img_url) # картинка
             else:
                 await message.answer('Изображение не найдено.')
 
-            answ_text_att = await format_product_attributes(product_attributes_to_id)
-
             await message.answer(
                 f"{all_product_text}\n"
-                f"<strong>Цена:</strong> {product_information_to_id['sku']} р.\n"
-                f"\n<strong>В наличии:</strong>\n"
-                f"Гродно, пр. Космонавтов 2Г - {product_data_1_quantity_store_1} "
-                f"{product_information_to_id['upc'].replace('/','')}\n"
-                f"Гродно, ул. Дзержинского 118 - {product_data_1_quantity_store_2} "
-                f"{product_information_to_id['upc'].replace('/','')}\n"
-                f"\n{answ_text_att}\n"
-                f"<strong>Категория:</strong> {product_information_to_id['category']}",
+                f"<strong>Цена:</strong> {product_information_to_id.price} р.\n"
+                f"<strong>Категория:</strong> {product_information_to_id.category}"
+                f"{degraded_note()}",
                 reply_markup=builder_all.as_markup()
                 )
             logger.info(
@@ -704,6 +850,17 @@ async def process_input_barcode(message: Message, state: FSMContext, bot: Bot) -
                 message.from_user.id, user_type, 32, 1,
                 datetime.now(), message.text, 1
                 )
+        except CircuitOpenError as e:
+            logger.error(
+                "В функции process_input_barcode Пользователь id = %s name = %s "
+                "по запросу = %s не получил ответ, API недоступен: - %s",
+                message.from_user.id, (message.from_user.full_name), barcode_name, e
+                )
+            await answer_api_unavailable(message, bot)
+            await insert_data(
+                message.from_user.id, user_type, 32, 1,
+                datetime.now(), message.text, 0
+                )
         except (TooManyRedirects, AttributeError, TypeError) as e:
             logger.error(
                 "В функции process_input_barcode Пользователь id = %s name = %s "
@@ -758,31 +915,25 @@ async def process_barcode(
         "id = %s name = %s",
         message.from_user.id, (message.from_user.full_name)
         )
-    file_id = message.photo[-1].file_id
-    file = await bot.get_file(file_id)
-    file_path = file.file_path
-    logger.info("В функции process_barcode Получение пути фото от пользователя "
-                "id = %s name = %s - путь для фото = %s",
-                message.from_user.id, (message.from_user.full_name), file_path
-                )
-    # Скачиваем файл на диск
-    downloaded_file = await bot.download_file(file_path)
-    file_name = f"photo_{message.from_user.id}.jpg"
-    logger.info(
-        "В функции process_barcode Получение название фото от пользователя "
-        "id = %s name = %s - для сохрания, название фото = %s",
-        message.from_user.id, (message.from_user.full_name), file_path
-        )
-
-    with open(file_name, 'wb') as new_file:
-        new_file.write(downloaded_file.read())
-    logger.info(
-        "В функции process_barcode Скачал файл  = %s от пользователя "
-        "id = %s name = %s",
-        file_name, message.from_user.id, (message.from_user.full_name)
-        )
-
-    number_burcode = await return_barcode(file_name)
+    try:
+        number_burcode = await read_photo_barcode(message, bot)
+    except DecodeQueueFullError as e:
+        logger.warning(
+            "В функции process_barcode фото пользователя id = %s name = %s "
+            "не распознано: %s",
+            message.from_user.id, (message.from_user.full_name), e
+            )
+        await answer_decode_busy(message, bot)
+        return
+    except BrokenProcessPool as e:
+        # Процесс распознавания аварийно завершился, пул уже пересоздан
+        logger.error(
+            "В функции process_barcode фото пользователя id = %s name = %s "
+            "не распознано, процесс распознавания завершился с ошибкой: %s",
+            message.from_user.id, (message.from_user.full_name), e
+            )
+        await answer_decode_busy(message, bot)
+        return
     await message.answer(f"Идет поиск по запросу 🔍 '{number_burcode}'.")
     await bot.send_sticker(
         chat_id=message.chat.id,
@@ -790,9 +941,10 @@ async def process_barcode(
         )
 
     logger.info(
-        "В функции process_barcode Отсканировал файл  = %s от пользователя "
+        "В функции process_barcode Отсканировал фото  = %s от пользователя "
         "id = %s name = %s и получил номер штрихкода %s",
-        file_name, message.from_user.id, (message.from_user.full_name), number_burcode
+        message.photo[-1].file_unique_id, message.from_user.id, (message.from_user.full_name),
+        number_burcode
         )
     user_type = await find_user_id(
         message.from_user.id,
@@ -808,36 +960,27 @@ async def process_barcode(
                 )
             product_information = await connect_search(number_burcode)
 
-            product_data_1 = product_information.get('product_0')
-            # Количество по магазинам
-            product_id_1 = product_data_1.get('product_id')
-            product_data_1_quantity = await get_product_quatity(product_id_1)
-            product_data_1_quantity = quatity_discount(product_data_1_quantity)
-            product_data_1_quantity_store_1 =  product_data_1_quantity[0]
-            product_data_1_quantity_store_2 = product_data_1_quantity[1]
+            product_data_1 = product_information[0]
+            product_id_1 = product_data_1.product_id
+            # Наличие изображения проверяется одновременно с загрузкой данных товара
+            img_url = f'{config.IMAGE_URL}{product_data_1.image}'
+            image_check = asyncio.create_task(check_image_exists(img_url))
+            # Наличие и характеристики загружаются по кнопкам под карточкой товара
+            product_bundle_1 = (await load_product_bundles(
+                [product_id_1], with_quantity=False, required=('info',)
+                ))[product_id_1]
 
             product_text_1 = (
-                f"<strong>{product_data_1.get('name')}</strong>\n"
-                f"{product_data_1.get('description')}\n"
+                f"<strong>{product_data_1.name}</strong>\n"
+                f"{product_data_1.description}\n"
                 )
 
-            product_information_to_id = await connect_product_to_id(
-                product_data_1.get('product_id')
-                )
-
-            product_attributes_to_id = await connect_product_attributes_to_id(
-                product_data_1.get('product_id')
-                )
+            product_information_to_id = product_bundle_1['info']
 
             all_product_text = product_text_1
 
             builder_all = InlineKeyboardBuilder()
-            builder_all.row(
-                InlineKeyboardButton(
-                    text=product_data_1.get('name'),
-                    url=product_data_1.get('url')
-                    )
-                )
+            add_product_buttons(builder_all, product_data_1)
             builder_all.row(
                 InlineKeyboardButton(
                     text="Искать на сайте",
@@ -845,30 +988,21 @@ async def process_barcode(
                     )
                 )
             # Ответ по штрихкоду
-
-            img_url = f'{config.IMAGE_URL}{product_information_to_id['image']}'
             await bot.send_sticker(
                 chat_id=message.chat.id,
                 sticker="CAACAgQAAxkBAAEMfy1mlSaAh1BFYWCvj0Ln2EpdIWNMSAACagsAAoPUcVFBVwGQCY7yJDUE"
                 )
 
-            if await check_image_exists(img_url):
+            if await image_check:
                 await message.answer(img_url) # картинка
             else:
                 await message.answer('Изображение не найдено.')
 
-            answ_text_att = await format_product_attributes(product_attributes_to_id)
-
             await message.answer(
                 f"{all_product_text}\n"
-                f"<strong>Цена:</strong> {product_information_to_id['sku']} р.\n"
-                f"\n<strong>В наличии:</strong>\n"
-                f"Гродно, пр. Космонавтов 2Г - {product_data_1_quantity_store_1} "
-                f"{product_information_to_id['upc'].replace('/','')}\n"
-                f"Гродно, ул. Дзержинского 118 - {product_data_1_quantity_store_2} "
-                f"{product_information_to_id['upc'].replace('/','')}\n"
-                f"\n{answ_text_att}\n"
-                f"<strong>Категория:</strong> {product_information_to_id['category']}",
+                f"<strong>Цена:</strong> {product_information_to_id.price} р.\n"
+                f"<strong>Категория:</strong> {product_information_to_id.category}"
+                f"{degraded_note()}",
                 reply_markup=builder_all.as_markup()
             )
 
@@ -881,6 +1015,17 @@ async def process_barcode(
                 message.from_user.id, user_type, 33, 1,
                 datetime.now(), message.text, 1
                 )
+        except CircuitOpenError as e:
+            logger.error(
+                "В функции process_barcode Пользователь id = %s name = %s "
+                "по запросу = %s не получил ответ, API недоступен: - %s",
+                message.from_user.id, (message.from_user.full_name), number_burcode, e
+                )
+            await answer_api_unavailable(message, bot)
+            await insert_data(
+                message.from_user.id, user_type, 33, 1,
+                datetime.now(), message.text, 0
+                )
         except (TooManyRedirects, AttributeError, TypeError) as e:
             logger.error(
                 "В функции process_barcode Пользователь id = %s name = %s "
@@ -914,8 +1059,92 @@ async def process_barcode(
             message.from_user.id, user_type, 33, 1,
             datetime.now(), message.text, 0
             )
-    # Удаляем файл после обработки
-    os.remove(file_name)
+
+async def process_product_details(
+    callback: CallbackQuery, callback_data: ProductDetails, bot: Bot
+    ) -> None:
+    """
+    Асинхронно обрабатывает нажатие кнопок "Наличие" и "Характеристики" под карточкой
+    товара: загружает только запрошенные данные товара и отправляет их отдельным сообщением.
+
+    :param callback: Объект нажатия кнопки.
+    :param callback_data: Данные кнопки (действие и идентификатор товара).
+    :param bot: Объект бота для взаимодействия с Telegram API.
+    :return: None
+    """
+    logger.info(
+        "Выполнение функции process_product_details для пользователя id = %s name = %s "
+        "действие = %s товар = %s",
+        callback.from_user.id, (callback.from_user.full_name),
+        callback_data.action, callback_data.product_id
+        )
+    if not await rate_limit(callback.from_user.id):
+        await callback.answer(
+            "Вы отправили слишком много запросов. Пожалуйста, подождите немного."
+            )
+        logger.warning(
+            "Пользователь id=%s username=%s, превысил частоту запросов в process_product_details",
+            callback.from_user.id, callback.from_user.full_name
+            )
+        return
+    product_id = callback_data.product_id
+    try:
+        if callback_data.action == DETAILS_STOCK:
+            product_bundle = (await load_product_bundles(
+                [product_id], with_quantity=True, required=('info', 'quantity')
+                ))[product_id]
+            # Без количества по магазинам товар выглядел бы отсутствующим везде
+            if product_bundle['quantity'] is None:
+                logger.error(
+                    "В функции process_product_details Пользователь id = %s name = %s "
+                    "по товару = %s не получил наличие: количество не загружено",
+                    callback.from_user.id, (callback.from_user.full_name), product_id
+                    )
+                await callback.answer(
+                    "К сожалению, не удалось загрузить наличие товара. Попробуйте еще раз.",
+                    show_alert=True
+                    )
+                return
+            answer_text = format_product_stock(
+                product_bundle['info'], product_bundle['quantity']
+                )
+        else:
+            product_bundle = (await load_product_bundles(
+                [product_id], with_quantity=False, with_attributes=True, required=('info',)
+                ))[product_id]
+            product_information_to_id = product_bundle['info']
+            answ_text_att = await format_product_attributes(product_bundle['attributes'])
+            answer_text = (
+                f"<strong>{product_information_to_id.name}</strong>\n"
+                f"\n{answ_text_att}\n"
+                f"<strong>Категория:</strong> {product_information_to_id.category}"
+                )
+        await callback.message.answer(f"{answer_text}{degraded_note()}")
+        await callback.answer()
+        logger.info(
+            "В функции process_product_details Пользователю id = %s name = %s "
+            "отправлено сообщение - %s товара %s",
+            callback.from_user.id, (callback.from_user.full_name),
+            callback_data.action, product_id
+            )
+    except CircuitOpenError as e:
+        logger.error(
+            "В функции process_product_details Пользователь id = %s name = %s "
+            "по товару = %s не получил ответ, API недоступен: - %s",
+            callback.from_user.id, (callback.from_user.full_name), product_id, e
+            )
+        await answer_api_unavailable(callback.message, bot)
+        await callback.answer()
+    except (TooManyRedirects, AttributeError, TypeError) as e:
+        logger.error(
+            "В функции process_product_details Пользователь id = %s name = %s "
+            "по товару = %s получил ошибку: - %s",
+            callback.from_user.id, (callback.from_user.full_name), product_id, e
+            )
+        await callback.answer(
+            "К сожалению, не удалось загрузить данные товара. Попробуйте еще раз.",
+            show_alert=True
+            )
 
 async def process_added_card(message: Message, state: FSMContext, bot: Bot) -> None:
     """
@@ -994,34 +1223,33 @@ async def process_barcode_card(message: Message, state: FSMContext, bot: Bot) ->
         "для пользователя id = %s name = %s",
         message.from_user.id, (message.from_user.full_name)
         )
-    file_id = message.photo[-1].file_id
-    file = await bot.get_file(file_id)
-    file_path = file.file_path
-    logger.info(
-        "В функции process_barcode_card Получение пути фото от "
-        "пользователя id = %s name = %s - путь для фото = %s",
-        message.from_user.id, (message.from_user.full_name), file_path
-        )
-    # Скачиваем файл на диск
-    downloaded_file = await bot.download_file(file_path)
-    photo_card = f"photo_{message.from_user.id}.jpg"
-    logger.info(
-        "В функции process_barcode_card Получение название фото от "
-        "пользователя id = %s name = %s - для сохрания, название фото = %s",
-        message.from_user.id, (message.from_user.full_name), file_path
-        )
-
-    with open(photo_card, 'wb') as new_file:
-        new_file.write(downloaded_file.read())
     # Фнукция чтения фото штрихкода возврат текстового значения
-    number_card = await return_barcode(photo_card)
+    try:
+        number_card = await read_photo_barcode(message, bot)
+    except DecodeQueueFullError as e:
+        logger.warning(
+            "В функции process_barcode_card фото пользователя id = %s name = %s "
+            "не распознано: %s",
+            message.from_user.id, (message.from_user.full_name), e
+            )
+        await answer_decode_busy(message, bot)
+        return
+    except BrokenProcessPool as e:
+        # Процесс распознавания аварийно завершился, пул уже пересоздан
+        logger.error(
+            "В функции process_barcode_card фото пользователя id = %s name = %s "
+            "не распознано, процесс распознавания завершился с ошибкой: %s",
+            message.from_user.id, (message.from_user.full_name), e
+            )
+        await answer_decode_busy(message, bot)
+        return
     user_type = await find_user_id(
         message.from_user.id,
         "data/user_data_json/user_id_to_discont_card.json"
         )
     # Проверка кода
     try:
-        customer_info = await get_user_by_card_code(number_card)
+        customer_info = await get_customer_by_card(number_card)
         logger.info(
             "В функции process_barcode_card Пользователь "
             "id = %s name = %s прислал сообщение - %s. Результат = %s",
@@ -1037,13 +1265,12 @@ async def process_barcode_card(message: Message, state: FSMContext, bot: Bot) ->
             # Сохранение id пользователя по скидочным картам
             path_json = 'data/user_data_json/user_id_to_discont_card.json' # путь к jsone
             # ЦУ0000003 это из присланного сообщения
-            card_field_two = await get_card_field_two(number_card)
+            card_field_two = customer_info.card_type
             data_id_card = await read_json_file(path_json) # данные из файла json
             # Проверка совпадения ключа в jsone и полученного поля
             matching_key = await find_matching_key(card_field_two, data_id_card)
-            custom_fifeld = json.loads(customer_info['custom_field']) # Поле кастом филд
-            field_type = custom_fifeld['2']
-            data_card = custom_fifeld['3'] # Срок действия карты
+            field_type = customer_info.card_type
+            data_card = customer_info.expiry # Срок действия карты
             name_card = ''
 
             if field_type == 'Р00000002':
@@ -1103,7 +1330,6 @@ async def process_barcode_card(message: Message, state: FSMContext, bot: Bot) ->
                 message_id=message_with_photo.message_id
                 )
 
-            os.remove(photo_card)
             os.remove(number_barcode_path)
             await general_menu(message, state)
             await insert_data(
@@ -1125,18 +1351,24 @@ async def process_barcode_card(message: Message, state: FSMContext, bot: Bot) ->
                 "возможно фото плохого качества или введите вручную код с карты - "
                 "нажмите 'Ввести вручную'."
                 )
-            os.remove(photo_card)
             await insert_data(
                 message.from_user.id, user_type, 34, 1,
                 datetime.now(), message.text, 0
                 )
+    except (CircuitOpenError, TimeoutError) as e:
+        logger.error(
+            "В функции process_barcode_card Пользователь id = %s name = %s "
+            "не получил ответ, CRM недоступна: - %s",
+            message.from_user.id, (message.from_user.full_name), e
+            )
+        await answer_api_unavailable(message, bot)
+        await insert_data(message.from_user.id, user_type, 34, 1, datetime.now(), message.text, 0)
     except (TooManyRedirects, AttributeError, TypeError) as e:
         logger.error(
             "В функции process_barcode_card Пользователь id = %s name = %s "
             "получил ошибку: - %s",
             message.from_user.id, (message.from_user.full_name), e
             )
-        os.remove(photo_card)
         await bot.send_sticker(
             chat_id=message.chat.id,
             sticker="CAACAgQAAxkBAAEMfytmlSZ1A6vs-8mvAAHW5bfgjYWjWNgAAmUNAAKQnOlQenL3YIArH3s1BA"
@@ -1173,7 +1405,7 @@ async def process_barcode_card_text(message: Message, state: FSMContext, bot: Bo
         )
     if (number_card is not None) and (number_card.isdigit()):
         try:
-            customer_info = await get_user_by_card_code(number_card)
+            customer_info = await get_customer_by_card(number_card)
             logger.info(
                 "В функции process_barcode_card_text Пользователь "
                 "id = %s name = %s прислал сообщение - %s. Результат = %s",
@@ -1188,13 +1420,12 @@ async def process_barcode_card_text(message: Message, state: FSMContext, bot: Bo
                 # Сохранение id пользователя по скидочным картам
                 path_json = 'data/user_data_json/user_id_to_discont_card.json' # путь к jsone
                 # ЦУ0000003 это из присланного сообщения
-                card_field_two = await get_card_field_two(number_card)
+                card_field_two = customer_info.card_type
                 data_id_card = await read_json_file(path_json) # данные из файла json
                 # Проверка совпадения ключа в jsone и полученного поля
                 matching_key = await find_matching_key(card_field_two, data_id_card)
-                custom_fifeld = json.loads(customer_info['custom_field']) # Поле кастом филд
-                field_type = custom_fifeld['2']
-                data_card = custom_fifeld['3'] # Срок действия карты
+                field_type = customer_info.card_type
+                data_card = customer_info.expiry # Срок действия карты
                 name_card = ''
 
                 if field_type == 'Р00000002':
@@ -1277,6 +1508,17 @@ async def process_barcode_card_text(message: Message, state: FSMContext, bot: Bo
                     message.from_user.id, user_type, 35, 1,
                     datetime.now(), message.text, 0
                     )
+        except (CircuitOpenError, TimeoutError) as e:
+            logger.error(
+                "В функции process_barcode_card_text пользователь "
+                "id = %s name = %s по запросу = %s не получил ответ, CRM недоступна: - %s",
+                message.from_user.id, (message.from_user.full_name), number_card, e
+                )
+            await answer_api_unavailable(message, bot)
+            await insert_data(
+                message.from_user.id, user_type, 35, 1,
+                datetime.now(), message.text, 0
+                )
         except (TooManyRedirects, AttributeError, TypeError) as e:
             logger.error(
                 "В функции process_barcode_card_text пользователь "
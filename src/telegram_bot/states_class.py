@@ -3,8 +3,10 @@
 Этот модуль содержит классы, которые определяют различные состояния пользователей и форм,
 используемых в приложении. Каждый класс представляет собой группу состояний, связанных с
 определенной функциональностью или процессом.
+Здесь же определены данные inline-кнопок (CallbackData).
 """
 
+from aiogram.filters.callback_data import CallbackData
 from aiogram.fsm.state import State, StatesGroup
 
 class UserStates(StatesGroup):
@@ -54,3 +56,11 @@ class FormAsk(StatesGroup):
     """
     ask_question: State = State()
     answer_questions: State = State()
+
+class ProductDetails(CallbackData, prefix='details'):
+    """
+    Данные кнопок "Наличие" и "Характеристики" карточки товара.
+    action - 'stock' (наличие по магазинам) или 'attributes' (характеристики).
+    """
+    action: str
+    product_id: str
@@ -2,7 +2,13 @@
 Модуль для работы с штрих-кодами.
 Этот модуль предоставляет асинхронные функции для чтения, декодирования,
 извлечения и генерации штрих-кодов. Он использует библиотеки OpenCV,
-pyzbar, и barcode для выполнения этих задач.
+pyzbar, и barcode для выполнения этих задач. Изображение для распознавания
+передается путем к файлу или байтами (например, фото, скачанное из Telegram
+в память), байты декодируются cv2.imdecode без записи на диск. Декодирование
+и распознавание выполняются в пуле процессов decode_pool, а не в потоке
+цикла событий бота. Штрих-код ищется поэтапно (см. barcode_stages):
+от быстрого прохода по уменьшенной копии до более дорогих этапов
+предобработки, пока штрих-код не будет найден.
 """
 
 import asyncio
@@ -17,6 +23,10 @@ from barcode import EAN13, EAN8
 from barcode.writer import ImageWriter
 from pyzbar import pyzbar
 
+from configs import config
+from src.utils.barcode_stages import DecodeResult, decode_staged, resolve_stages, stage_stats
+from src.utils.decode_pool import decode_pool
+
 
 logging.basicConfig(level=logging.INFO)
 
@@ -39,6 +49,11 @@ file_handler.setFormatter(formatter)
 logger = logging.getLogger('barcode_logger')
 logger.addHandler(file_handler)
 
+DECODE_STAGES = resolve_stages(config.DECODE_STAGES)
+"""
+Этапы распознавания штрих-кода из настроек, без неизвестных этапов.
+"""
+
 
 async def read_image(image_path: str) -> np.ndarray | None:
     """
@@ -62,106 +77,184 @@ async def read_image(image_path: str) -> np.ndarray | None:
         logger.error("Произошла ошибка при чтении файла: %s", e)
         raise
 
-async def return_barcode(image_path: str) -> str | None:
+def decode_image_bytes(image_bytes: bytes) -> np.ndarray | None:
+    """
+    Декодирование изображения (JPEG, PNG и т.д.) из байтов в памяти.
+
+    :param image_bytes: Содержимое файла изображения.
+    :return: Объект изображения или None, если декодирование не удалось.
+    """
+    if not image_bytes:
+        return None
+    buffer = np.frombuffer(image_bytes, dtype=np.uint8)
+    return cv2.imdecode(buffer, cv2.IMREAD_COLOR)  # pylint: disable=no-member
+
+def find_barcode(
+    image: np.ndarray | None,
+    stages: tuple[str, ...] = DECODE_STAGES,
+    max_side: int = config.DECODE_FAST_MAX_SIDE
+    ) -> DecodeResult:
+    """
+    Поэтапный поиск штрих-кода на изображении до первого успеха.
+
+    :param image: Объект изображения.
+    :param stages: Этапы распознавания в порядке применения.
+    :param max_side: Размер большей стороны для быстрого этапа downscale.
+    :return: Результат распознавания (текст штрих-кода, этап и время этапов).
+    """
+    if image is None:
+        return DecodeResult(None, None, ())
+    # Преобразование изображения в оттенки серого
+    gray_image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)  # pylint: disable=no-member
+    return decode_staged(gray_image, stages, max_side)
+
+def decode_barcode_bytes(
+    image_bytes: bytes,
+    stages: tuple[str, ...] = DECODE_STAGES,
+    max_side: int = config.DECODE_FAST_MAX_SIDE
+    ) -> DecodeResult:
+    """
+    Распознавание штрих-кода на изображении в памяти. Выполняется в процессе decode_pool.
+
+    :param image_bytes: Содержимое файла изображения.
+    :param stages: Этапы распознавания в порядке применения.
+    :param max_side: Размер большей стороны для быстрого этапа downscale.
+    :return: Результат распознавания.
     """
-    Асинхронное декодирование штрих-кода на изображении.
+    return find_barcode(decode_image_bytes(image_bytes), stages, max_side)
+
+def decode_barcode_file(
+    image_path: str,
+    stages: tuple[str, ...] = DECODE_STAGES,
+    max_side: int = config.DECODE_FAST_MAX_SIDE
+    ) -> DecodeResult:
+    """
+    Распознавание штрих-кода на изображении на диске. Выполняется в процессе decode_pool.
 
     :param image_path: Путь к изображению на диске.
+    :param stages: Этапы распознавания в порядке применения.
+    :param max_side: Размер большей стороны для быстрого этапа downscale.
+    :return: Результат распознавания.
+    """
+    return find_barcode(cv2.imread(image_path), stages, max_side)  # pylint: disable=no-member
+
+def _describe_image(image: str | bytes) -> str:
+    """
+    Возвращает описание изображения для логов: путь к файлу или размер в байтах.
+    """
+    if isinstance(image, str):
+        return image
+    return f'<{len(image)} байт>'
+
+async def return_barcode(
+    image: str | bytes,
+    stages: tuple[str, ...] = DECODE_STAGES
+    ) -> str | None:
+    """
+    Асинхронное декодирование штрих-кода на изображении в процессе decode_pool.
+
+    :param image: Путь к изображению на диске или содержимое файла изображения в байтах.
+    :param stages: Этапы распознавания в порядке применения (по умолчанию DECODE_STAGES).
     :return: Текст штрих-кода или None, если декодирование не удалось.
+    :raises DecodeQueueFullError: Если очередь распознавания заполнена.
     """
+    image_path = _describe_image(image)
     logger.info("Выполнение функции return_barcode, c полученными данными - %s", image_path)
     try:
         logger.info("Попытка чтения return_barcode изображения по пути - %s", image_path)
-        # Асинхронное чтение изображения
-        image = await read_image(image_path)
-        if image is None:
-            logger.info("Изображение по пути %s = %s", image_path, None)
-            return None
-
-        # Преобразование изображения в оттенки серого
-        gray_image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)  # pylint: disable=no-member
-
-        # Найти штрих-коды и QR-коды на изображении
-        barcodes = pyzbar.decode(gray_image)
-
-        # Перебрать обнаруженные штрих-коды
-        for barcode in barcodes:
-            # Извлечь данные и тип штрих-кода
-            barcode_data = barcode.data.decode("utf-8")
-
-            # Вывести информацию о штрих-коде
-            text = barcode_data
+        # Изображение декодируется и распознается в отдельном процессе
+        if isinstance(image, str):
+            result = await decode_pool.run(decode_barcode_file, image, stages)
+        else:
+            result = await decode_pool.run(decode_barcode_bytes, bytes(image), stages)
+        stage_stats.record(result)
+        if result.text is None:
             logger.info(
-                "Получен текст %s штрихкода в return_barcode изображения по пути -  %s",
-                text, image_path
+                "Штрихкод на изображении %s не найден, этапы %s",
+                image_path, result.timings
                 )
-            return text
+            return None
+        logger.info(
+            "Получен текст %s штрихкода в return_barcode изображения по пути -  %s "
+            "на этапе %s",
+            result.text, image_path, result.stage
+            )
+        return result.text
 
     except Exception as e:
         logger.error("Произошла ошибка в функции return_barcode по пути %s : %s", image_path, e)
         raise e
 
+def save_barcode_image(image_path: str) -> str | None:
+    """
+    Извлечение штрих-кода из изображения на диске и сохранение изображения
+    с вырезанным штрих-кодом. Выполняется в процессе decode_pool.
+
+    :param image_path: Путь к изображению на диске.
+    :return: Путь к сохраненному изображению или None, если штрих-код не найден.
+    """
+    image = cv2.imread(image_path)  # pylint: disable=no-member
+    if image is None:
+        return None
+
+    # Преобразование изображения в оттенки серого
+    gray_image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)  # pylint: disable=no-member
+
+    # Найти штрих-коды и QR-коды на изображении
+    barcodes = pyzbar.decode(gray_image)
+
+    # Перебрать обнаруженные штрих-коды
+    for barcode in barcodes:
+        # Извлечь данные и тип штрих-кода
+        barcode_data = barcode.data.decode("utf-8")
+        spaced_barcode_data = ' '.join(barcode_data)
+
+        # Получить границы штрих-кода
+        (x, y, w, h) = barcode.rect
+
+        # Вырезать штрих-код из изображения
+        barcode_image = image[y:y+h, x:x+w]
+        # Создать новое изображение с белым фоном
+        white_background = np.full((h + 100, w + 100, 3), 255, dtype=np.uint8)
+
+        # Добавить рамку
+        cv2.rectangle(white_background, (0, 0), (w + 99, h + 99), (0, 0, 0), 1) # pylint: disable=no-member
+        # Вставить вырезанный штрих-код в центр нового изображения
+        white_background[50:50+h, 50:50+w] = barcode_image
+
+        # Добавить текст с номером штрих-кода на изображение
+        cv2.putText(  # pylint: disable=no-member
+            white_background, spaced_barcode_data,
+            (20, 145), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 0), 2  # pylint: disable=no-member
+            )
+        path_img = f'card_{image_path}'
+        # Сохранить изображение
+        cv2.imwrite(path_img, white_background)  # pylint: disable=no-member
+        return path_img
+    return None
+
 async def extract_barcode_image(image_path: str) -> str | None:
     """
     Асинхронное извлечение штрих-кода из изображения и
-    сохранение изображения с вырезанным штрих-кодом.
+    сохранение изображения с вырезанным штрих-кодом в процессе decode_pool.
 
     :param image_path: Путь к изображению на диске.
     :return: Путь к сохраненному изображению с вырезанным штрих-кодом или None,
     если извлечение не удалось.
+    :raises DecodeQueueFullError: Если очередь распознавания заполнена.
     """
     logger.info("Выполнение функции extract_barcode_image, c полученными данными - %s", image_path)
     try:
-        logger.info("Попытка чтения extract_barcode_image изображения по пути -  %s", image_path)
-        # Асинхронное чтение изображения
-        image = await read_image(image_path)
-        if image is None:
-            logger.info("Изображение по пути %s = %s", image_path, None)
+        path_img = await decode_pool.run(save_barcode_image, image_path)
+        if path_img is None:
+            logger.info("Штрихкод на изображении по пути %s не найден", image_path)
             return None
-
-        # Преобразование изображения в оттенки серого
-        gray_image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)  # pylint: disable=no-member
-
-        # Найти штрих-коды и QR-коды на изображении
-        barcodes = pyzbar.decode(gray_image)
-
-        # Перебрать обнаруженные штрих-коды
-        for barcode in barcodes:
-            logger.info(
-                "Цикл для переборки обнаруженных штрих-кодов в extract_barcode_image"
-                "изображения по пути - %s", image_path
-                )
-            # Извлечь данные и тип штрих-кода
-            barcode_data = barcode.data.decode("utf-8")
-            spaced_barcode_data = ' '.join(barcode_data)
-
-            # Получить границы штрих-кода
-            (x, y, w, h) = barcode.rect
-
-            # Вырезать штрих-код из изображения
-            barcode_image = image[y:y+h, x:x+w]
-            # Создать новое изображение с белым фоном
-            white_background = np.full((h + 100, w + 100, 3), 255, dtype=np.uint8)
-
-            # Добавить рамку
-            cv2.rectangle(white_background, (0, 0), (w + 99, h + 99), (0, 0, 0), 1) # pylint: disable=no-member
-            # Вставить вырезанный штрих-код в центр нового изображения
-            white_background[50:50+h, 50:50+w] = barcode_image
-
-            # Добавить текст с номером штрих-кода на изображение
-            cv2.putText(  # pylint: disable=no-member
-                white_background, spaced_barcode_data,
-                (20, 145), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 0), 2  # pylint: disable=no-member
-                )
-            path_img = f'card_{image_path}'
-            # Сохранить изображение
-            cv2.imwrite(path_img, white_background)  # pylint: disable=no-member
-            logger.info(
-                "Конец цикла для переборки обнаруженных штрих-кодов в extract_barcode_image "
-                "изображения по пути - %s с возвратом пути созданного изображения %s",
-                image_path, path_img
-                )
-            return path_img
+        logger.info(
+            "В extract_barcode_image изображения по пути - %s "
+            "создано изображение штрихкода по пути %s",
+            image_path, path_img
+            )
+        return path_img
     except Exception as e:
         logger.error("Произошла ошибка в функции return_barcode по пути %s: %s", image_path, e)
         raise e
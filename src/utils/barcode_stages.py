@@ -0,0 +1,285 @@
+"""
+Модуль поэтапного распознавания штрихкода на фото.
+Фото в оттенках серого проходит этапы предобработки в порядке DECODE_STAGES,
+на каждом этапе pyzbar ищет штрихкод на одном или нескольких вариантах
+изображения. Распознавание останавливается на первом найденном штрихкоде,
+поэтому четкие фото распознаются первым, быстрым этапом (уменьшенная копия),
+а более дорогие этапы выполняются только для размытых, темных или
+повернутых фото. Для каждого этапа считаются попытки, успехи и время,
+чтобы порядок этапов можно было подобрать по набору реальных фото.
+
+Этапы:
+    downscale - уменьшенная до DECODE_FAST_MAX_SIDE копия;
+    full - фото в исходном размере;
+    contrast - выравнивание контраста (CLAHE);
+    threshold - адаптивная бинаризация;
+    rotate - повороты на ±15, ±30 и ±45 градусов;
+    gradient_crop - вырезание области с наибольшим горизонтальным градиентом
+    (вероятное место штрихкода) с выравниванием по ее наклону.
+"""
+
+# pylint: disable=no-member
+
+import logging
+from logging.handlers import RotatingFileHandler
+import time
+from typing import Callable, Iterator
+
+import cv2
+import numpy as np
+from pyzbar import pyzbar
+
+from src.utils.models import Record
+from src.utils.stats_reporter import register_stats
+
+
+logging.basicConfig(level=logging.INFO)
+
+# Установка размера файла логов в 8 МБ
+MAX_BYTES = 8 * 1024 * 1024  # 8 МБ в байтах
+
+# Создание обработчика файлов с ограничением размера и ротацией
+file_handler = RotatingFileHandler(
+    "logs/barcode_stages_log.log",
+    maxBytes=MAX_BYTES,  # Установка максимального размера файла логов
+    backupCount=30,  # Количество файлов логов, которые будут храниться
+    encoding="utf-8",
+)
+
+# Формат сообщений
+formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(formatter)
+
+# Добавление обработчика в логгер
+logger = logging.getLogger('barcode_stages_logger')
+logger.addHandler(file_handler)
+
+ROTATION_ANGLES = (15, -15, 30, -30, 45, -45)
+"""
+Углы поворота фото в градусах для этапа rotate.
+"""
+
+
+class DecodeResult(Record):
+    """
+    Результат поэтапного распознавания фото.
+
+    stage - этап, на котором найден штрихкод (None, если не найден),
+    timings - кортеж (этап, время в секундах) выполненных этапов.
+    """
+    __slots__ = ('text', 'stage', 'timings')
+
+    def __init__(
+        self,
+        text: str | None,
+        stage: str | None,
+        timings: tuple[tuple[str, float], ...]
+        ):
+        self.text = text
+        self.stage = stage
+        self.timings = timings
+
+
+def _resize(gray: np.ndarray, max_side: int) -> np.ndarray:
+    """
+    Уменьшает изображение так, чтобы большая сторона была не больше max_side.
+    """
+    height, width = gray.shape[:2]
+    scale = max_side / max(height, width)
+    if scale >= 1:
+        return gray
+    return cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+def _rotate(gray: np.ndarray, angle: float) -> np.ndarray:
+    """
+    Поворачивает изображение на angle градусов без обрезки углов, фон белый.
+    """
+    height, width = gray.shape[:2]
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    cos, sin = abs(matrix[0, 0]), abs(matrix[0, 1])
+    new_width = int(height * sin + width * cos)
+    new_height = int(height * cos + width * sin)
+    matrix[0, 2] += new_width / 2 - width / 2
+    matrix[1, 2] += new_height / 2 - height / 2
+    return cv2.warpAffine(
+        gray, matrix, (new_width, new_height), borderValue=255
+        )
+
+def _stage_downscale(gray: np.ndarray, max_side: int) -> Iterator[np.ndarray]:
+    """
+    Уменьшенная копия фото.
+    """
+    yield _resize(gray, max_side)
+
+def _stage_full(gray: np.ndarray, max_side: int) -> Iterator[np.ndarray]:
+    """
+    Фото в исходном размере, если оно больше копии этапа downscale.
+    """
+    # Фото не больше max_side уже распознавалось в исходном размере на этапе downscale
+    if max(gray.shape[:2]) > max_side:
+        yield gray
+
+def _stage_contrast(gray: np.ndarray, max_side: int) -> Iterator[np.ndarray]:
+    """
+    Фото с выровненным контрастом (CLAHE).
+    """
+    clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8))
+    yield clahe.apply(_resize(gray, max_side * 2))
+
+def _stage_threshold(gray: np.ndarray, max_side: int) -> Iterator[np.ndarray]:
+    """
+    Адаптивная бинаризация фото.
+    """
+    image = cv2.GaussianBlur(_resize(gray, max_side * 2), (5, 5), 0)
+    yield cv2.adaptiveThreshold(
+        image, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 10
+        )
+
+def _stage_rotate(gray: np.ndarray, max_side: int) -> Iterator[np.ndarray]:
+    """
+    Повороты уменьшенной копии фото на углы ROTATION_ANGLES.
+    """
+    image = _resize(gray, max_side)
+    for angle in ROTATION_ANGLES:
+        yield _rotate(image, angle)
+
+def _stage_gradient_crop(gray: np.ndarray, max_side: int) -> Iterator[np.ndarray]:
+    """
+    Выровненная по наклону область с наибольшим горизонтальным градиентом.
+    """
+    image = _resize(gray, max_side * 2)
+    # Штрихкод - область с сильным горизонтальным и слабым вертикальным градиентом
+    grad_x = cv2.Sobel(image, cv2.CV_32F, 1, 0, ksize=-1)
+    grad_y = cv2.Sobel(image, cv2.CV_32F, 0, 1, ksize=-1)
+    gradient = cv2.convertScaleAbs(cv2.subtract(grad_x, grad_y))
+    gradient = cv2.blur(gradient, (9, 9))
+    _, mask = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (21, 7))
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
+    mask = cv2.dilate(cv2.erode(mask, None, iterations=4), None, iterations=4)
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return
+    contour = max(contours, key=cv2.contourArea)
+    (center_x, center_y), (width, height), angle = cv2.minAreaRect(contour)
+    if width < height:
+        width, height, angle = height, width, angle - 90
+    # Область выравнивается по наклону и вырезается с полями
+    matrix = cv2.getRotationMatrix2D((center_x, center_y), angle, 1.0)
+    aligned = cv2.warpAffine(
+        image, matrix, (image.shape[1], image.shape[0]), borderValue=255
+        )
+    margin_x, margin_y = int(width * 0.2) + 10, int(height * 0.5) + 10
+    top = max(int(center_y - height / 2) - margin_y, 0)
+    left = max(int(center_x - width / 2) - margin_x, 0)
+    bottom = int(center_y + height / 2) + margin_y
+    right = int(center_x + width / 2) + margin_x
+    crop = aligned[top:bottom, left:right]
+    if crop.size == 0:
+        return
+    if crop.shape[1] < 400:
+        crop = cv2.resize(crop, None, fx=2, fy=2, interpolation=cv2.INTER_CUBIC)
+    yield crop
+
+
+STAGES: dict[str, Callable[[np.ndarray, int], Iterator[np.ndarray]]] = {
+    'downscale': _stage_downscale,
+    'full': _stage_full,
+    'contrast': _stage_contrast,
+    'threshold': _stage_threshold,
+    'rotate': _stage_rotate,
+    'gradient_crop': _stage_gradient_crop,
+}
+"""
+Этапы распознавания: имя этапа - функция, возвращающая варианты изображения.
+"""
+
+
+def resolve_stages(names: list[str]) -> tuple[str, ...]:
+    """
+    Оставляет в списке этапов только известные этапы, без повторов.
+
+    :param names: Имена этапов в порядке применения.
+    :return: Кортеж имен этапов.
+    """
+    unknown = [name for name in names if name not in STAGES]
+    if unknown:
+        logger.warning("Неизвестные этапы распознавания пропущены: %s", unknown)
+    return tuple(dict.fromkeys(name for name in names if name in STAGES))
+
+def decode_staged(gray: np.ndarray, stages: tuple[str, ...], max_side: int) -> DecodeResult:
+    """
+    Ищет штрихкод на изображении по этапам до первого успеха.
+
+    :param gray: Изображение в оттенках серого.
+    :param stages: Имена этапов в порядке применения.
+    :param max_side: Размер большей стороны для этапа downscale.
+    :return: Результат распознавания с этапом и временем выполненных этапов.
+    """
+    timings = []
+    for name in stages:
+        started = time.perf_counter()
+        text = None
+        for candidate in STAGES[name](gray, max_side):
+            barcodes = pyzbar.decode(candidate)
+            if barcodes:
+                text = barcodes[0].data.decode("utf-8")
+                break
+        timings.append((name, time.perf_counter() - started))
+        if text is not None:
+            return DecodeResult(text, name, tuple(timings))
+    return DecodeResult(None, None, tuple(timings))
+
+
+class StageStats:
+    """
+    Счетчики этапов распознавания: сколько раз этап выполнялся, сколько раз
+    нашел штрихкод и сколько времени занял.
+    """
+
+    def __init__(self):
+        self.photos = 0
+        self.decoded = 0
+        self.attempts: dict[str, int] = {}
+        self.hits: dict[str, int] = {}
+        self.time: dict[str, float] = {}
+
+    def record(self, result: DecodeResult) -> None:
+        """
+        Учитывает результат распознавания одного фото.
+
+        :param result: Результат decode_staged.
+        """
+        self.photos += 1
+        for name, elapsed in result.timings:
+            self.attempts[name] = self.attempts.get(name, 0) + 1
+            self.time[name] = self.time.get(name, 0.0) + elapsed
+        if result.stage is not None:
+            self.decoded += 1
+            self.hits[result.stage] = self.hits.get(result.stage, 0) + 1
+
+    def stats(self) -> dict:
+        """
+        Возвращает статистику по этапам: доля успехов среди попыток этапа,
+        среднее время попытки и доля фото, распознанных этапом.
+
+        :return: Словарь со статистикой.
+        """
+        return {
+            'photos': self.photos,
+            'decoded': self.decoded,
+            'stages': {
+                name: {
+                    'attempts': attempts,
+                    'hits': self.hits.get(name, 0),
+                    'hit_rate': self.hits.get(name, 0) / attempts,
+                    'avg_ms': self.time[name] / attempts * 1000,
+                    'share_of_photos': self.hits.get(name, 0) / self.photos,
+                }
+                for name, attempts in self.attempts.items()
+            },
+        }
+
+
+stage_stats = StageStats()
+register_stats('barcode_stages', stage_stats.stats)
@@ -0,0 +1,256 @@
+"""
+Модуль для прогрева кешей при запуске бота.
+После перезапуска все кеши пусты, и первые запросы пользователей получают
+наибольшую задержку. Этот модуль до начала опроса Telegram получает токен API,
+выполняет самые частые поисковые запросы из таблицы 'user_events' и загружает
+для найденных товаров информацию, количество по магазинам и проверку
+изображения. Прогрев ограничен по времени и по количеству запросов,
+выполняется с фоновым приоритетом, а его покрытие записывается в лог
+и сохраняется в last_warmup_stats.
+"""
+
+import asyncio
+import logging
+from logging.handlers import RotatingFileHandler
+import time
+from typing import Awaitable, Callable
+
+from configs import config
+from src.database.process_database import get_top_search_queries
+from src.utils.check import check_image_exists
+from src.utils.connect_api import (
+    SHOWN_SEARCH_RESULTS,
+    connect_product_to_id,
+    connect_search,
+    get_product_quatity,
+    get_token,
+)
+from src.utils.models import SearchHit
+from src.utils.request_scheduler import Priority, priority_scope
+
+
+logging.basicConfig(level=logging.INFO)
+
+# Установка размера файла логов в 8 МБ
+MAX_BYTES = 8 * 1024 * 1024  # 8 МБ в байтах
+
+# Создание обработчика файлов с ограничением размера и ротацией
+file_handler = RotatingFileHandler(
+    "logs/cache_warmup_log.log",
+    maxBytes=MAX_BYTES,  # Установка максимального размера файла логов
+    backupCount=30,  # Количество файлов логов, которые будут храниться
+    encoding="utf-8",
+)
+
+# Формат сообщений
+formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(formatter)
+
+# Добавление обработчика в логгер
+logger = logging.getLogger('cache_warmup_logger')
+logger.addHandler(file_handler)
+
+NAME_SEARCH_EVENTS = ('30',)
+"""
+Типы событий поиска по слову: по ним прогреваются показываемые товары из результатов.
+"""
+
+PRODUCT_SEARCH_EVENTS = ('31', '32', '33')
+"""
+Типы событий поиска по коду товара и штрихкоду: по ним прогревается найденный товар.
+"""
+
+last_warmup_stats: dict | None = None  # Покрытие последнего прогрева
+
+
+class WarmupBudget:
+    """
+    Ограничение количества запросов прогрева.
+
+    :param max_requests: Максимальное количество запросов.
+    """
+
+    def __init__(self, max_requests: int):
+        self.max_requests = max_requests
+        self.used = 0
+
+    def take(self) -> bool:
+        """
+        Забирает один запрос из бюджета.
+
+        :return: True, если бюджет еще не исчерпан.
+        """
+        if self.used >= self.max_requests:
+            return False
+        self.used += 1
+        return True
+
+
+async def _run(
+    budget: WarmupBudget,
+    semaphore: asyncio.Semaphore,
+    awaitable_factory: Callable[[], Awaitable],
+    description: str,
+    counter: tuple[dict, str]
+    ) -> None:
+    """
+    Асинхронно выполняет один запрос прогрева, если позволяет бюджет,
+    и при успехе сразу увеличивает счетчик покрытия, чтобы прогрев,
+    прерванный по времени, учитывал уже выполненные запросы.
+
+    :param budget: Бюджет запросов.
+    :param semaphore: Ограничение одновременных запросов прогрева.
+    :param awaitable_factory: Функция без аргументов, возвращающая корутину запроса.
+    :param description: Описание запроса для лога.
+    :param counter: Словарь статистики и ключ счетчика успешных запросов.
+    """
+    async with semaphore:
+        if not budget.take():
+            return
+        try:
+            result = await awaitable_factory()
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.warning("Прогрев %s не выполнен: %s", description, e)
+            return
+    if result is not None:
+        section, key = counter
+        section[key] += 1
+
+async def _warm_up_searches(
+    queries: list[tuple[str, str]],
+    budget: WarmupBudget,
+    semaphore: asyncio.Semaphore,
+    stats: dict
+    ) -> dict[str, str | None]:
+    """
+    Асинхронно выполняет поисковые запросы и собирает товары для прогрева.
+
+    :param queries: Список пар (запрос, тип: 'name' или 'product') по убыванию популярности.
+    :param budget: Бюджет запросов.
+    :param semaphore: Ограничение одновременных запросов прогрева.
+    :param stats: Статистика прогрева, обновляется на месте.
+    :return: Словарь {идентификатор товара: путь изображения} в порядке популярности.
+    """
+    results: list[list[SearchHit] | None] = [None] * len(queries)
+
+    async def search(index: int, query: str) -> list[SearchHit] | None:
+        results[index] = await connect_search(query)
+        return results[index]
+
+    await asyncio.gather(*(
+        _run(
+            budget, semaphore, lambda index=index, query=query: search(index, query),
+            f"поиска '{query}'", (stats['queries'], 'warmed')
+            )
+        for index, (query, _) in enumerate(queries)
+    ))
+
+    products: dict[str, str | None] = {}
+    for (_, kind), result in zip(queries, results):
+        if not result:
+            continue
+        shown = 1 if kind == 'product' else SHOWN_SEARCH_RESULTS
+        for product in result[:shown]:
+            if product.product_id is not None:
+                products.setdefault(str(product.product_id), product.image)
+    return products
+
+async def _warm_up_products(
+    products: dict[str, str | None],
+    budget: WarmupBudget,
+    semaphore: asyncio.Semaphore,
+    stats: dict
+    ) -> None:
+    """
+    Асинхронно загружает информацию, количество и проверку изображения товаров.
+
+    :param products: Словарь {идентификатор товара: путь изображения}.
+    :param budget: Бюджет запросов.
+    :param semaphore: Ограничение одновременных запросов прогрева.
+    :param stats: Статистика прогрева, обновляется на месте.
+    """
+    jobs = []
+    for product_id, image in products.items():
+        jobs.append(_run(
+            budget, semaphore, lambda product_id=product_id: connect_product_to_id(product_id),
+            f"информации товара {product_id}", (stats['products'], 'info')
+            ))
+        jobs.append(_run(
+            budget, semaphore, lambda product_id=product_id: get_product_quatity(product_id),
+            f"количества товара {product_id}", (stats['products'], 'quantity')
+            ))
+        if image:
+            image_url = f'{config.IMAGE_URL}{image}'
+            # Отсутствие изображения тоже сохраняется в кеш, поэтому любой ответ
+            # считается прогревом
+            jobs.append(_run(
+                budget, semaphore, lambda image_url=image_url: check_image_exists(image_url),
+                f"изображения {image_url}", (stats['products'], 'images')
+                ))
+    await asyncio.gather(*jobs)
+
+async def warm_up_caches(
+    time_budget: float | None = None,
+    request_budget: int | None = None,
+    query_limit: int | None = None
+    ) -> dict:
+    """
+    Асинхронно прогревает кеши по самым частым запросам пользователей.
+
+    Получает токен, затем выполняет до query_limit самых частых поисков
+    по слову и по коду/штрихкоду, затем для найденных товаров загружает
+    информацию, количество по магазинам и проверяет изображение. Все запросы
+    выполняются с приоритетом Priority.BACKGROUND. Прогрев прекращается,
+    когда истекает time_budget секунд или исчерпан бюджет request_budget запросов.
+
+    :param time_budget: Ограничение времени в секундах, по умолчанию WARMUP_TIME_BUDGET.
+    :param request_budget: Ограничение количества запросов, по умолчанию WARMUP_REQUEST_BUDGET.
+    :param query_limit: Количество запросов каждого типа, по умолчанию WARMUP_QUERY_LIMIT.
+    :return: Покрытие прогрева.
+    """
+    global last_warmup_stats  # pylint: disable=global-statement
+    time_budget = config.WARMUP_TIME_BUDGET if time_budget is None else time_budget
+    request_budget = config.WARMUP_REQUEST_BUDGET if request_budget is None else request_budget
+    query_limit = config.WARMUP_QUERY_LIMIT if query_limit is None else query_limit
+    logger.info("Выполнение функции warm_up_caches")
+    started = time.monotonic()
+    budget = WarmupBudget(request_budget)
+    semaphore = asyncio.Semaphore(config.WARMUP_CONCURRENCY)
+    stats = {
+        'token': 0,
+        'queries': {'total': 0, 'warmed': 0},
+        'products': {'total': 0, 'info': 0, 'quantity': 0, 'images': 0},
+        'requests': {'used': 0, 'budget': request_budget},
+        'elapsed': 0.0,
+        'timed_out': False,
+    }
+    with priority_scope(Priority.BACKGROUND):
+        try:
+            async with asyncio.timeout(time_budget):
+                await _run(budget, semaphore, get_token, "токена", (stats, 'token'))
+                name_queries = await get_top_search_queries(NAME_SEARCH_EVENTS, query_limit)
+                product_queries = await get_top_search_queries(PRODUCT_SEARCH_EVENTS, query_limit)
+                queries = sorted(
+                    [(query, count, 'name') for query, count in name_queries or []]
+                    + [(query, count, 'product') for query, count in product_queries or []],
+                    key=lambda item: item[1], reverse=True
+                    )
+                queries = [(query, kind) for query, _, kind in queries]
+                stats['queries']['total'] = len(queries)
+                products = await _warm_up_searches(queries, budget, semaphore, stats)
+                stats['products']['total'] = len(products)
+                await _warm_up_products(products, budget, semaphore, stats)
+        except TimeoutError:
+            stats['timed_out'] = True
+    stats['requests']['used'] = budget.used
+    stats['elapsed'] = time.monotonic() - started
+    last_warmup_stats = stats
+    logger.info(
+        "Прогрев кеша завершен%s за %.1f с: поиски %s/%s, товары %s "
+        "(информация %s, количество %s, изображения %s), запросов %s/%s",
+        " по таймауту" if stats['timed_out'] else "", stats['elapsed'],
+        stats['queries']['warmed'], stats['queries']['total'], stats['products']['total'],
+        stats['products']['info'], stats['products']['quantity'], stats['products']['images'],
+        budget.used, request_budget
+        )
+    return stats
@@ -0,0 +1,198 @@
+"""
+Модуль для фоновой синхронизации локальной копии каталога товаров.
+Этот модуль постранично загружает товары из API магазина в локальный
+каталог SQLite (см. src.database.process_database_catalog). Полная
+синхронизация загружает все товары и удаляет пропавшие из магазина,
+инкрементальная загружает только товары, измененные после предыдущей
+синхронизации. Синхронизация выполняется только если поиск идет
+по локальной копии (SEARCH_BACKEND = 'local') и задан адрес
+URL_API_PRODUCTS_LIST.
+"""
+
+import asyncio
+import logging
+from logging.handlers import RotatingFileHandler
+import time
+
+import aiohttp
+
+from configs import config
+from src.database.process_database_catalog import (
+    count_catalog_products,
+    create_catalog_tables,
+    delete_products_not_in_sync,
+    get_catalog_meta,
+    set_catalog_meta,
+    upsert_products,
+)
+from src.utils.circuit_breaker import CircuitOpenError
+from src.utils.connect_api import call_api, get_token
+from src.utils.description import extract_first_sentence
+from src.utils.request_scheduler import Priority, request_priority
+
+
+logging.basicConfig(level=logging.INFO)
+
+# Установка размера файла логов в 8 МБ
+MAX_BYTES = 8 * 1024 * 1024  # 8 МБ в байтах
+
+# Создание обработчика файлов с ограничением размера и ротацией
+file_handler = RotatingFileHandler(
+    "logs/catalog_sync_log.log",
+    maxBytes=MAX_BYTES,  # Установка максимального размера файла логов
+    backupCount=30,  # Количество файлов логов, которые будут храниться
+    encoding="utf-8",
+)
+
+# Формат сообщений
+formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(formatter)
+
+# Добавление обработчика в логгер
+logger = logging.getLogger('catalog_sync_logger')
+logger.addHandler(file_handler)
+
+_catalog_sync_task: asyncio.Task | None = None  # Фоновая синхронизация каталога
+
+
+def _products_from_page(page_data) -> list[dict]:
+    """
+    Извлекает список товаров из ответа API. Ответ может быть списком товаров,
+    словарем {id: товар} (как у поиска) или словарем с ключом 'products'.
+
+    :param page_data: Данные ответа API.
+    :return: Список товаров.
+    """
+    if isinstance(page_data, dict):
+        page_data = page_data.get('products', page_data)
+    if isinstance(page_data, dict):
+        page_data = list(page_data.values())
+    return [product for product in page_data or [] if isinstance(product, dict)]
+
+def _to_catalog_row(product: dict) -> dict:
+    """
+    Приводит товар из ответа API к полям локального каталога.
+    Вместо полного HTML-описания сохраняется его первое предложение.
+
+    :param product: Товар из ответа API.
+    :return: Товар для записи в каталог.
+    """
+    return {
+        'product_id': int(product['product_id']),
+        'name': product.get('name'),
+        'model': product.get('model'),
+        'ean': product.get('ean'),
+        'description': extract_first_sentence(product.get('description')),
+        'url': product.get('url'),
+        'image': product.get('image'),
+        'date_modified': product.get('date_modified'),
+    }
+
+async def sync_catalog(full: bool = False) -> int | None:
+    """
+    Асинхронно загружает товары из API магазина в локальный каталог.
+
+    :param full: Выполнить полную синхронизацию вместо инкрементальной.
+    :return: Количество загруженных товаров или None, если синхронизация не удалась.
+    """
+    logger.info("Выполнение функции sync_catalog (full = %s)", full)
+    await create_catalog_tables()
+    modified_since = None if full else await get_catalog_meta('last_modified')
+    sync_id = time.time_ns()
+    last_modified = modified_since
+    synced = 0
+    page = 1
+    while True:
+        params = {
+            'page': page,
+            'limit': config.CATALOG_SYNC_PAGE_SIZE,
+            'token': await get_token(),
+        }
+        if modified_since:
+            params['modified_since'] = modified_since
+        try:
+            response = await call_api(config.URL_API_PRODUCTS_LIST, params)
+        except (CircuitOpenError, TimeoutError, aiohttp.ClientError) as e:
+            logger.error("В функции sync_catalog страница %s не получена: %s", page, e)
+            return None
+        if response.status != 200:
+            logger.error(
+                "В функции sync_catalog страница %s не получена, статус %s",
+                page, response.status
+                )
+            return None
+
+        products = [_to_catalog_row(product) for product in _products_from_page(response.data)]
+        if products:
+            if await upsert_products(products, sync_id) is None:
+                return None
+            synced += len(products)
+            page_modified = max((product['date_modified'] or '') for product in products)
+            last_modified = max(last_modified or '', page_modified) or None
+        if len(products) < config.CATALOG_SYNC_PAGE_SIZE:
+            break
+        page += 1
+
+    if full:
+        removed = await delete_products_not_in_sync(sync_id)
+        logger.info("В функции sync_catalog удалено пропавших товаров: %s", removed)
+        await set_catalog_meta('last_full_sync', str(time.time()))
+    if last_modified:
+        await set_catalog_meta('last_modified', last_modified)
+    await set_catalog_meta('last_sync', str(time.time()))
+    logger.info(
+        "Функция sync_catalog выполнилась: загружено %s товаров, в каталоге %s",
+        synced, await count_catalog_products()
+        )
+    return synced
+
+async def _catalog_sync_loop() -> None:
+    """
+    Фоновая задача синхронизации каталога. Полная синхронизация выполняется,
+    если каталог пуст или с предыдущей полной синхронизации прошло больше
+    CATALOG_FULL_SYNC_INTERVAL секунд, в остальных случаях инкрементальная.
+    Запросы синхронизации выполняются с фоновым приоритетом.
+    """
+    request_priority.set(Priority.BACKGROUND)
+    while True:
+        last_full_sync = await get_catalog_meta('last_full_sync')
+        full = (
+            not await count_catalog_products()
+            or last_full_sync is None
+            or time.time() - float(last_full_sync) > config.CATALOG_FULL_SYNC_INTERVAL
+        )
+        try:
+            await sync_catalog(full=full)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.error("Ошибка синхронизации каталога: %s", e)
+        await asyncio.sleep(config.CATALOG_SYNC_INTERVAL)
+
+def start_catalog_sync() -> None:
+    """
+    Запускает фоновую синхронизацию каталога, если поиск идет по локальной
+    копии (SEARCH_BACKEND = 'local') и задан URL_API_PRODUCTS_LIST.
+    """
+    global _catalog_sync_task  # pylint: disable=global-statement
+    if config.SEARCH_BACKEND != 'local':
+        logger.info("SEARCH_BACKEND = %s, синхронизация каталога отключена", config.SEARCH_BACKEND)
+        return
+    if not config.URL_API_PRODUCTS_LIST:
+        logger.info("URL_API_PRODUCTS_LIST не задан, синхронизация каталога отключена")
+        return
+    if _catalog_sync_task is None or _catalog_sync_task.done():
+        _catalog_sync_task = asyncio.create_task(_catalog_sync_loop())
+        logger.info("Фоновая синхронизация каталога запущена")
+
+async def stop_catalog_sync() -> None:
+    """
+    Асинхронно останавливает фоновую синхронизацию каталога.
+    """
+    global _catalog_sync_task  # pylint: disable=global-statement
+    if _catalog_sync_task is not None:
+        _catalog_sync_task.cancel()
+        try:
+            await _catalog_sync_task
+        except asyncio.CancelledError:
+            pass
+        _catalog_sync_task = None
+        logger.info("Фоновая синхронизация каталога остановлена")
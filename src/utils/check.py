@@ -9,12 +9,20 @@ import asyncio
 import json
 import logging
 from logging.handlers import RotatingFileHandler
+import time
 
 import aiofiles
 import aiohttp
 from check_swear import SwearingCheck
 from cachetools import TTLCache
 
+from configs import config
+from src.utils.circuit_breaker import CircuitOpenError, api_breakers
+from src.utils.http_client import get_session
+from src.utils.image_cache import image_cache
+from src.utils.models import AttributeGroup, ProductInfo, SearchHit, StoreQuantities
+from src.utils.single_flight import SingleFlight
+
 logging.basicConfig(level=logging.INFO)
 
 # Установка размера файла логов в 8 МБ
@@ -42,23 +50,100 @@ sch = SwearingCheck()
 default_rate_limit_cache = TTLCache(maxsize=1000, ttl=60)
 default_cache_lock = asyncio.Lock()
 
+image_single_flight = SingleFlight()  # Объединение одновременных проверок одного изображения
+_prewarm_tasks: set[asyncio.Task] = set()  # Выполняющиеся фоновые проверки изображений
+
+async def _head_image(image_url: str) -> bool | None:
+    """
+    Асинхронно выполняет HEAD-запрос к изображению через предохранитель сервера изображений.
+
+    :param image_url: URL изображения.
+    :return: True, если изображение есть, False, если его нет,
+    None, если сервер изображений недоступен или ответил ошибкой.
+    """
+    breaker = api_breakers.get(config.IMAGE_URL)
+    try:
+        breaker.before_call()
+    except CircuitOpenError as e:
+        logger.warning("В функции check_image_exists проверка пропущена: %s", e)
+        return None
+    session = await get_session()
+    started = time.monotonic()
+    try:
+        async with session.head(
+            image_url,
+            timeout=aiohttp.ClientTimeout(total=breaker.timeout())
+        ) as response:
+            status = response.status
+    except (TimeoutError, aiohttp.ClientError) as e:
+        breaker.record_failure()
+        logger.error("В функции check_image_exists произошла ошибка запроса: %s", e)
+        return None
+    except asyncio.CancelledError:
+        breaker.release()
+        raise
+    if status >= 500:
+        breaker.record_failure()
+        return None
+    breaker.record_success(time.monotonic() - started)
+    return status == 200
+
+async def _check_and_cache_image(image_url: str) -> bool:
+    """
+    Асинхронно проверяет изображение и сохраняет определенный результат в кеш.
+    Результат при недоступном сервере изображений не кешируется.
+
+    :param image_url: URL изображения.
+    :return: True, если изображение существует, иначе False.
+    """
+    exists = await _head_image(image_url)
+    if exists is None:
+        return False
+    image_cache.set(image_url, exists)
+    return exists
+
 async def check_image_exists(image_url: str) -> bool:
     """
     Асинхронно проверяет, существует ли удаленное изображение по заданному URL.
 
+    Результат берется из кеша image_cache (найденные и отсутствующие
+    изображения хранятся с разным временем жизни). Одновременные проверки
+    одного URL выполняют один HEAD-запрос. Запрос проходит через общий
+    для всех изображений предохранитель: если сервер изображений недоступен,
+    функция сразу возвращает False.
+
     :param image_url: URL изображения.
     :return: True, если изображение существует, иначе False.
     """
     logger.info("Выполнение функции check_image_exists, c полученными данными - image_url")
-    async with aiohttp.ClientSession() as session:
-        async with session.head(image_url) as response:
-            return response.status == 200
+    cached = image_cache.get(image_url)
+    if cached is not None:
+        return cached
+    return await image_single_flight.do(
+        image_url, lambda: _check_and_cache_image(image_url), label='image'
+        )
 
-async def format_product_attributes(product_attributes_to_id: list[dict]) -> str:
+def prewarm_image_cache(image_urls: list[str]) -> None:
+    """
+    Запускает фоновую проверку изображений, которых еще нет в кеше,
+    чтобы к моменту ответа пользователю результат был готов.
+
+    :param image_urls: URL изображений.
+    """
+    for image_url in image_urls:
+        if image_cache.contains(image_url):
+            continue
+        task = asyncio.create_task(check_image_exists(image_url))
+        _prewarm_tasks.add(task)
+        task.add_done_callback(_prewarm_tasks.discard)
+
+async def format_product_attributes(
+    product_attributes_to_id: tuple[AttributeGroup, ...] | None
+    ) -> str:
     """
     Асинхронно форматирует атрибуты продукта и возвращает их в виде строки.
 
-    :param product_attributes_to_id: Список словарей, содержащих атрибуты продукта.
+    :param product_attributes_to_id: Группы атрибутов продукта.
     :return: Отформатированные атрибуты продукта в виде строки.
     """
     logger.info(
@@ -71,8 +156,8 @@ async def format_product_attributes(product_attributes_to_id: list[dict]) -> str
         logger.info(
             "Полученные данные в format_product_attributes "
             "- product_attributes_to_id начали обрабатываться в первом условии")
-        for i in product_attributes_to_id[0]['attribute']:
-            text_at = f'{i["name"]} - {i["text"]}\n'
+        for i in product_attributes_to_id[0].attributes:
+            text_at = f'{i.name} - {i.text}\n'
             answ_text_att += text_at
     else:
         logger.info(
@@ -84,24 +169,24 @@ async def format_product_attributes(product_attributes_to_id: list[dict]) -> str
         logger.info(
             "Полученные данные в format_product_attributes - "
             "product_attributes_to_id начали обрабатываться втретьем условии")
-        for j in product_attributes_to_id[1]['attribute']:
-            text_at2 = f'{j["name"]} - {j["text"]}\n'
+        for j in product_attributes_to_id[1].attributes:
+            text_at2 = f'{j.name} - {j.text}\n'
             answ_text_att += text_at2
     logger.info("Обработанные данные в format_product_attributes - answ_text_att возвращены")
     return answ_text_att
 
-async def get_product_status_quantity(product_information_to_id: dict) -> str:
+async def get_product_status_quantity(product_information_to_id: ProductInfo) -> str:
     """
     Асинхронно получает информацию о количестве товара и возвращает статус товара.
 
-    :param product_information_to_id: Словарь с информацией о товаре, включая количество.
+    :param product_information_to_id: Информация о товаре, включая количество.
     :return: Статус товара в виде строки, указывающей на его наличие или отсутствие.
     """
     logger.info(
         "Выполнение функции get_product_status_quantity "
         "c полученными данными - product_information_to_id"
         )
-    product_quatnity = float(product_information_to_id['quantity'])
+    product_quatnity = float(product_information_to_id.quantity)
     #product_status = product_information_to_id['stock_status']
 
     # Имитация асинхронной операции с помощью asyncio.sleep
@@ -268,79 +353,116 @@ async def censor_swear_words(text: str) -> str:
             words[i] = '*' * len(word)
     return ' '.join(words)
 
-def quatity_discount(product_data_quantity: list[dict]) -> list:
+def _format_quantity(quantity: float) -> str:
+    """
+    Форматирует количество товара: целое без дробной части, иначе с 3 знаками после запятой.
+    """
+    return (
+        f"{quantity:,.0f}" if quantity.is_integer() else f"{quantity:,.3f}"
+    ).replace('.', ',')
+
+def format_store_quantities(
+    products_quantity: list[StoreQuantities | None],
+    stores: int | None = None
+    ) -> list[list]:
     """
-    Форматирует количества товаров из списка словарей и возвращает их в виде списка строк.
+    Форматирует количество нескольких товаров по всем магазинам за один проход.
 
-    Эта функция принимает список словарей, каждый из которых содержит информацию о количестве товара
-    для двух разных мест хранения (например, "космонавтов" и "дзержинского"). Количество товара
-    форматируется в зависимости от того, является ли оно целым числом или числом 
-    с плавающей запятой. Результат форматирования добавляется в список,
-    который затем возвращается.
+    Одинаковые значения (например, 0) форматируются один раз. Если количество
+    товара не получено или API вернул меньше магазинов, чем настроено,
+    для таких магазинов возвращается 0.
 
-    :param product_data_quantity: Список словарей, содержащих информацию о количестве товара.
-                                 Каждый словарь должен содержать ключ 'quantity'.
-    :type product_data_quantity: list[dict]
-    :return: Список строк, содержащих отформатированные количества товара.
+    :param products_quantity: Количество по магазинам для каждого товара.
+    :param stores: Количество магазинов, по умолчанию len(config.STORES).
+    :return: Для каждого товара список строк с количеством по магазинам в порядке STORES.
+    """
+    stores = len(config.STORES) if stores is None else stores
+    formatted: dict[float, str] = {}
+    result = []
+    for product_quantity in products_quantity:
+        if not product_quantity:
+            result.append([0] * stores)
+            continue
+        row = []
+        for quantity in product_quantity.by_store[:stores]:
+            text = formatted.get(quantity)
+            if text is None:
+                text = formatted[quantity] = _format_quantity(quantity)
+            row.append(text)
+        row.extend([0] * (stores - len(row)))
+        result.append(row)
+    return result
+
+def quatity_discount(product_data_quantity: StoreQuantities | None) -> list:
+    """
+    Форматирует количество товара по магазинам и возвращает его в виде списка строк.
+
+    Количество товара форматируется в зависимости от того, является ли оно целым числом
+    или числом с плавающей запятой (см. format_store_quantities).
+
+    :param product_data_quantity: Количество товара по магазинам.
+    :type product_data_quantity: StoreQuantities | None
+    :return: Список строк с количеством товара в порядке магазинов STORES
+    или список нулей, если количество не получено.
     :rtype: list
     """
+    return format_store_quantities([product_data_quantity])[0]
 
-    list_product_data_quantity_store = []
-    if len(product_data_quantity) != 0:
-        quantity_1 = float(product_data_quantity[0].get('quantity'))
-        quantity_2 = float(product_data_quantity[1].get('quantity'))
+def format_store_lines(product_data_quantity_stores: list, unit: str) -> str:
+    """
+    Форматирует строки наличия товара по магазинам STORES.
 
-        product_data_quantity_store_1 = (
-            f"{quantity_1:,.0f}" if quantity_1.is_integer() else f"{quantity_1:,.3f}"
-        ).replace('.', ',')  # Количество на космонавтов
+    :param product_data_quantity_stores: Количество товара по магазинам (см. quatity_discount).
+    :param unit: Единица измерения товара.
+    :return: Строки вида "<магазин> - <количество> <единица>", по одной на магазин.
+    """
+    return ''.join(
+        f"{store} - {quantity} {unit}\n"
+        for store, quantity in zip(config.STORES, product_data_quantity_stores)
+        )
 
-        product_data_quantity_store_2 = (
-            f"{quantity_2:,.0f}" if quantity_2.is_integer() else f"{quantity_2:,.3f}"
-        ).replace('.', ',')  # Количество на дзержинского
+def format_product_text(product_data: SearchHit, product_information_to_id: ProductInfo) -> str:
+    """
+    Форматирует краткую карточку продукта в виде HTML-текста.
 
-        list_product_data_quantity_store.append(product_data_quantity_store_1)
-        list_product_data_quantity_store.append(product_data_quantity_store_2)
-    else:
-        list_product_data_quantity_store = [0, 0]
-
-    return list_product_data_quantity_store
-
-def format_product_text(product_data: dict,
-                        product_information_to_id: dict,
-                        product_data_quantity_store_1: int,
-                        product_data_quantity_store_2: int
-                        ) -> str:
-    """
-    Форматирует информацию о продукте в виде HTML-текста.
-
-    Эта функция принимает данные о продукте, информацию о продукте по ID,
-    а также количества продукта в двух разных магазинах, и возвращает отформатированную
-    строку с HTML-тегами для отображения информации о продукте.
-
-    :param product_data: Словарь с данными о продукте, содержащий ключи 'name' и 'description'.
-    :type product_data: dict
-    :param product_information_to_id: Словарь с информацией о продукте по ID,
-    содержащий ключи 'sku' и 'upc'.
-    :type product_information_to_id: dict
-    :param product_data_quantity_store_1: Количество продукта в первом магазине.
-    :type product_data_quantity_store_1: int
-    :param product_data_quantity_store_2: Количество продукта во втором магазине.
-    :type product_data_quantity_store_2: int
+    Карточка содержит название, цену и описание. Наличие по магазинам
+    и характеристики показываются по кнопкам "Наличие" и "Характеристики"
+    (см. format_product_stock и format_product_attributes).
+
+    :param product_data: Товар из результатов поиска (название и описание).
+    :type product_data: SearchHit
+    :param product_information_to_id: Информация о продукте по ID (цена).
+    :type product_information_to_id: ProductInfo
     :return: Отформатированная строка с HTML-тегами, содержащая информацию о продукте.
     :rtype: str
     """
     product_text = (
-        f"<strong>{product_data.get('name')}</strong>\n"
-        f"<strong>Цена:</strong> {product_information_to_id['sku']} р.\n"
-        f"{product_data.get('description')}\n"
-        f"<strong>В наличии:</strong>\n"
-        f"Гродно, пр. Космонавтов 2Г - {product_data_quantity_store_1} "
-        f"{product_information_to_id['upc'].replace('/','')}\n"
-        f"Гродно, ул. Дзержинского 118 - {product_data_quantity_store_2} "
-        f"{product_information_to_id['upc'].replace('/','')}\n"
+        f"<strong>{product_data.name}</strong>\n"
+        f"<strong>Цена:</strong> {product_information_to_id.price} р.\n"
+        f"{product_data.description}\n"
         )
     return product_text
 
+def format_product_stock(
+    product_information_to_id: ProductInfo,
+    product_data_quantity: StoreQuantities | None
+    ) -> str:
+    """
+    Форматирует наличие продукта по магазинам STORES в виде HTML-текста.
+
+    :param product_information_to_id: Информация о продукте (название и единица измерения).
+    :param product_data_quantity: Количество продукта по магазинам.
+    :return: Отформатированная строка с HTML-тегами.
+    """
+    store_lines = format_store_lines(
+        quatity_discount(product_data_quantity), product_information_to_id.unit
+        )
+    return (
+        f"<strong>{product_information_to_id.name}</strong>\n"
+        f"<strong>В наличии:</strong>\n"
+        f"{store_lines}"
+        )
+
 async def rate_limit(
     user_id: int,
     limit: int = 10,
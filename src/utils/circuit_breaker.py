@@ -0,0 +1,274 @@
+"""
+Модуль для защиты от деградации API магазина (circuit breaker).
+Для каждого эндпоинта ведется свой предохранитель: после нескольких ошибок
+подряд он размыкается, и запросы к эндпоинту сразу завершаются ошибкой
+CircuitOpenError, не дожидаясь таймаута. Через заданное время предохранитель
+пропускает один пробный запрос (полуоткрытое состояние) и по его результату
+замыкается или снова размыкается. Таймаут запроса подбирается по процентилю
+задержек последних успешных ответов эндпоинта.
+"""
+
+from collections import deque
+import logging
+from logging.handlers import RotatingFileHandler
+import math
+import time
+
+from configs import config
+
+
+logging.basicConfig(level=logging.INFO)
+
+# Установка размера файла логов в 8 МБ
+MAX_BYTES = 8 * 1024 * 1024  # 8 МБ в байтах
+
+# Создание обработчика файлов с ограничением размера и ротацией
+file_handler = RotatingFileHandler(
+    "logs/circuit_breaker_log.log",
+    maxBytes=MAX_BYTES,  # Установка максимального размера файла логов
+    backupCount=30,  # Количество файлов логов, которые будут храниться
+    encoding="utf-8",
+)
+
+# Формат сообщений
+formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(formatter)
+
+# Добавление обработчика в логгер
+logger = logging.getLogger('circuit_breaker_logger')
+logger.addHandler(file_handler)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """
+    Запрос не выполнен, потому что предохранитель эндпоинта разомкнут.
+
+    :param endpoint: Имя эндпоинта.
+    :param retry_after: Через сколько секунд будет разрешен пробный запрос.
+    """
+
+    def __init__(self, endpoint: str, retry_after: float):
+        super().__init__(
+            f"Эндпоинт {endpoint} временно недоступен, повтор через {retry_after:.1f} с."
+            )
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Предохранитель одного эндпоинта с адаптивным таймаутом.
+
+    :param name: Имя эндпоинта (используется в логах и статистике).
+    :param failure_threshold: Количество ошибок подряд, после которого предохранитель размыкается.
+    :param recovery_time: Время в секундах до пробного запроса после размыкания.
+    :param window_size: Количество последних задержек, по которым считается таймаут.
+    :param percentile: Процентиль задержек, от которого считается таймаут.
+    :param multiplier: Множитель процентиля задержек.
+    :param min_timeout: Нижняя граница таймаута в секундах.
+    :param max_timeout: Верхняя граница таймаута в секундах, она же таймаут,
+    пока задержек накоплено недостаточно.
+    :param min_samples: Минимальное количество задержек для адаптивного таймаута.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        recovery_time: float,
+        window_size: int,
+        percentile: float,
+        multiplier: float,
+        min_timeout: float,
+        max_timeout: float,
+        min_samples: int = 20
+        ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.min_samples = min_samples
+        self._latencies = deque(maxlen=window_size)
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        """
+        Текущее состояние предохранителя с учетом истекшего времени восстановления.
+        """
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.recovery_time:
+            self._state = HALF_OPEN
+            logger.info("Предохранитель %s перешел в полуоткрытое состояние", self.name)
+        return self._state
+
+    def before_call(self) -> None:
+        """
+        Проверяет, можно ли выполнить запрос. В полуоткрытом состоянии
+        пропускает только один пробный запрос.
+
+        :raises CircuitOpenError: Если запрос выполнять нельзя.
+        """
+        state = self.state
+        if state == CLOSED:
+            return
+        if state == HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return
+        self.rejected += 1
+        retry_after = max(self.recovery_time - (time.monotonic() - self._opened_at), 0.0)
+        raise CircuitOpenError(self.name, retry_after)
+
+    def record_success(self, latency: float) -> None:
+        """
+        Учитывает успешный запрос и его задержку. Пробный запрос замыкает предохранитель.
+
+        :param latency: Задержка ответа в секундах.
+        """
+        self.successes += 1
+        self._latencies.append(latency)
+        self._consecutive_failures = 0
+        if self._state != CLOSED:
+            logger.info("Предохранитель %s замкнут, эндпоинт снова доступен", self.name)
+        self._state = CLOSED
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        """
+        Учитывает неудачный запрос. После failure_threshold ошибок подряд
+        или при неудачном пробном запросе предохранитель размыкается.
+        """
+        self.failures += 1
+        self._consecutive_failures += 1
+        if self._state == HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+            self._open()
+        self._probe_in_flight = False
+
+    def release(self) -> None:
+        """
+        Освобождает пробный запрос, который был прерван без результата.
+        """
+        self._probe_in_flight = False
+
+    def _open(self) -> None:
+        """
+        Размыкает предохранитель.
+        """
+        if self._state != OPEN:
+            self.opened += 1
+            logger.warning(
+                "Предохранитель %s разомкнут после %s ошибок подряд на %s с.",
+                self.name, self._consecutive_failures, self.recovery_time
+                )
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+
+    def latency_percentile(self, percentile: float) -> float | None:
+        """
+        Возвращает процентиль задержек последних успешных запросов.
+
+        :param percentile: Процентиль от 0 до 100.
+        :return: Задержка в секундах или None, если задержек нет.
+        """
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        index = max(math.ceil(percentile / 100 * len(ordered)) - 1, 0)
+        return ordered[index]
+
+    def timeout(self) -> float:
+        """
+        Возвращает таймаут для следующего запроса: процентиль задержек,
+        умноженный на multiplier и ограниченный min_timeout и max_timeout.
+
+        :return: Таймаут в секундах.
+        """
+        if len(self._latencies) < self.min_samples:
+            return self.max_timeout
+        latency = self.latency_percentile(self.percentile)
+        return min(max(latency * self.multiplier, self.min_timeout), self.max_timeout)
+
+    def stats(self) -> dict:
+        """
+        Возвращает состояние предохранителя, счетчики и задержки.
+
+        :return: Словарь со статистикой.
+        """
+        return {
+            'state': self.state,
+            'successes': self.successes,
+            'failures': self.failures,
+            'rejected': self.rejected,
+            'opened': self.opened,
+            'p50': self.latency_percentile(50),
+            'p99': self.latency_percentile(99),
+            'timeout': self.timeout(),
+        }
+
+
+class CircuitBreakerRegistry:
+    """
+    Набор предохранителей по эндпоинтам, создаваемых при первом обращении.
+    Параметры передаются каждому создаваемому CircuitBreaker.
+    """
+
+    def __init__(self, **breaker_options):
+        self._breaker_options = breaker_options
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    def get(self, endpoint: str) -> CircuitBreaker:
+        """
+        Возвращает предохранитель эндпоинта, создавая его при необходимости.
+
+        :param endpoint: Имя или адрес эндпоинта.
+        :return: Предохранитель эндпоинта.
+        """
+        breaker = self._breakers.get(endpoint)
+        if breaker is None:
+            breaker = CircuitBreaker(endpoint, **self._breaker_options)
+            self._breakers[endpoint] = breaker
+        return breaker
+
+    def any_open(self, exclude: tuple[str, ...] = ()) -> bool:
+        """
+        Проверяет, разомкнут ли хотя бы один предохранитель.
+
+        :param exclude: Эндпоинты, которые не учитываются.
+        :return: True, если хотя бы один эндпоинт недоступен.
+        """
+        return any(
+            breaker.state != CLOSED
+            for name, breaker in self._breakers.items() if name not in exclude
+            )
+
+    def stats(self) -> dict:
+        """
+        Возвращает статистику всех предохранителей.
+
+        :return: Словарь {эндпоинт: статистика}.
+        """
+        return {name: breaker.stats() for name, breaker in self._breakers.items()}
+
+
+api_breakers = CircuitBreakerRegistry(
+    failure_threshold=config.API_BREAKER_FAILURE_THRESHOLD,
+    recovery_time=config.API_BREAKER_RECOVERY_TIME,
+    window_size=config.API_LATENCY_WINDOW,
+    percentile=config.API_TIMEOUT_PERCENTILE,
+    multiplier=config.API_TIMEOUT_MULTIPLIER,
+    min_timeout=config.API_TIMEOUT_MIN,
+    max_timeout=config.API_TIMEOUT_MAX,
+)
@@ -8,17 +8,40 @@
 """
 
 import asyncio
-import json
 import logging
 from logging.handlers import RotatingFileHandler
-import re
-import requests
+import random
+import time
+from typing import Any, Callable, NamedTuple
 
 import aiohttp
-from bs4 import BeautifulSoup
-from cachetools import TTLCache
+from cachetools import LRUCache, TTLCache
 
 from configs import config
+from src.database.process_database_catalog import get_catalog_meta, search_catalog
+from src.utils.check import prewarm_image_cache
+from src.utils.circuit_breaker import OPEN, CircuitOpenError, api_breakers
+from src.utils.customer_cache import customer_cache
+from src.utils.description import description_cache
+from src.utils.http_client import get_session, transfer_stats
+from src.utils.models import (
+    AttributeGroup,
+    CustomerCard,
+    ProductInfo,
+    SearchHit,
+    StoreQuantities,
+    json_loads,
+    parse_attributes,
+)
+from src.utils.product_cache import product_cache
+from src.utils.request_scheduler import (
+    Priority,
+    request_priority,
+    request_scheduler,
+    run_with_priority,
+)
+from src.utils.search_cache import FRESH, STALE, normalize_query, search_cache
+from src.utils.single_flight import SingleFlight
 
 
 logging.basicConfig(level=logging.INFO)
@@ -42,113 +65,630 @@ file_handler.setFormatter(formatter)
 logger = logging.getLogger('connect_api_logger')
 logger.addHandler(file_handler)
 
-cache = TTLCache(maxsize=1, ttl=3600)  # Кеш на 1 элемент с временем жизни 1 час
-cache_lock = asyncio.Lock()
+cache = TTLCache(maxsize=1, ttl=config.API_TOKEN_TTL)  # Кеш на 1 элемент (токен)
+_login_task: asyncio.Task | None = None  # Выполняющийся запрос авторизации
+_token_refresher_task: asyncio.Task | None = None  # Фоновое обновление токена
 
-async def get_token() -> str:
+api_single_flight = SingleFlight()  # Объединение одинаковых одновременных запросов к API
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+"""
+Статусы ответа, при которых запрос к API повторяется.
+"""
+
+SHOWN_SEARCH_RESULTS = 4
+"""
+Количество первых результатов поиска, которые может показать пользователю
+process_search (первый или со второго по четвертый), для них извлекается описание.
+"""
+
+AUTH_FAILURE_STATUSES = (401, 403)
+"""
+Статусы ответа, означающие, что токен авторизации недействителен.
+"""
+
+AUTH_ERROR_MARKERS = ('permission', 'token', 'login')
+"""
+Фрагменты текста ошибки API, означающие, что токен авторизации недействителен.
+"""
+
+API_ERROR_STATUS = 422
+"""
+Статус, которым call_api заменяет ответ 200 с полем 'error' (кроме ошибки
+авторизации), чтобы вызывающий код не получал словарь ошибки вместо записи.
+"""
+
+
+class ApiResponse(NamedTuple):
     """
-    Асинхронно получает токен авторизации от сервера.
-    Если токен получен ранее, использует кеш.
+    Результат запроса к API: статус ответа и данные JSON или запись,
+    созданная из них (None, если статус не 200).
+    """
+    status: int
+    data: Any
 
-    :return: Токен авторизации, полученный от сервера.
+
+class CachedResponse(NamedTuple):
+    """
+    Данные последнего полного ответа и его валидаторы (ETag, Last-Modified)
+    для условного запроса.
+    """
+    etag: str | None
+    last_modified: str | None
+    data: Any
+    size: int
+
+
+conditional_responses = LRUCache(maxsize=config.CONDITIONAL_CACHE_MAXSIZE)
+"""
+Последние ответы с валидаторами по запросу (адрес и параметры без токена).
+"""
+
+
+def is_api_degraded() -> bool:
+    """
+    Проверяет, недоступен ли сейчас хотя бы один эндпоинт API, нужный
+    для ответа пользователю. Недоступность сервера изображений и списка
+    товаров (используется только фоновой синхронизацией каталога) не учитывается.
+
+    :return: True, если хотя бы один предохранитель эндпоинта разомкнут.
+    """
+    return api_breakers.any_open(exclude=(config.IMAGE_URL, config.URL_API_PRODUCTS_LIST))
+
+def _params_key(params: dict) -> tuple:
+    """
+    Возвращает ключ параметров запроса без учета токена.
+    """
+    return tuple(sorted(
+        (name, str(value)) for name, value in params.items() if name != 'token'
+        ))
+
+def _conditional_headers(cached: CachedResponse | None) -> dict | None:
+    """
+    Возвращает заголовки условного запроса по сохраненному ответу.
+    """
+    if cached is None:
+        return None
+    headers = {}
+    if cached.etag:
+        headers['If-None-Match'] = cached.etag
+    if cached.last_modified:
+        headers['If-Modified-Since'] = cached.last_modified
+    return headers
+
+async def _request_json(
+    url: str,
+    params: dict,
+    max_timeout: float | None = None,
+    conditional: bool = False,
+    model: Callable[[Any], Any] | None = None
+    ) -> ApiResponse:
+    """
+    Асинхронно выполняет GET-запрос через общую сессию и читает ответ как JSON.
+    Запрос ждет своей очереди в планировщике request_scheduler с приоритетом
+    текущей задачи и проходит через предохранитель эндпоинта: если эндпоинт
+    недоступен, сразу выбрасывается CircuitOpenError, иначе используется
+    адаптивный таймаут.
+
+    Для условного запроса сохраняется последний ответ с ETag или Last-Modified,
+    и следующий запрос отправляется с If-None-Match / If-Modified-Since: если
+    сервер отвечает 304, возвращаются сохраненные данные со статусом 200.
+
+    Тело ответа разбирается json_loads (orjson, если установлен), и, если
+    задан model, сразу преобразуется в запись, так что сохраненные ответы
+    и кеши не держат исходные словари JSON. Ответы с ошибкой API ('error')
+    не преобразуются и не сохраняются для условного запроса: их разбирает call_api.
+
+    :param url: Адрес эндпоинта API.
+    :param params: Параметры запроса.
+    :param max_timeout: Верхняя граница таймаута, включая ожидание очереди
+    (например, остаток времени запроса).
+    :param conditional: Выполнять условный запрос по сохраненным валидаторам.
+    :param model: Функция, создающая запись из разобранного JSON (см. src.utils.models).
+    :return: Статус ответа и данные JSON или запись.
+    :raises CircuitOpenError: Если предохранитель эндпоинта разомкнут.
+    :raises TimeoutError: Если запрос не дождался очереди или ответа.
+    """
+    breaker = api_breakers.get(url)
+    if breaker.state == OPEN:
+        # Недоступный эндпоинт отклоняется сразу, не занимая место в очереди
+        breaker.before_call()
+    cache_key = (url, _params_key(params))
+    cached = conditional_responses.get(cache_key) if conditional else None
+    queued = time.monotonic()
+    async with request_scheduler.slot(url, timeout=max_timeout):
+        breaker.before_call()
+        timeout = breaker.timeout()
+        if max_timeout is not None:
+            timeout = min(timeout, max_timeout - (time.monotonic() - queued))
+        session = await get_session()
+        started = time.monotonic()
+        try:
+            async with session.get(
+                url,
+                params=params,
+                headers=_conditional_headers(cached),
+                timeout=aiohttp.ClientTimeout(total=timeout)
+            ) as response:
+                if cached is not None:
+                    transfer_stats.record_revalidation(response.status == 304, cached.size)
+                if response.status == 304 and cached is not None:
+                    result = ApiResponse(200, cached.data)
+                elif response.status == 200:
+                    body = await response.read()
+                    transfer_stats.record_response(response, len(body))
+                    data = json_loads(body)
+                    api_error = isinstance(data, dict) and 'error' in data
+                    if model is not None and not api_error:
+                        data = model(data)
+                    result = ApiResponse(response.status, data)
+                    etag = response.headers.get('ETag')
+                    last_modified = response.headers.get('Last-Modified')
+                    if conditional and not api_error and (etag or last_modified):
+                        conditional_responses[cache_key] = CachedResponse(
+                            etag, last_modified, result.data, len(body)
+                            )
+                else:
+                    result = ApiResponse(response.status, None)
+        except Exception:
+            # Любая ошибка, включая ошибку разбора ответа в model, учитывается
+            # предохранителем, иначе пробный запрос так и остался бы занятым
+            breaker.record_failure()
+            raise
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+    if result.status >= 500:
+        breaker.record_failure()
+    else:
+        breaker.record_success(time.monotonic() - started)
+    return result
+
+async def fetch_json(
+    url: str,
+    params: dict,
+    max_timeout: float | None = None,
+    conditional: bool = False,
+    model: Callable[[Any], Any] | None = None
+    ) -> ApiResponse:
+    """
+    Асинхронно выполняет GET-запрос к API, объединяя одинаковые одновременные запросы.
+    Запросы с тем же адресом и параметрами (без учета токена), отправленные,
+    пока первый еще выполняется, получают его результат без нового запроса.
+    Фоновые запросы объединяются только с фоновыми, чтобы запрос пользователя
+    не ждал в очереди фонового запроса.
+
+    :param url: Адрес эндпоинта API.
+    :param params: Параметры запроса.
+    :param max_timeout: Верхняя граница таймаута запроса в секундах.
+    :param conditional: Выполнять условный запрос (см. _request_json).
+    :param model: Функция, создающая запись из разобранного JSON (см. _request_json).
+    :return: Статус ответа и данные JSON или запись.
+    """
+    key = (url, request_priority.get() == Priority.BACKGROUND, _params_key(params))
+    return await api_single_flight.do(
+        key, lambda: _request_json(url, params, max_timeout, conditional, model), label=url
+        )
+
+def is_auth_failure(response: ApiResponse) -> bool:
+    """
+    Проверяет, отклонен ли запрос из-за недействительного токена авторизации.
+    API сообщает об этом статусом 401/403 или полем 'error' в ответе.
+
+    :param response: Результат запроса к API.
+    :return: True, если токен нужно получить заново.
+    """
+    if response.status in AUTH_FAILURE_STATUSES:
+        return True
+    if isinstance(response.data, dict) and 'error' in response.data:
+        error_text = str(response.data['error']).lower()
+        return any(marker in error_text for marker in AUTH_ERROR_MARKERS)
+    return False
+
+def backoff_delay(attempt: int) -> float:
+    """
+    Возвращает паузу перед повтором запроса: экспоненциальный рост
+    с полным случайным разбросом (full jitter).
+
+    :param attempt: Номер неудачной попытки, начиная с 0.
+    :return: Пауза в секундах.
+    """
+    cap = min(config.API_RETRY_BACKOFF_MAX, config.API_RETRY_BACKOFF_BASE * 2 ** attempt)
+    return random.uniform(0, cap)
+
+async def call_api(
+    url: str,
+    params: dict,
+    idempotent: bool = True,
+    conditional: bool = False,
+    model: Callable[[Any], Any] | None = None
+    ) -> ApiResponse:
+    """
+    Асинхронно выполняет запрос к API с повторами и повторной авторизацией.
+
+    Временные ошибки (таймаут, ошибка соединения, статусы RETRY_STATUSES)
+    повторяются до API_RETRY_ATTEMPTS раз с экспоненциальной паузой. Для
+    неидемпотентных запросов повторяется только ошибка установки соединения,
+    когда запрос точно не был отправлен. Если токен отклонен, он удаляется
+    из кеша, запрашивается новый (один запрос на все ожидающие вызовы)
+    и запрос повторяется с новым токеном. Остальные ответы с полем 'error'
+    возвращаются со статусом API_ERROR_STATUS и без данных, поэтому словарь
+    ошибки не попадает туда, где ожидается запись, и в кеши. Все попытки
+    укладываются в общий срок API_REQUEST_DEADLINE. При недоступном эндпоинте
+    (CircuitOpenError) повторы не выполняются.
+
+    :param url: Адрес эндпоинта API.
+    :param params: Параметры запроса, включая 'token'.
+    :param idempotent: Можно ли безопасно повторять запрос.
+    :param conditional: Выполнять условный запрос по ETag / Last-Modified
+    предыдущего ответа (см. _request_json).
+    :param model: Функция, создающая запись из разобранного JSON (см. _request_json).
+    :return: Статус ответа и данные JSON или запись.
+    Если токен так и не принят, статус 401 и None, если API вернул
+    ошибку, статус API_ERROR_STATUS и None.
+    """
+    deadline = time.monotonic() + config.API_REQUEST_DEADLINE
+    attempt = 0
+    reauthorized = False
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"Истек срок запроса к {url}")
+        try:
+            response = await fetch_json(
+                url, params, max_timeout=remaining, conditional=conditional, model=model
+                )
+        except aiohttp.ClientConnectorError as e:
+            error = e
+        except (TimeoutError, aiohttp.ClientError) as e:
+            if not idempotent:
+                raise
+            error = e
+        else:
+            if is_auth_failure(response):
+                if reauthorized:
+                    logger.error("Токен отклонен повторно при запросе к %s", url)
+                    return ApiResponse(AUTH_FAILURE_STATUSES[0], None)
+                logger.warning("Токен отклонен при запросе к %s, выполняется авторизация", url)
+                token = await _reauthorize(params.get('token'))
+                if token is None:
+                    return ApiResponse(AUTH_FAILURE_STATUSES[0], None)
+                params = {**params, 'token': token}
+                reauthorized = True
+                continue
+            if isinstance(response.data, dict) and 'error' in response.data:
+                logger.warning(
+                    "API вернул ошибку при запросе к %s: %s", url, response.data['error']
+                    )
+                return ApiResponse(API_ERROR_STATUS, None)
+            if response.status not in RETRY_STATUSES or not idempotent:
+                return response
+            error = None
+
+        attempt += 1
+        delay = backoff_delay(attempt - 1)
+        if attempt >= config.API_RETRY_ATTEMPTS or time.monotonic() + delay >= deadline:
+            if error is not None:
+                raise error
+            return response
+        logger.warning(
+            "Повтор запроса к %s (попытка %s) через %.2f с. после ошибки: %s",
+            url, attempt + 1, delay, error if error is not None else response.status
+            )
+        await asyncio.sleep(delay)
+
+async def _login() -> str | None:
     """
-    async with cache_lock:
-        token = cache.get('token')
-        if token is not None:
-            return token
+    Асинхронно выполняет запрос авторизации к серверу и сохраняет токен в кеш.
 
+    :return: Токен авторизации, полученный от сервера, или None при ошибке сети.
+    """
+    logger.info("Выполнение функции _login, запрос нового токена.")
+    breaker = api_breakers.get(config.URL_API_LOGIN)
+    # Авторизация нужна всем запросам, поэтому выполняется с наивысшим приоритетом
+    async with request_scheduler.slot(config.URL_API_LOGIN, Priority.INTERACTIVE):
+        try:
+            breaker.before_call()
+        except CircuitOpenError as e:
+            logger.error("В функции _login запрос не выполнен: %s", e)
+            return None
+        session = await get_session()
+        started = time.monotonic()
         try:
-            response = requests.post(
+            async with session.post(
                 config.URL_API_LOGIN,
                 data={
                     'username': config.USERNAME_API,
                     'key': config.KEY_API
                 },
-                timeout=30
-            )
-            response_json = response.json()
-            if 'token' in response_json:
-                logger.info("В функции get_token Токен получен.")
-                cache['token'] = response_json['token']
-                return response_json['token']
-            else:
-                logger.error("В функции get_token Токен не получен.")
-                raise KeyError("В ответе на запрос авторизации нет поля 'token'")
+                timeout=aiohttp.ClientTimeout(total=breaker.timeout())
+            ) as response:
+                status = response.status
+                response_json = await response.json(content_type=None)
         except TimeoutError:
-            logger.error("В функции get_token запрос превысил таймаут")
+            breaker.record_failure()
+            logger.error("В функции _login запрос превысил таймаут")
             return None
+        except aiohttp.ClientError as e:
+            breaker.record_failure()
+            logger.error("В функции _login произошла ошибка запроса: %s", e)
+            return None
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+    if status >= 500:
+        breaker.record_failure()
+        logger.error("В функции _login сервер вернул ошибку %s", status)
+        return None
+    breaker.record_success(time.monotonic() - started)
+
+    if 'token' in response_json:
+        logger.info("В функции _login Токен получен.")
+        cache['token'] = response_json['token']
+        return response_json['token']
+    logger.error("В функции _login Токен не получен.")
+    raise KeyError("В ответе на запрос авторизации нет поля 'token'")
+
+async def refresh_token() -> str | None:
+    """
+    Асинхронно запрашивает новый токен авторизации.
+    Если запрос авторизации уже выполняется, ожидает его результат,
+    а не отправляет новый, поэтому одновременные вызовы выполняют один запрос.
+
+    :return: Токен авторизации, полученный от сервера.
+    """
+    global _login_task  # pylint: disable=global-statement
+    if _login_task is None or _login_task.done():
+        _login_task = asyncio.create_task(_login())
+    # shield не дает отмене одного из ожидающих прервать общий запрос
+    return await asyncio.shield(_login_task)
+
+async def _reauthorize(rejected_token: str | None) -> str | None:
+    """
+    Асинхронно заменяет отклоненный сервером токен новым.
+    Если токен в кеше уже обновлен другим вызовом, используется он.
 
-async def connect_search(text_p: str) -> dict:
+    :param rejected_token: Токен, который отклонил сервер.
+    :return: Новый токен авторизации или None, если авторизация не удалась.
+    """
+    token = cache.get('token')
+    if token is not None and token != rejected_token:
+        return token
+    cache.pop('token', None)
+    try:
+        return await refresh_token()
+    except KeyError as e:
+        logger.error("В функции _reauthorize токен не получен: %s", e)
+        return None
+
+async def get_token() -> str:
+    """
+    Асинхронно получает токен авторизации от сервера.
+    Если токен получен ранее, использует кеш.
+
+    :return: Токен авторизации, полученный от сервера.
+    """
+    token = cache.get('token')
+    if token is not None:
+        return token
+    return await refresh_token()
+
+async def _token_refresher() -> None:
+    """
+    Фоновая задача, которая обновляет токен до истечения его времени жизни в кеше,
+    чтобы запросы пользователей не ждали авторизации.
+    """
+    while True:
+        try:
+            token = await refresh_token()
+        except KeyError as e:
+            logger.error("В функции _token_refresher токен не обновлен: %s", e)
+            token = None
+        if token is None:
+            delay = config.API_TOKEN_RETRY_INTERVAL
+        else:
+            delay = max(config.API_TOKEN_TTL - config.API_TOKEN_REFRESH_MARGIN, 1)
+        logger.info("Следующее обновление токена через %s с.", delay)
+        await asyncio.sleep(delay)
+
+def start_token_refresher() -> None:
+    """
+    Запускает фоновое обновление токена авторизации.
+    """
+    global _token_refresher_task  # pylint: disable=global-statement
+    if _token_refresher_task is None or _token_refresher_task.done():
+        _token_refresher_task = asyncio.create_task(_token_refresher())
+        logger.info("Фоновое обновление токена запущено")
+
+async def stop_token_refresher() -> None:
+    """
+    Асинхронно останавливает фоновое обновление токена авторизации.
+    """
+    global _token_refresher_task  # pylint: disable=global-statement
+    if _token_refresher_task is not None:
+        _token_refresher_task.cancel()
+        try:
+            await _token_refresher_task
+        except asyncio.CancelledError:
+            pass
+        _token_refresher_task = None
+        logger.info("Фоновое обновление токена остановлено")
+
+async def get_search_results(text_p: str) -> list[SearchHit] | None:
     """
     Асинхронно выполняет поиск продуктов на сервере.
+    Краткое описание извлекается только для первых SHOWN_SEARCH_RESULTS товаров,
+    у остальных поле description равно None.
 
     :param text_p: Текст для поиска продуктов.
-    :return: Словарь с найденными продуктами и их данными.
+    :return: Список найденных продуктов в порядке ответа API
+    или None, если ничего не найдено или запрос не выполнен.
     """
-    logger.info("Выполнение функции connect_search.")
+    logger.info("Выполнение функции get_search_results.")
     token =  await get_token()
     if token is None:
         return None
     search_url = config.URL_API_SEARCH
     params = {'search': text_p, 'token': token}
-    await asyncio.sleep(0)
     try:
-        response = requests.get(search_url, params=params, timeout=30)
-        if response.status_code == 200:
-            search_data = response.json()
-            logger.info("В функции connect_search response.status_code == 200, данные получены")
+        response = await call_api(search_url, params)
+        if response.status == 200:
+            search_data = response.data
+            logger.info("В функции get_search_results response.status == 200, данные получены")
         else:
             logger.warning(
-                "В функции connect_search response.status_code != 200, "
+                "В функции get_search_results response.status != 200, "
                 "данные НЕ получены"
                 )
             return None
     except TimeoutError:
-        logger.error("В функции connect_search запрос превысил таймаут")
+        logger.error("В функции get_search_results запрос превысил таймаут")
+        return None
+    except aiohttp.ClientError as e:
+        logger.error("В функции get_search_results произошла ошибка запроса: %s", e)
         return None
 
-    current_product = {}
-    count = 0
-    sentence_pattern = r"[^.!?]*[.!?]"
+    current_product = []
     await asyncio.sleep(0)
-    for value in search_data.values():
+    for count, value in enumerate(search_data.values()):
         product_id = value.get('product_id')
-        name = value.get('name')
-        image = value.get('image')
-        description = value.get('description')
-        product_url = value.get('url')
-        if description is not None:
-            soup = BeautifulSoup(description, 'html.parser')
-            soup = soup.find('div').text
-            match = re.match(sentence_pattern, soup)
-            if match:
-                clean_description = match.group(0)
-            else:
-                clean_description = "Описания нет."
+        if count < SHOWN_SEARCH_RESULTS:
+            clean_description = description_cache.get(product_id, value.get('description'))
         else:
-            clean_description = "Описания нет."
-
-        current_product[f'product_{count}'] = {
-            'product_id': product_id,
-            'name': name,
-            'image': image,
-            'description': clean_description,
-            'url': product_url,
-        }
-        count += 1
+            # Описание товаров, которые не показываются пользователю, не разбирается
+            clean_description = None
+        current_product.append(SearchHit(
+            product_id=product_id,
+            name=value.get('name'),
+            image=value.get('image'),
+            description=clean_description,
+            url=value.get('url'),
+        ))
     logger.info(
-        "В функции connect_search response.status_code == 200, "
+        "В функции get_search_results response.status_code == 200, "
         "данные получены и функция успешно завершилась"
         )
-    return current_product
+    return current_product or None
+
+async def search_local(text_p: str) -> list[SearchHit] | None:
+    """
+    Асинхронно выполняет поиск продуктов по локальной копии каталога (SQLite FTS5).
+
+    :param text_p: Текст для поиска продуктов.
+    :return: Список найденных продуктов в формате get_search_results
+    или None, если в локальном каталоге ничего не найдено или каталог
+    не синхронизировался дольше CATALOG_MAX_AGE секунд.
+    """
+    last_sync = await get_catalog_meta('last_sync')
+    if last_sync is None or time.time() - float(last_sync) > config.CATALOG_MAX_AGE:
+        logger.warning("В функции search_local локальный каталог пуст или устарел")
+        return None
+    products = await search_catalog(normalize_query(text_p, stemming=False))
+    if not products:
+        return None
+    return [
+        SearchHit(
+            product_id=str(product['product_id']),
+            name=product['name'],
+            image=product['image'],
+            description=product['description'],
+            url=product['url'],
+        )
+        for product in products
+    ]
 
-async def get_product_info(token: str, product_id: str) -> dict | None:
+def _prewarm_search_images(search_results: list[SearchHit] | None) -> None:
+    """
+    Запускает фоновую проверку изображений товаров, которые будут показаны
+    пользователю из результатов поиска, если включен IMAGE_CACHE_PREWARM.
+    Для фоновых поисков (прогрев, обновление кеша) проверка не запускается.
+
+    :param search_results: Результаты поиска.
+    """
+    if (
+        not config.IMAGE_CACHE_PREWARM
+        or not search_results
+        or request_priority.get() == Priority.BACKGROUND
+        ):
+        return
+    prewarm_image_cache([
+        f'{config.IMAGE_URL}{product.image}'
+        for product in search_results[:SHOWN_SEARCH_RESULTS]
+        if product.image
+    ])
+
+async def connect_search(text_p: str) -> list[SearchHit] | None:
+    """
+    Асинхронно выполняет поиск продуктов и запускает фоновую проверку
+    изображений найденных товаров (см. _search_with_cache).
+
+    :param text_p: Текст для поиска продуктов.
+    :return: Список найденных продуктов.
+    :raises CircuitOpenError: Если API поиска недоступен и результата в кеше нет.
+    """
+    search_results = await _search_with_cache(text_p)
+    _prewarm_search_images(search_results)
+    return search_results
+
+async def _search_with_cache(text_p: str) -> list[SearchHit] | None:
+    """
+    Асинхронно выполняет поиск продуктов с использованием кеша search_cache.
+    Если SEARCH_BACKEND = 'local', поиск сначала выполняется по локальной копии
+    каталога, а к API обращается, только если локально ничего не найдено
+    или копия устарела.
+    Ключом кеша служит нормализованный запрос. Свежий результат возвращается
+    из кеша, устаревший тоже возвращается сразу, а его обновление запускается в фоне.
+    Если API поиска недоступен, возвращается последний сохраненный результат.
+
+    :param text_p: Текст для поиска продуктов.
+    :return: Список найденных продуктов.
+    :raises CircuitOpenError: Если API поиска недоступен и результата в кеше нет.
+    """
+    logger.info("Выполнение функции connect_search.")
+    if config.SEARCH_BACKEND == 'local':
+        search_results = await search_local(text_p)
+        if search_results is not None:
+            logger.info("В функции connect_search результат получен из локального каталога")
+            return search_results
+    key = normalize_query(text_p)
+    cached, state = search_cache.lookup(key)
+    if state == FRESH:
+        logger.info("В функции connect_search результат по запросу '%s' взят из кеша", key)
+        return cached
+    if state == STALE:
+        logger.info(
+            "В функции connect_search устаревший результат по запросу '%s' взят из кеша, "
+            "запущено фоновое обновление", key
+            )
+        search_cache.refresh_in_background(
+            key, lambda: run_with_priority(Priority.BACKGROUND, get_search_results(text_p))
+            )
+        return cached
+
+    try:
+        search_results = await get_search_results(text_p)
+    except CircuitOpenError:
+        search_results = search_cache.get_last_known(key)
+        if search_results is None:
+            raise
+        logger.warning(
+            "В функции connect_search API недоступен, по запросу '%s' "
+            "возвращен последний сохраненный результат", key
+            )
+        return search_results
+    if search_results is not None:
+        search_cache.set(key, search_results)
+    return search_results
+
+async def get_product_info(token: str, product_id: str) -> ProductInfo | None:
     """
     Асинхронно получает информацию о продукте с сервера.
+    Повторная загрузка выполняется условным запросом: если данные
+    не изменились, сервер отвечает 304 без тела.
 
     :param token: Токен авторизации для доступа к API.
     :param product_id: Идентификатор продукта.
-    :return: Информация о продукте в виде словаря, если запрос выполнен успешно, иначе None.
+    :return: Информация о продукте, если запрос выполнен успешно и товар найден, иначе None.
     """
     logger.info(
         "Выполнение функции get_product_info"
@@ -160,44 +700,63 @@ async def get_product_info(token: str, product_id: str) -> dict | None:
         'token': token
     }
     await asyncio.sleep(0)
-    async with aiohttp.ClientSession() as session:
+    logger.info(
+        "Выполнение запроса в функции get_product_info "
+        "c полученными данными %s.", product_id
+        )
+    response = await call_api(url, params, conditional=True, model=ProductInfo.from_api)
+    if response.status == 200:
+        product_info = response.data
         logger.info(
-            "Выполнение запроса в функции get_product_info "
-            "c полученными данными %s.", product_id
+            "Запрос выполнен успешно %s, получены данные product_info "
+            "в функции get_product_info c полученными данными %s.",
+            response.status, product_id
             )
-        async with session.get(url, params=params) as response:
-            if response.status == 200:
-                product_info = await response.json()
-                logger.info(
-                    "Запрос выполнен успешно %s, получены данные product_info "
-                    "в функции get_product_info c полученными данными %s.",
-                    response.status, product_id
-                    )
-                return product_info
-            else:
-                logger.error(
-                    "Запрос не выполнен  в функции get_product_info - %s.",
-                    response.status
-                    )
-                return None
+        return product_info
+    else:
+        logger.error(
+            "Запрос не выполнен  в функции get_product_info - %s.",
+            response.status
+            )
+        return None
 
-async def connect_product_to_id(product_id: str) -> dict | None:
+async def connect_product_to_id(product_id: str) -> ProductInfo | None:
     """
     Асинхронно получает информацию о продукте по его идентификатору.
+    Информация о продукте берется из кеша product_cache, а при промахе запрашивается у API.
+    Если API недоступен, возвращается последняя сохраненная информация о продукте.
 
     :param product_id: Идентификатор продукта.
-    :return: Информация о продукте в виде словаря, если запрос выполнен успешно, иначе None.
+    :return: Информация о продукте, если запрос выполнен успешно, иначе None.
+    :raises CircuitOpenError: Если API недоступен и информации в кеше нет.
     """
     logger.info(
         "Выполнение функции connect_product_to_id"
         "c полученными данными %s.", product_id
         )
+    cached = product_cache.get_info(product_id)
+    if cached is not None:
+        logger.info(
+            "Данные взяты из кеша в функции connect_product_to_id "
+            "c полученными данными %s.", product_id
+            )
+        return cached
     token = await get_token()
     logger.info(
         "Получение токена в функции connect_product_to_id "
         "c полученными данными %s.", product_id
         )
-    product_info = await get_product_info(token, product_id)
+    try:
+        product_info = await get_product_info(token, product_id)
+    except CircuitOpenError:
+        product_info = product_cache.get_last_known_info(product_id)
+        if product_info is None:
+            raise
+        logger.warning(
+            "В функции connect_product_to_id API недоступен, для товара %s "
+            "возвращена последняя сохраненная информация", product_id
+            )
+        return product_info
     logger.info(
         "Получение данных product_info в функции "
         "connect_product_to_id c полученными данными %s.",
@@ -209,6 +768,7 @@ async def connect_product_to_id(product_id: str) -> dict | None:
             "connect_product_to_id c полученными данными %s.",
             product_id
             )
+        product_cache.set_info(product_id, product_info)
         return product_info
     else:
         logger.error(
@@ -218,13 +778,18 @@ async def connect_product_to_id(product_id: str) -> dict | None:
             )
         return None
 
-async def get_product_attributes(token: str, product_id: str) -> dict | None:
+async def get_product_attributes(
+    token: str,
+    product_id: str
+    ) -> tuple[AttributeGroup, ...] | None:
     """
     Асинхронно получает атрибуты продукта с сервера.
+    Повторная загрузка выполняется условным запросом: если данные
+    не изменились, сервер отвечает 304 без тела.
 
     :param token: Токен авторизации для доступа к API.
     :param product_id: Идентификатор продукта.
-    :return: Атрибуты продукта в виде словаря, если запрос выполнен успешно, иначе None.
+    :return: Группы атрибутов продукта, если запрос выполнен успешно, иначе None.
     """
     logger.info(
         "Выполнение функции get_product_attributes "
@@ -236,44 +801,65 @@ async def get_product_attributes(token: str, product_id: str) -> dict | None:
         'token': token
     }
     await asyncio.sleep(0)
-    async with aiohttp.ClientSession() as session:
+    logger.info(
+        "Выполнение запроса в функции get_product_attributes "
+        "c полученными данными %s.", product_id
+        )
+    response = await call_api(url, params, conditional=True, model=parse_attributes)
+    if response.status == 200:
+        product_info = response.data
         logger.info(
-            "Выполнение запроса в функции get_product_attributes "
-            "c полученными данными %s.", product_id
+            "Запрос выполнен успешно %s, получены данные product_info "
+            "в функции get_product_attributes c полученными данными %s.",
+            response.status, product_id
             )
-        async with session.get(url, params=params) as response:
-            if response.status == 200:
-                product_info = await response.json()
-                logger.info(
-                    "Запрос выполнен успешно %s, получены данные product_info "
-                    "в функции get_product_attributes c полученными данными %s.",
-                    response.status, product_id
-                    )
-                return product_info
-            else:
-                logger.error(
-                    "Запрос не выполнен в функции get_product_attributes %s.",
-                    response.status
-                    )
-                return None
+        return product_info
+    else:
+        logger.error(
+            "Запрос не выполнен в функции get_product_attributes %s.",
+            response.status
+            )
+        return None
 
-async def connect_product_attributes_to_id(product_id: str) -> dict | None:
+async def connect_product_attributes_to_id(
+    product_id: str
+    ) -> tuple[AttributeGroup, ...] | None:
     """
     Асинхронно получает атрибуты продукта по его идентификатору.
+    Атрибуты продукта берутся из кеша product_cache, а при промахе запрашиваются у API.
+    Если API недоступен, возвращаются последние сохраненные атрибуты продукта.
 
     :param product_id: Идентификатор продукта.
-    :return: Атрибуты продукта в виде словаря, если запрос выполнен успешно, иначе None.
+    :return: Группы атрибутов продукта, если запрос выполнен успешно, иначе None.
+    :raises CircuitOpenError: Если API недоступен и атрибутов в кеше нет.
     """
     logger.info(
         "Выполнение функции connect_product_attributes_to_id "
         "c полученными данными %s.", product_id
         )
+    cached = product_cache.get_attributes(product_id)
+    if cached is not None:
+        logger.info(
+            "Данные взяты из кеша в функции connect_product_attributes_to_id "
+            "c полученными данными %s.", product_id
+            )
+        return cached
     token = await get_token()
     logger.info(
         "Получение токена в функции connect_product_attributes_to_id "
         "c полученными данными %s.", product_id
         )
-    product_info = await get_product_attributes(token, product_id)
+    try:
+        product_info = await get_product_attributes(token, product_id)
+    except CircuitOpenError:
+        product_info = product_cache.get_last_known_attributes(product_id)
+        if product_info is None:
+            raise
+        logger.warning(
+            "В функции connect_product_attributes_to_id API недоступен, для товара %s "
+            "возвращены последние сохраненные атрибуты", product_id
+            )
+        return product_info
     logger.info(
         "Получение данных product_info в функции "
         "connect_product_attributes_to_id c полученными данными %s.",
@@ -285,6 +871,7 @@ async def connect_product_attributes_to_id(product_id: str) -> dict | None:
             "connect_product_attributes_to_id c полученными данными %s.",
             product_id
             )
+        product_cache.set_attributes(product_id, product_info)
         return product_info
     else:
         logger.error(
@@ -294,108 +881,103 @@ async def connect_product_attributes_to_id(product_id: str) -> dict | None:
             )
         return None
 
-async def get_user_by_card_code(number: str) -> dict | None:
+async def _fetch_customer(number: str) -> CustomerCard | None:
     """
-    Асинхронно получает информацию о пользователе по номеру карты.
+    Асинхронно запрашивает данные покупателя по номеру карты в CRM
+    и разбирает их в запись CustomerCard.
 
     :param number: Номер карты.
-    :return: Информация о пользователе в виде словаря, 
-    если запрос выполнен успешно и пользователь найден, иначе None.
+    :return: Запись покупателя, если запрос выполнен успешно и покупатель найден, иначе None.
     """
-    logger.info(
-        "Выполнение функции get_user_by_card_code c полученными данными %s.",
-        number
-        )
     url = config.URL_API_CUSTOMER_BY_CARD
     params = {
         'card': number,
         'token': await get_token()
     }
-    await asyncio.sleep(0)
-    async with aiohttp.ClientSession() as session:
-        logger.info(
-            "Выполнение запроса в функции get_user_by_card_code "
-            "c полученными данными %s.", number
+    logger.info(
+        "Выполнение запроса в функции get_customer_by_card c полученными данными %s.",
+        number
+        )
+    response = await call_api(url, params)
+    if response.status != 200:
+        logger.error(
+            "Ошибка при получении данных в функции get_customer_by_card - %s",
+            response.status
             )
-        async with session.get(url, params=params) as response:
-            if response.status == 200:
-                info = await response.json()
-                logger.info(
-                    "Запрос выполнен успешно %s, получены данные info "
-                    "в функции get_user_by_card_code c полученными данными %s.",
-                    response.status, number
-                    )
-                if list(info.values())[0] == 'Customer not found':
-                    logger.error(
-                        "По успешному запросу %s в функции get_user_by_card_code "
-                        "не получено данных %s", response.status, list(info.values())[0]
-                        )
-                    return None
-                else:
-                    logger.info(
-                        "По успешному запросу %s в функции get_user_by_card_code "
-                        "получены данные info", response.status
-                        )
-                    return info
-            else:
-                logger.error(
-                    "Ошибка при получении данных в функции get_user_by_card_code - %s",
-                    response.status
-                    )
-                return None
+        return None
+    info = response.data
+    if not info or list(info.values())[0] == 'Customer not found':
+        logger.error(
+            "По успешному запросу %s в функции get_customer_by_card "
+            "не получено данных %s", response.status, info
+            )
+        return None
+    logger.info(
+        "По успешному запросу %s в функции get_customer_by_card получены данные info",
+        response.status
+        )
+    return CustomerCard.from_api(number, info)
 
-async def get_card_field_two(number: str) -> dict | None:
+async def get_customer_by_card(number: str) -> CustomerCard | None:
     """
-    Асинхронно получает информацию о пользователе по номеру карты и извлекает определенное поле.
+    Асинхронно получает данные покупателя по номеру карты.
+
+    Найденные покупатели хранятся в кеше customer_cache с коротким временем
+    жизни, одновременные запросы одной карты выполняют один запрос к CRM.
+    Ненайденные карты не кешируются, чтобы только что выданная карта
+    сразу находилась при регистрации. Запрос к CRM выполняется с приоритетом
+    проверки карт (Priority.CARD).
 
     :param number: Номер карты.
-    :return: Значение поля '2' из информации о пользователе,
-    если запрос выполнен успешно и пользователь найден, иначе None.
+    :return: Запись покупателя, если покупатель найден, иначе None.
     """
     logger.info(
-        "Выполнение функции get_card_field_two c полученными данными %s.",
+        "Выполнение функции get_customer_by_card c полученными данными %s.",
         number
         )
-    url = config.URL_API_CUSTOMER_BY_CARD
-    params = {
-        'card': number,
-        'token': await get_token()
-    }
-    await asyncio.sleep(0)
-    async with aiohttp.ClientSession() as session:
-        logger.info(
-            "Выполнение запроса в функции get_card_field_two c полученными данными %s.",
-            number
-            )
-        async with session.get(url, params=params) as response:
-            if response.status == 200:
-                info = await response.json()
-                logger.info(
-                    "Запрос выполнен успешно %s, получены данные info в функции get_card_field_two "
-                    "c полученными данными %s.", response.status, number
-                    )
-                if list(info.values())[0] == 'Customer not found':
-                    logger.error(
-                        "По успешному запросу %s в функции get_card_field_two "
-                        "не получено данных %s", response.status, list(info.values())[0]
-                        )
-                    return None
-                else:
-                    info = info['custom_field']
-                    info = json.loads(info)
-                    logger.info(
-                        "По успешному запросу %s  в функции get_card_field_two получены данные %s",
-                        response.status, info['2']
-                        )
-                    return info['2']
-            else:
-                logger.error(
-                    "Ошибка при получении данныхв функции get_card_field_two - %s",
-                    response.status
-                    )
-                return None
+    customer = customer_cache.get(number)
+    if customer is not None:
+        logger.info("В функции get_customer_by_card карта %s взята из кеша", number)
+        return customer
+    customer = await api_single_flight.do(
+        ('customer', number),
+        lambda: run_with_priority(Priority.CARD, _fetch_customer(number)),
+        label='customer'
+        )
+    if customer is not None:
+        customer_cache.set(customer)
+    return customer
+
+def invalidate_customer(number: str) -> None:
+    """
+    Сбрасывает кешированные данные покупателя по номеру карты.
+
+    :param number: Номер карты.
+    """
+    logger.info("Сброс кеша покупателя по карте %s", number)
+    customer_cache.invalidate(number)
 
-async def get_product_quatity(product_id: str) -> dict | None:
+async def get_user_by_card_code(number: str) -> CustomerCard | None:
+    """
+    Асинхронно получает информацию о пользователе по номеру карты.
+
+    :param number: Номер карты.
+    :return: Запись покупателя, если запрос выполнен успешно и пользователь найден, иначе None.
+    """
+    return await get_customer_by_card(number)
+
+async def get_card_field_two(number: str) -> str | None:
+    """
+    Асинхронно получает тип карты (поле '2') покупателя по номеру карты.
+
+    :param number: Номер карты.
+    :return: Значение поля '2' из информации о пользователе,
+    если запрос выполнен успешно и пользователь найден, иначе None.
+    """
+    customer = await get_customer_by_card(number)
+    return customer.card_type if customer is not None else None
+
+async def get_product_quatity(product_id: str) -> StoreQuantities | None:
     """
     Асинхронно получает информацию о количестве товара по его идентификатору.
 
@@ -407,8 +989,11 @@ async def get_product_quatity(product_id: str) -> dict | None:
     - product_id (str): Идентификатор товара, для которого нужно получить информацию о количестве.
 
     Возвращает:
-    - dict | None: Словарь с информацией о количестве товара, если запрос был успешным (статус 200).
-                  Возвращает None, если запрос завершился с ошибкой.
+    - StoreQuantities | None: Количество товара по магазинам, если запрос был успешным
+                  (статус 200). Возвращает None, если запрос завершился с ошибкой.
+
+    Успешный ответ хранится в кеше product_cache в течение PRODUCT_QUANTITY_TTL секунд.
+    Если API недоступен, возвращается последнее сохраненное количество товара.
 
     Логирование:
     - Информационное сообщение при начале выполнения функции.
@@ -421,6 +1006,10 @@ async def get_product_quatity(product_id: str) -> dict | None:
         "Начало выполнения функции get_product_quatity c полученными данными %s.",
         product_id
         )
+    product_info = product_cache.get_quantity(product_id)
+    if product_info is not None:
+        logger.info("В функции get_product_quatity товар %s взят из кеша", product_id)
+        return product_info
 
     url = config.URL_API_QUATITY_BY_PRODUCT_ID
     token = await get_token()
@@ -428,22 +1017,33 @@ async def get_product_quatity(product_id: str) -> dict | None:
         'id': product_id,
         'token': token
     }
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, params=params) as response:
-            logger.info(
-                "Выполнение запроса в функции get_product_quatity c полученными данными %s.",
-                product_id
-                )
-            if response.status == 200:
-                logger.info(
-                    "В функции get_product_quatity c полученными данными %s "
-                    "response.status == 200", product_id
-                    )
-                product_info = await response.json()
-                return product_info
-            else:
-                logger.error(
-                    "Ошибка при получении данныхв функции get_product_quatity - %s",
-                    response.status
-                    )
-                return None
+    try:
+        response = await call_api(url, params, model=StoreQuantities.from_api)
+    except CircuitOpenError:
+        product_info = product_cache.get_last_known_quantity(product_id)
+        if product_info is None:
+            raise
+        logger.warning(
+            "В функции get_product_quatity API недоступен, для товара %s "
+            "возвращено последнее сохраненное количество", product_id
+            )
+        return product_info
+    logger.info(
+        "Выполнение запроса в функции get_product_quatity c полученными данными %s.",
+        product_id
+        )
+    if response.status == 200:
+        logger.info(
+            "В функции get_product_quatity c полученными данными %s "
+            "response.status == 200", product_id
+            )
+        product_info = response.data
+        if product_info is not None:
+            product_cache.set_quantity(product_id, product_info)
+        return product_info
+    else:
+        logger.error(
+            "Ошибка при получении данныхв функции get_product_quatity - %s",
+            response.status
+            )
+        return None
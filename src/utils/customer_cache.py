@@ -0,0 +1,76 @@
+"""
+Модуль для кеширования данных покупателя по номеру дисконтной карты.
+Этот модуль предоставляет кеш записей CustomerCard (см. src.utils.models),
+в которых поля карты из JSON-поля 'custom_field' CRM уже разобраны,
+с коротким временем жизни, сбросом по номеру карты и счетчиками попаданий.
+"""
+
+from cachetools import TTLCache
+
+from configs import config
+from src.utils.models import CustomerCard
+
+
+class CustomerCache:
+    """
+    Кеш записей покупателей по номеру карты с коротким временем жизни.
+
+    :param maxsize: Максимальное количество карт в кеше.
+    :param ttl: Время жизни записи в секундах.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._customers = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, card_number: str) -> CustomerCard | None:
+        """
+        Возвращает запись покупателя из кеша.
+
+        :param card_number: Номер карты.
+        :return: Запись покупателя или None, если ее нет в кеше.
+        """
+        customer = self._customers.get(card_number)
+        if customer is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return customer
+
+    def set(self, customer: CustomerCard) -> None:
+        """
+        Сохраняет запись покупателя в кеш.
+
+        :param customer: Запись покупателя.
+        """
+        self._customers[customer.card_number] = customer
+
+    def invalidate(self, card_number: str) -> None:
+        """
+        Удаляет запись покупателя по номеру карты, чтобы следующий запрос
+        получил актуальные данные (например, баланс) из CRM.
+
+        :param card_number: Номер карты.
+        """
+        self._customers.pop(card_number, None)
+
+    def clear(self) -> None:
+        """
+        Очищает кеш.
+        """
+        self._customers.clear()
+
+    def stats(self) -> dict:
+        """
+        Возвращает счетчики попаданий и промахов.
+
+        :return: Словарь со статистикой кеша.
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._customers)}
+
+
+customer_cache = CustomerCache(
+    maxsize=config.CUSTOMER_CACHE_MAXSIZE,
+    ttl=config.CUSTOMER_CACHE_TTL,
+)
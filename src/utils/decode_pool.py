@@ -0,0 +1,227 @@
+"""
+Модуль пула процессов для распознавания штрихкодов на фото.
+Декодирование изображения и поиск штрихкода (OpenCV и pyzbar) занимают
+процессор на десятки миллисекунд и не должны выполняться в потоке цикла
+событий бота, иначе пачка фото задерживает ответы всем пользователям.
+Задачи выполняются в отдельных процессах, количество которых по умолчанию
+равно количеству ядер. Очередь ограничена: одновременно в пуле находится
+не больше DECODE_WORKERS + DECODE_QUEUE_SIZE задач, остальные ждут места
+не дольше DECODE_QUEUE_TIMEOUT и затем получают DecodeQueueFullError.
+Если процесс пула аварийно завершился (например, при ошибке в OpenCV или
+zbar), пул пересоздается, чтобы следующие фото распознавались без
+перезапуска бота.
+"""
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import logging
+from logging.handlers import RotatingFileHandler
+import multiprocessing
+import os
+import time
+from typing import Any, Callable
+
+from configs import config
+
+
+logging.basicConfig(level=logging.INFO)
+
+# Установка размера файла логов в 8 МБ
+MAX_BYTES = 8 * 1024 * 1024  # 8 МБ в байтах
+
+# Создание обработчика файлов с ограничением размера и ротацией
+file_handler = RotatingFileHandler(
+    "logs/decode_pool_log.log",
+    maxBytes=MAX_BYTES,  # Установка максимального размера файла логов
+    backupCount=30,  # Количество файлов логов, которые будут храниться
+    encoding="utf-8",
+)
+
+# Формат сообщений
+formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(formatter)
+
+# Добавление обработчика в логгер
+logger = logging.getLogger('decode_pool_logger')
+logger.addHandler(file_handler)
+
+
+class DecodeQueueFullError(Exception):
+    """
+    Задача не принята, потому что очередь распознавания заполнена.
+
+    :param waited: Сколько секунд задача ждала места в очереди.
+    """
+
+    def __init__(self, waited: float):
+        super().__init__(f"Очередь распознавания заполнена, ожидание {waited:.1f} с.")
+        self.waited = waited
+
+
+def _start_method() -> str:
+    """
+    Возвращает способ запуска процессов: fork, если он доступен (Linux),
+    иначе spawn.
+    """
+    return 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+class DecodePool:
+    """
+    Пул процессов с ограниченной очередью задач.
+
+    :param workers: Количество процессов, 0 - по количеству ядер процессора.
+    :param queue_size: Сколько задач может ждать свободного процесса.
+    :param queue_timeout: Сколько секунд задача может ждать места в очереди.
+    """
+
+    def __init__(self, workers: int, queue_size: int, queue_timeout: float):
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self._executor: ProcessPoolExecutor | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.restarts = 0
+        self.in_flight = 0
+        self.wait_time = 0.0
+        self.run_time = 0.0
+
+    @property
+    def started(self) -> bool:
+        """
+        Запущен ли пул.
+        """
+        return self._executor is not None
+
+    def start(self) -> None:
+        """
+        Запускает процессы пула. Вызывается до запуска других фоновых задач,
+        чтобы процессы создавались из однопоточного процесса бота.
+        """
+        if self._executor is not None:
+            return
+        self._executor = self._create_executor()
+        self._slots = asyncio.Semaphore(self.workers + self.queue_size)
+        logger.info(
+            "Пул распознавания запущен: процессов %s, очередь %s",
+            self.workers, self.queue_size
+            )
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        """
+        Создает пул процессов и сразу запускает процессы, а не при первом фото пользователя.
+
+        :return: Пул процессов.
+        """
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context(_start_method())
+        )
+        for _ in range(self.workers):
+            executor.submit(os.getpid)
+        return executor
+
+    def _restart(self, broken: ProcessPoolExecutor) -> None:
+        """
+        Пересоздает пул после аварийного завершения процесса. Задачи, выполнявшиеся
+        в сломанном пуле, получают BrokenProcessPool, поэтому пул пересоздается
+        один раз - той задачей, которая первой обнаружила ошибку.
+
+        :param broken: Сломанный пул процессов.
+        """
+        if self._executor is not broken:
+            return
+        broken.shutdown(wait=False, cancel_futures=True)
+        self._executor = self._create_executor()
+        self.restarts += 1
+        logger.error("Процесс пула распознавания аварийно завершился, пул пересоздан")
+
+    def shutdown(self) -> None:
+        """
+        Останавливает процессы пула, задачи в очереди отменяются.
+        """
+        if self._executor is None:
+            return
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._executor = None
+        self._slots = None
+        logger.info("Пул распознавания остановлен")
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Асинхронно выполняет функцию в процессе пула. Если пул не запущен,
+        он запускается при первом вызове.
+
+        :param func: Функция уровня модуля (передается в процесс по имени).
+        :param args: Аргументы функции.
+        :return: Результат функции.
+        :raises DecodeQueueFullError: Если место в очереди не освободилось за queue_timeout.
+        :raises BrokenProcessPool: Если процесс пула аварийно завершился во время задачи
+        (пул пересоздается для следующих задач).
+        """
+        if self._executor is None:
+            self.start()
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError as e:
+            self.rejected += 1
+            waited = time.perf_counter() - started
+            logger.warning(
+                "Задача %s отклонена: очередь заполнена (%s задач)",
+                func.__name__, self.in_flight
+                )
+            raise DecodeQueueFullError(waited) from e
+        self.submitted += 1
+        self.in_flight += 1
+        queued = time.perf_counter()
+        self.wait_time += queued - started
+        executor = self._executor
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(executor, func, *args)
+        except BrokenProcessPool:
+            self.failed += 1
+            self._restart(executor)
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.run_time += time.perf_counter() - queued
+            self._slots.release()
+        self.completed += 1
+        return result
+
+    def stats(self) -> dict:
+        """
+        Возвращает счетчики задач пула.
+
+        :return: Словарь со статистикой.
+        """
+        finished = self.completed + self.failed
+        return {
+            'workers': self.workers,
+            'queue_size': self.queue_size,
+            'in_flight': self.in_flight,
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'restarts': self.restarts,
+            'avg_wait_ms': self.wait_time / self.submitted * 1000 if self.submitted else 0.0,
+            'avg_run_ms': self.run_time / finished * 1000 if finished else 0.0,
+        }
+
+
+decode_pool = DecodePool(
+    workers=config.DECODE_WORKERS,
+    queue_size=config.DECODE_QUEUE_SIZE,
+    queue_timeout=config.DECODE_QUEUE_TIMEOUT,
+)
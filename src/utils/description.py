@@ -0,0 +1,148 @@
+"""
+Модуль для извлечения краткого описания товара из HTML.
+Этот модуль предоставляет потоковый разбор описания на html.parser:
+разбор читает текст первого блока <div> и прекращается, как только
+найдено первое предложение, без построения дерева документа. Результаты
+запоминаются по идентификатору товара и хешу описания.
+"""
+
+from html.parser import HTMLParser
+
+from cachetools import LRUCache
+
+from configs import config
+
+
+NO_DESCRIPTION = "Описания нет."
+"""
+Текст, который показывается, если у товара нет описания.
+"""
+
+SENTENCE_ENDINGS = '.!?'
+"""
+Символы, которыми заканчивается предложение.
+"""
+
+SKIPPED_TAGS = ('script', 'style', 'template')
+"""
+Теги, содержимое которых не является текстом описания.
+"""
+
+
+class _FirstSentenceFound(Exception):
+    """
+    Служебное исключение для досрочной остановки разбора.
+    """
+
+
+class FirstSentenceParser(HTMLParser):
+    """
+    Потоковый парсер, который собирает текст первого блока <div>
+    и останавливается на первом символе конца предложения.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.depth = 0  # Глубина вложенности внутри первого <div>
+        self.skipped = None  # Открытый тег, содержимое которого пропускается
+        self.finished = False
+        self.parts: list[str] = []
+        self.sentence: str | None = None
+
+    def handle_starttag(self, tag, attrs):
+        if self.finished:
+            return
+        if self.depth:
+            if tag == 'div':
+                self.depth += 1
+            elif tag in SKIPPED_TAGS:
+                self.skipped = tag
+        elif tag == 'div':
+            self.depth = 1
+
+    def handle_endtag(self, tag):
+        if tag == self.skipped:
+            self.skipped = None
+        elif self.depth and tag == 'div':
+            self.depth -= 1
+            if not self.depth:
+                self.finished = True
+                raise _FirstSentenceFound
+
+    def handle_data(self, data):
+        if not self.depth or self.skipped:
+            return
+        for index, char in enumerate(data):
+            if char in SENTENCE_ENDINGS:
+                self.parts.append(data[:index + 1])
+                self.sentence = ''.join(self.parts)
+                self.finished = True
+                raise _FirstSentenceFound
+        self.parts.append(data)
+
+
+def extract_first_sentence(description: str | None) -> str:
+    """
+    Извлекает первое предложение из текста первого блока <div> описания.
+
+    :param description: HTML-описание товара.
+    :return: Первое предложение вместе с завершающим знаком или NO_DESCRIPTION,
+    если описания, блока <div> или законченного предложения нет.
+
+    Пример использования:
+    >>> extract_first_sentence('<div><p>Дрель ударная. Мощность 800 Вт.</p></div>')
+    'Дрель ударная.'
+    """
+    if description is None:
+        return NO_DESCRIPTION
+    parser = FirstSentenceParser()
+    try:
+        parser.feed(description)
+        parser.close()
+    except _FirstSentenceFound:
+        pass
+    return parser.sentence or NO_DESCRIPTION
+
+
+class DescriptionCache:
+    """
+    Кеш кратких описаний по идентификатору товара и хешу HTML-описания.
+    Если описание товара изменилось, изменится и ключ, поэтому устаревшие
+    записи не возвращаются, а вытесняются по LRU.
+
+    :param maxsize: Максимальное количество описаний в кеше.
+    """
+
+    def __init__(self, maxsize: int):
+        self._entries = LRUCache(maxsize=maxsize)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, product_id: str, description: str | None) -> str:
+        """
+        Возвращает краткое описание товара, извлекая его только при промахе.
+
+        :param product_id: Идентификатор товара.
+        :param description: HTML-описание товара.
+        :return: Первое предложение описания.
+        """
+        key = (product_id, hash(description))
+        sentence = self._entries.get(key)
+        if sentence is not None:
+            self.hits += 1
+            return sentence
+        self.misses += 1
+        sentence = extract_first_sentence(description)
+        self._entries[key] = sentence
+        return sentence
+
+    def stats(self) -> dict:
+        """
+        Возвращает счетчики попаданий и промахов.
+
+        :return: Словарь со статистикой кеша.
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
+
+
+description_cache = DescriptionCache(maxsize=config.DESCRIPTION_CACHE_MAXSIZE)
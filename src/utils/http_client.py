@@ -0,0 +1,175 @@
+"""
+Модуль для работы с общим HTTP-клиентом приложения.
+Этот модуль предоставляет одну долгоживущую сессию aiohttp с пулом соединений,
+keep-alive и кешированием DNS. Сессия создается при запуске бота и закрывается
+при его остановке, а все запросы к API магазина используют ее повторно.
+Сессия запрашивает сжатые ответы (gzip, deflate и br, если установлен
+пакет Brotli), а счетчики transfer_stats показывают, сколько байт
+сэкономлено сжатием и условными запросами.
+"""
+
+import logging
+from logging.handlers import RotatingFileHandler
+
+import aiohttp
+
+from configs import config
+
+try:
+    import brotli  # pylint: disable=unused-import
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+
+
+logging.basicConfig(level=logging.INFO)
+
+# Установка размера файла логов в 8 МБ
+MAX_BYTES = 8 * 1024 * 1024  # 8 МБ в байтах
+
+# Создание обработчика файлов с ограничением размера и ротацией
+file_handler = RotatingFileHandler(
+    "logs/http_client_log.log",
+    maxBytes=MAX_BYTES,  # Установка максимального размера файла логов
+    backupCount=30,  # Количество файлов логов, которые будут храниться
+    encoding="utf-8",
+)
+
+# Формат сообщений
+formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(formatter)
+
+# Добавление обработчика в логгер
+logger = logging.getLogger('http_client_logger')
+logger.addHandler(file_handler)
+
+ACCEPT_ENCODING = 'gzip, deflate, br' if HAS_BROTLI else 'gzip, deflate'
+"""
+Поддерживаемые сжатия ответов. Ответы br aiohttp распаковывает только при установленном Brotli.
+"""
+
+
+class TransferStats:
+    """
+    Счетчики объема ответов API: байты, полученные по сети, байты после
+    распаковки и результаты условных запросов (If-None-Match / If-Modified-Since).
+    Размер сжатого ответа известен только по заголовку Content-Length,
+    сжатые ответы без него учитываются в unknown_size.
+    """
+
+    def __init__(self):
+        self.responses = 0
+        self.compressed_responses = 0
+        self.unknown_size = 0
+        self.wire_bytes = 0
+        self.decoded_bytes = 0
+        self.revalidations = 0
+        self.revalidation_hits = 0
+        self.revalidated_bytes = 0
+
+    def record_response(self, response: aiohttp.ClientResponse, body_size: int) -> None:
+        """
+        Учитывает полученный ответ с телом.
+
+        :param response: Ответ aiohttp.
+        :param body_size: Размер тела ответа после распаковки.
+        """
+        self.responses += 1
+        encoding = response.headers.get('Content-Encoding', 'identity').lower()
+        if encoding == 'identity':
+            self.wire_bytes += body_size
+            self.decoded_bytes += body_size
+            return
+        self.compressed_responses += 1
+        if response.content_length is None:
+            self.unknown_size += 1
+            return
+        self.wire_bytes += response.content_length
+        self.decoded_bytes += body_size
+
+    def record_revalidation(self, not_modified: bool, body_size: int = 0) -> None:
+        """
+        Учитывает условный запрос.
+
+        :param not_modified: Сервер ответил 304 и тело ответа не передавалось.
+        :param body_size: Размер сохраненного тела, которое не пришлось загружать.
+        """
+        self.revalidations += 1
+        if not_modified:
+            self.revalidation_hits += 1
+            self.revalidated_bytes += body_size
+
+    def stats(self) -> dict:
+        """
+        Возвращает счетчики и сэкономленные байты.
+
+        :return: Словарь со статистикой.
+        """
+        return {
+            'responses': self.responses,
+            'compressed_responses': self.compressed_responses,
+            'unknown_size': self.unknown_size,
+            'wire_bytes': self.wire_bytes,
+            'decoded_bytes': self.decoded_bytes,
+            'compression_saved_bytes': self.decoded_bytes - self.wire_bytes,
+            'revalidations': self.revalidations,
+            'revalidation_hits': self.revalidation_hits,
+            'revalidation_saved_bytes': self.revalidated_bytes,
+        }
+
+
+transfer_stats = TransferStats()
+
+_session: aiohttp.ClientSession | None = None
+
+async def create_session() -> aiohttp.ClientSession:
+    """
+    Асинхронно создает общую сессию aiohttp с пулом соединений.
+    Если сессия уже создана и не закрыта, возвращает ее.
+
+    :return: Общая сессия aiohttp.
+    """
+    global _session  # pylint: disable=global-statement
+    if _session is not None and not _session.closed:
+        return _session
+
+    connector = aiohttp.TCPConnector(
+        limit=config.HTTP_POOL_LIMIT,
+        limit_per_host=config.HTTP_POOL_LIMIT_PER_HOST,
+        ttl_dns_cache=config.HTTP_DNS_CACHE_TTL,
+        keepalive_timeout=config.HTTP_KEEPALIVE_TIMEOUT,
+        enable_cleanup_closed=True,
+    )
+    _session = aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=config.HTTP_REQUEST_TIMEOUT),
+        headers={'Accept-Encoding': ACCEPT_ENCODING},
+    )
+    logger.info(
+        "Создана общая HTTP-сессия: limit = %s, limit_per_host = %s, ttl_dns_cache = %s, "
+        "Accept-Encoding = %s",
+        config.HTTP_POOL_LIMIT, config.HTTP_POOL_LIMIT_PER_HOST, config.HTTP_DNS_CACHE_TTL,
+        ACCEPT_ENCODING
+        )
+    return _session
+
+async def get_session() -> aiohttp.ClientSession:
+    """
+    Асинхронно возвращает общую сессию aiohttp.
+    Если сессия еще не создана (например, при вызове вне бота), создает ее.
+
+    :return: Общая сессия aiohttp.
+    """
+    if _session is None or _session.closed:
+        return await create_session()
+    return _session
+
+async def close_session() -> None:
+    """
+    Асинхронно закрывает общую сессию aiohttp и все соединения пула.
+    """
+    global _session  # pylint: disable=global-statement
+    if _session is not None and not _session.closed:
+        await _session.close()
+        logger.info("Общая HTTP-сессия закрыта")
+    _session = None
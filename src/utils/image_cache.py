@@ -0,0 +1,93 @@
+"""
+Модуль для кеширования результатов проверки существования изображений товаров.
+Этот модуль предоставляет кеш "URL изображения -> есть/нет" с разным временем
+жизни для найденных (positive) и отсутствующих (negative) изображений и ведет
+счетчики попаданий и промахов.
+"""
+
+from cachetools import TTLCache
+
+from configs import config
+
+
+class ImageCache:
+    """
+    Кеш существования изображений по URL.
+
+    :param maxsize: Максимальное количество URL в каждом из кешей.
+    :param positive_ttl: Время в секундах, в течение которого помнится, что изображение есть.
+    :param negative_ttl: Время в секундах, в течение которого помнится, что изображения нет.
+    """
+
+    def __init__(self, maxsize: int, positive_ttl: float, negative_ttl: float):
+        self._exists = TTLCache(maxsize=maxsize, ttl=positive_ttl)
+        self._missing = TTLCache(maxsize=maxsize, ttl=negative_ttl)
+        self.hits = {'exists': 0, 'missing': 0}
+        self.misses = 0
+
+    def get(self, image_url: str) -> bool | None:
+        """
+        Возвращает сохраненный результат проверки изображения.
+
+        :param image_url: URL изображения.
+        :return: True или False, если результат есть в кеше, иначе None.
+        """
+        if image_url in self._exists:
+            self.hits['exists'] += 1
+            return True
+        if image_url in self._missing:
+            self.hits['missing'] += 1
+            return False
+        self.misses += 1
+        return None
+
+    def contains(self, image_url: str) -> bool:
+        """
+        Проверяет, есть ли результат проверки в кеше, не меняя счетчики.
+
+        :param image_url: URL изображения.
+        :return: True, если результат есть в кеше.
+        """
+        return image_url in self._exists or image_url in self._missing
+
+    def set(self, image_url: str, exists: bool) -> None:
+        """
+        Сохраняет результат проверки изображения.
+
+        :param image_url: URL изображения.
+        :param exists: Существует ли изображение.
+        """
+        if exists:
+            self._missing.pop(image_url, None)
+            self._exists[image_url] = True
+        else:
+            self._exists.pop(image_url, None)
+            self._missing[image_url] = False
+
+    def invalidate(self, image_url: str) -> None:
+        """
+        Удаляет результат проверки изображения из кеша.
+
+        :param image_url: URL изображения.
+        """
+        self._exists.pop(image_url, None)
+        self._missing.pop(image_url, None)
+
+    def stats(self) -> dict:
+        """
+        Возвращает счетчики попаданий и промахов.
+
+        :return: Словарь со статистикой кеша.
+        """
+        return {
+            'hits': dict(self.hits),
+            'misses': self.misses,
+            'size': {'exists': len(self._exists), 'missing': len(self._missing)},
+        }
+
+
+image_cache = ImageCache(
+    maxsize=config.IMAGE_CACHE_MAXSIZE,
+    positive_ttl=config.IMAGE_CACHE_POSITIVE_TTL,
+    negative_ttl=config.IMAGE_CACHE_NEGATIVE_TTL,
+)
@@ -0,0 +1,245 @@
+"""
+Модуль HTTP-сервера для сброса кеша товаров по событиям магазина.
+Сервер aiohttp запускается вместе с ботом и принимает от магазина (или его
+локальной замены) POST-запросы с идентификаторами измененных товаров.
+Изменения копятся и обрабатываются пакетами: данные товаров удаляются
+из кеша product_cache (информация, цена, атрибуты, количество), а при
+действии 'refresh' сразу загружаются заново с фоновым приоритетом. Это
+позволяет держать длинные TTL кеша без устаревших цен и остатков.
+Запросы авторизуются заголовком "Authorization: Bearer <INVALIDATION_TOKEN>",
+без заданного токена сервер не запускается.
+
+Пример запроса:
+    POST /invalidate
+    {"product_ids": ["42", "43"], "action": "refresh"}
+"""
+
+import asyncio
+import hmac
+import logging
+from logging.handlers import RotatingFileHandler
+
+from aiohttp import web
+
+from configs import config
+from src.utils.product_cache import product_cache
+from src.utils.product_loader import load_product_bundles
+from src.utils.request_scheduler import Priority, priority_scope
+
+
+logging.basicConfig(level=logging.INFO)
+
+# Установка размера файла логов в 8 МБ
+MAX_BYTES = 8 * 1024 * 1024  # 8 МБ в байтах
+
+# Создание обработчика файлов с ограничением размера и ротацией
+file_handler = RotatingFileHandler(
+    "logs/invalidation_server_log.log",
+    maxBytes=MAX_BYTES,  # Установка максимального размера файла логов
+    backupCount=30,  # Количество файлов логов, которые будут храниться
+    encoding="utf-8",
+)
+
+# Формат сообщений
+formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(formatter)
+
+# Добавление обработчика в логгер
+logger = logging.getLogger('invalidation_server_logger')
+logger.addHandler(file_handler)
+
+ACTIONS = ('invalidate', 'refresh')
+"""
+Действия с кешем: только удалить данные товара или удалить и загрузить заново.
+"""
+
+
+class InvalidationBatcher:
+    """
+    Очередь изменений товаров, обрабатываемая пакетами.
+
+    :param batch_size: Максимальное количество товаров в одном пакете.
+    :param interval: Сколько секунд копить изменения перед обработкой неполного пакета.
+    """
+
+    def __init__(self, batch_size: int, interval: float):
+        self.batch_size = batch_size
+        self.interval = interval
+        self._pending: dict[str, bool] = {}  # Идентификатор товара: нужно ли загрузить заново
+        self._wakeup = asyncio.Event()
+        self.events = 0
+        self.batches = 0
+        self.invalidated = 0
+        self.refreshed = 0
+        self.refresh_failed = 0
+
+    def submit(self, product_ids: list[str], refresh: bool) -> None:
+        """
+        Добавляет товары в очередь. Если товар уже в очереди, действие 'refresh'
+        сильнее 'invalidate'.
+
+        :param product_ids: Идентификаторы измененных товаров.
+        :param refresh: Загрузить данные товаров заново после сброса.
+        """
+        for product_id in product_ids:
+            self._pending[product_id] = self._pending.get(product_id, False) or refresh
+        self.events += len(product_ids)
+        self._wakeup.set()
+
+    def _take_batch(self) -> dict[str, bool]:
+        """
+        Забирает из очереди не больше batch_size товаров.
+        """
+        batch = dict(list(self._pending.items())[:self.batch_size])
+        for product_id in batch:
+            del self._pending[product_id]
+        if not self._pending:
+            self._wakeup.clear()
+        return batch
+
+    async def process(self, batch: dict[str, bool]) -> None:
+        """
+        Асинхронно сбрасывает кеш товаров пакета и загружает заново товары с 'refresh'.
+
+        :param batch: Словарь {идентификатор товара: нужно ли загрузить заново}.
+        """
+        for product_id in batch:
+            product_cache.invalidate(product_id)
+        self.invalidated += len(batch)
+        self.batches += 1
+        to_refresh = [product_id for product_id, refresh in batch.items() if refresh]
+        if to_refresh:
+            with priority_scope(Priority.BACKGROUND):
+                bundles = await load_product_bundles(to_refresh)
+            loaded = sum(1 for bundle in bundles.values() if bundle['info'] is not None)
+            self.refreshed += loaded
+            self.refresh_failed += len(to_refresh) - loaded
+        logger.info(
+            "Обработан пакет изменений: сброшено %s товаров, загружено заново %s",
+            len(batch), len(to_refresh)
+            )
+
+    async def run(self) -> None:
+        """
+        Фоновая задача обработки очереди.
+        """
+        while True:
+            await self._wakeup.wait()
+            if len(self._pending) < self.batch_size:
+                # Неполный пакет ждет, пока придут другие изменения
+                await asyncio.sleep(self.interval)
+            try:
+                await self.process(self._take_batch())
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                logger.error("Ошибка обработки пакета изменений: %s", e)
+
+    def stats(self) -> dict:
+        """
+        Возвращает счетчики обработанных изменений.
+
+        :return: Словарь со статистикой.
+        """
+        return {
+            'events': self.events,
+            'pending': len(self._pending),
+            'batches': self.batches,
+            'invalidated': self.invalidated,
+            'refreshed': self.refreshed,
+            'refresh_failed': self.refresh_failed,
+        }
+
+
+invalidation_batcher = InvalidationBatcher(
+    batch_size=config.INVALIDATION_BATCH_SIZE,
+    interval=config.INVALIDATION_BATCH_INTERVAL,
+)
+
+_runner: web.AppRunner | None = None  # Запущенный сервер
+_batcher_task: asyncio.Task | None = None  # Фоновая обработка очереди
+
+
+def _is_authorized(request: web.Request) -> bool:
+    """
+    Проверяет токен в заголовке Authorization.
+    """
+    expected = f'Bearer {config.INVALIDATION_TOKEN}'
+    return hmac.compare_digest(request.headers.get('Authorization', ''), expected)
+
+async def handle_invalidate(request: web.Request) -> web.Response:
+    """
+    Обрабатывает POST /invalidate: ставит товары в очередь сброса кеша.
+
+    Тело запроса: {"product_ids": [...], "action": "invalidate" | "refresh"}.
+    Если действие не указано, используется INVALIDATION_DEFAULT_ACTION.
+
+    :param request: Запрос aiohttp.
+    :return: 202 с количеством принятых товаров, 400 при ошибке в теле, 401 без токена.
+    """
+    if not _is_authorized(request):
+        logger.warning("Запрос на сброс кеша без действующего токена от %s", request.remote)
+        return web.json_response({'error': 'unauthorized'}, status=401)
+    try:
+        body = await request.json()
+        product_ids = [str(product_id) for product_id in body['product_ids']]
+        action = body.get('action', config.INVALIDATION_DEFAULT_ACTION)
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return web.json_response({'error': 'expected {"product_ids": [...]}'}, status=400)
+    if action not in ACTIONS:
+        return web.json_response({'error': f'action must be one of {ACTIONS}'}, status=400)
+    invalidation_batcher.submit(product_ids, refresh=action == 'refresh')
+    logger.info("Принято изменений товаров: %s, действие %s", len(product_ids), action)
+    return web.json_response({'accepted': len(product_ids), 'action': action}, status=202)
+
+async def handle_stats(request: web.Request) -> web.Response:
+    """
+    Обрабатывает GET /stats: возвращает счетчики очереди сброса и кеша товаров.
+
+    :param request: Запрос aiohttp.
+    :return: Статистика в JSON, 401 без токена.
+    """
+    if not _is_authorized(request):
+        return web.json_response({'error': 'unauthorized'}, status=401)
+    return web.json_response({
+        'invalidation': invalidation_batcher.stats(),
+        'product_cache': product_cache.stats(),
+    })
+
+async def start_invalidation_server() -> None:
+    """
+    Асинхронно запускает сервер сброса кеша и обработку очереди,
+    если задан INVALIDATION_TOKEN.
+    """
+    global _runner, _batcher_task  # pylint: disable=global-statement
+    if not config.INVALIDATION_TOKEN:
+        logger.info("INVALIDATION_TOKEN не задан, сервер сброса кеша отключен")
+        return
+    if _runner is not None:
+        return
+    app = web.Application()
+    app.router.add_post('/invalidate', handle_invalidate)
+    app.router.add_get('/stats', handle_stats)
+    _runner = web.AppRunner(app)
+    await _runner.setup()
+    await web.TCPSite(_runner, config.INVALIDATION_HOST, config.INVALIDATION_PORT).start()
+    _batcher_task = asyncio.create_task(invalidation_batcher.run())
+    logger.info(
+        "Сервер сброса кеша запущен на %s:%s",
+        config.INVALIDATION_HOST, config.INVALIDATION_PORT
+        )
+
+async def stop_invalidation_server() -> None:
+    """
+    Асинхронно останавливает сервер сброса кеша и обработку очереди.
+    """
+    global _runner, _batcher_task  # pylint: disable=global-statement
+    if _batcher_task is not None:
+        _batcher_task.cancel()
+        try:
+            await _batcher_task
+        except asyncio.CancelledError:
+            pass
+        _batcher_task = None
+    if _runner is not None:
+        await _runner.cleanup()
+        _runner = None
+        logger.info("Сервер сброса кеша остановлен")
@@ -0,0 +1,256 @@
+"""
+Модуль типизированных записей данных API магазина и CRM.
+Этот модуль предоставляет компактные записи со __slots__ для результатов
+поиска, информации о товаре, атрибутов, количества по магазинам и данных
+покупателя. Записи создаются сразу после разбора тела ответа и хранят только
+поля, которые использует бот, поэтому кеши держат в памяти меньше данных,
+чем исходные словари JSON (например, HTML-описание товара не хранится).
+Тело ответа разбирается функцией json_loads: orjson, если он установлен,
+иначе стандартный json.
+"""
+
+from typing import Any
+
+try:
+    from orjson import loads as json_loads
+    HAS_ORJSON = True
+except ImportError:
+    from json import loads as json_loads
+    HAS_ORJSON = False
+
+
+class Record:
+    """
+    Базовый класс записи со __slots__: сравнение и представление по полям.
+    """
+    __slots__ = ()
+
+    def __eq__(self, other: object) -> bool:
+        if type(self) is not type(other):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'{type(self).__name__}({fields})'
+
+
+class SearchHit(Record):
+    """
+    Товар из результатов поиска.
+
+    description - краткое описание (первое предложение), None для товаров,
+    которые не показываются пользователю.
+    """
+    __slots__ = ('product_id', 'name', 'image', 'description', 'url')
+
+    def __init__(
+        self,
+        product_id: str,
+        name: str | None,
+        image: str | None,
+        description: str | None,
+        url: str | None
+        ):
+        self.product_id = product_id
+        self.name = name
+        self.image = image
+        self.description = description
+        self.url = url
+
+
+class ProductInfo(Record):
+    """
+    Информация о товаре.
+
+    price - цена (поле 'sku' API), unit - единица измерения (поле 'upc'
+    без символа '/'), quantity - общий остаток товара.
+    """
+    __slots__ = ('product_id', 'name', 'model', 'ean', 'price', 'unit', 'image', 'category',
+                 'quantity')
+
+    def __init__(
+        self,
+        product_id: str,
+        name: str | None = None,
+        model: str | None = None,
+        ean: str | None = None,
+        price: str | None = None,
+        unit: str = '',
+        image: str | None = None,
+        category: str | None = None,
+        quantity: str | None = None
+        ):
+        self.product_id = product_id
+        self.name = name
+        self.model = model
+        self.ean = ean
+        self.price = price
+        self.unit = unit
+        self.image = image
+        self.category = category
+        self.quantity = quantity
+
+    @classmethod
+    def from_api(cls, data: Any) -> 'ProductInfo | None':
+        """
+        Создает запись из ответа API товара.
+
+        :param data: Разобранный JSON ответа.
+        :return: Информация о товаре или None, если товар не найден (API вернул не объект).
+        """
+        if not isinstance(data, dict) or 'error' in data:
+            return None
+        return cls(
+            product_id=str(data.get('product_id')),
+            name=data.get('name'),
+            model=data.get('model'),
+            ean=data.get('ean'),
+            price=data.get('sku'),
+            unit=(data.get('upc') or '').replace('/', ''),
+            image=data.get('image'),
+            category=data.get('category'),
+            quantity=data.get('quantity'),
+        )
+
+
+class Attribute(Record):
+    """
+    Атрибут товара: название и значение.
+    """
+    __slots__ = ('name', 'text')
+
+    def __init__(self, name: str | None, text: str | None):
+        self.name = name
+        self.text = text
+
+
+class AttributeGroup(Record):
+    """
+    Группа атрибутов товара.
+    """
+    __slots__ = ('name', 'attributes')
+
+    def __init__(self, name: str | None, attributes: tuple[Attribute, ...]):
+        self.name = name
+        self.attributes = attributes
+
+
+def parse_attributes(data: Any) -> tuple[AttributeGroup, ...] | None:
+    """
+    Создает группы атрибутов из ответа API атрибутов товара.
+
+    :param data: Разобранный JSON ответа (список групп с ключом 'attribute').
+    :return: Группы атрибутов или None, если ответ не является списком.
+    """
+    if not isinstance(data, list):
+        return None
+    return tuple(
+        AttributeGroup(
+            group.get('name'),
+            tuple(
+                Attribute(attribute.get('name'), attribute.get('text'))
+                for attribute in group.get('attribute') or ()
+            ),
+        )
+        for group in data
+        if isinstance(group, dict)
+    )
+
+
+class StoreQuantities(Record):
+    """
+    Количество товара по магазинам в порядке ответа API.
+    """
+    __slots__ = ('by_store',)
+
+    def __init__(self, by_store: tuple[float, ...]):
+        self.by_store = by_store
+
+    def __len__(self) -> int:
+        return len(self.by_store)
+
+    def __getitem__(self, index: int) -> float:
+        return self.by_store[index]
+
+    @classmethod
+    def from_api(cls, data: Any) -> 'StoreQuantities | None':
+        """
+        Создает запись из ответа API количества товара.
+
+        :param data: Разобранный JSON ответа (список словарей с ключом 'quantity').
+        :return: Количество по магазинам или None, если ответ не является списком.
+        """
+        if not isinstance(data, list):
+            return None
+        return cls(tuple(
+            float(item.get('quantity') or 0) for item in data if isinstance(item, dict)
+        ))
+
+
+def parse_quantities_by_product(data: Any) -> dict[str, StoreQuantities] | None:
+    """
+    Создает записи количества по магазинам из ответа пакетного API количества.
+
+    :param data: Разобранный JSON ответа {идентификатор товара: [{'quantity': ...}, ...]}.
+    :return: Словарь {идентификатор товара: количество по магазинам}
+    или None, если ответ не является объектом.
+    """
+    if not isinstance(data, dict):
+        return None
+    quantities = {}
+    for product_id, items in data.items():
+        quantity = StoreQuantities.from_api(items)
+        if quantity is not None:
+            quantities[str(product_id)] = quantity
+    return quantities
+
+
+class CustomerCard(Record):
+    """
+    Данные покупателя по номеру дисконтной карты.
+
+    card_type - тип карты (поле '2' в 'custom_field', например 'Р00000002'),
+    expiry - срок действия карты (поле '3'), balance - накопленная сумма
+    на карте (поле '4').
+    """
+    __slots__ = ('card_number', 'customer_id', 'card_type', 'expiry', 'balance')
+
+    def __init__(
+        self,
+        card_number: str,
+        customer_id: str | None,
+        card_type: str | None,
+        expiry: str | None,
+        balance: str | None
+        ):
+        self.card_number = card_number
+        self.customer_id = customer_id
+        self.card_type = card_type
+        self.expiry = expiry
+        self.balance = balance
+
+    @classmethod
+    def from_api(cls, card_number: str, info: dict) -> 'CustomerCard':
+        """
+        Создает запись из ответа API покупателя по номеру карты.
+        Если поле 'custom_field' отсутствует или содержит некорректный JSON,
+        поля карты равны None.
+
+        :param card_number: Номер карты.
+        :param info: Ответ API с данными покупателя.
+        :return: Запись покупателя.
+        """
+        try:
+            custom_field = json_loads(info.get('custom_field') or '{}')
+        except (TypeError, ValueError):
+            custom_field = {}
+        if not isinstance(custom_field, dict):
+            custom_field = {}
+        return cls(
+            card_number=card_number,
+            customer_id=info.get('customer_id'),
+            card_type=custom_field.get('2'),
+            expiry=custom_field.get('3'),
+            balance=custom_field.get('4'),
+        )
@@ -0,0 +1,152 @@
+"""
+Модуль выбора размера фото для распознавания штрихкода.
+Telegram хранит каждое фото в нескольких размерах (обычно до 90, 320, 800,
+1280 и 2560 пикселей по большей стороне), а самый большой размер часто
+весит несколько мегабайт. Для распознавания штрихкода обычно достаточно
+размера около SCAN_MIN_PHOTO_SIDE, поэтому сначала скачивается наименьший
+размер не меньше этого, а следующие по величине размеры - только если
+штрихкод не распознан. Статистика показывает, на каком размере фото
+распознаются, сколько байт скачано и сколько сэкономлено по сравнению
+со скачиванием самого большого размера.
+"""
+
+import logging
+from logging.handlers import RotatingFileHandler
+
+from aiogram.types import PhotoSize
+
+from configs import config
+from src.utils.stats_reporter import register_stats
+
+
+logging.basicConfig(level=logging.INFO)
+
+# Установка размера файла логов в 8 МБ
+MAX_BYTES = 8 * 1024 * 1024  # 8 МБ в байтах
+
+# Создание обработчика файлов с ограничением размера и ротацией
+file_handler = RotatingFileHandler(
+    "logs/photo_sizes_log.log",
+    maxBytes=MAX_BYTES,  # Установка максимального размера файла логов
+    backupCount=30,  # Количество файлов логов, которые будут храниться
+    encoding="utf-8",
+)
+
+# Формат сообщений
+formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(formatter)
+
+# Добавление обработчика в логгер
+logger = logging.getLogger('photo_sizes_logger')
+logger.addHandler(file_handler)
+
+
+def scan_order(
+    photo_sizes: list[PhotoSize],
+    min_side: int = config.SCAN_MIN_PHOTO_SIDE
+    ) -> list[PhotoSize]:
+    """
+    Возвращает размеры фото в порядке попыток распознавания: от наименьшего
+    размера, большая сторона которого не меньше min_side, до самого большого.
+    Если все размеры меньше min_side, пробуется только самый большой.
+
+    :param photo_sizes: Размеры фото из сообщения (message.photo).
+    :param min_side: Минимальный размер большей стороны в пикселях.
+    :return: Размеры фото по возрастанию.
+    """
+    ordered = sorted(photo_sizes, key=lambda size: size.width * size.height)
+    sufficient = [size for size in ordered if max(size.width, size.height) >= min_side]
+    return sufficient or ordered[-1:]
+
+
+def size_label(photo_size: PhotoSize) -> str:
+    """
+    Возвращает обозначение размера фото для статистики: большая сторона в пикселях.
+    """
+    return str(max(photo_size.width, photo_size.height))
+
+
+class PhotoScanStats:
+    """
+    Счетчики распознавания фото по размерам: попытки и успехи для каждого
+    размера, время распознавания, скачанные байты и байты, которые пришлось бы
+    скачать, если бы всегда скачивался самый большой размер.
+    """
+
+    def __init__(self):
+        self.photos = 0
+        self.decoded = 0
+        self.escalations = 0
+        self.downloaded_bytes = 0
+        self.largest_bytes = 0
+        self.attempts: dict[str, int] = {}
+        self.hits: dict[str, int] = {}
+        self.decode_time: dict[str, float] = {}
+
+    def record_attempt(self, label: str, decoded: bool, elapsed: float) -> None:
+        """
+        Учитывает одну попытку распознавания.
+
+        :param label: Обозначение размера фото.
+        :param decoded: Распознан ли штрихкод.
+        :param elapsed: Время скачивания и распознавания в секундах.
+        """
+        self.attempts[label] = self.attempts.get(label, 0) + 1
+        self.decode_time[label] = self.decode_time.get(label, 0.0) + elapsed
+        if decoded:
+            self.hits[label] = self.hits.get(label, 0) + 1
+
+    def record_photo(
+        self,
+        decoded: bool,
+        attempts: int,
+        downloaded_bytes: int,
+        largest_bytes: int
+        ) -> None:
+        """
+        Учитывает распознавание одного фото.
+
+        :param decoded: Распознан ли штрихкод.
+        :param attempts: Сколько размеров фото пробовалось.
+        :param downloaded_bytes: Сколько байт скачано для всех попыток.
+        :param largest_bytes: Размер самого большого размера фото в байтах.
+        """
+        self.photos += 1
+        self.decoded += decoded
+        self.escalations += attempts - 1
+        self.downloaded_bytes += downloaded_bytes
+        self.largest_bytes += largest_bytes
+        if attempts > 1:
+            logger.info(
+                "Фото %s после %s попыток, скачано %s байт",
+                'распознано' if decoded else 'не распознано', attempts, downloaded_bytes
+                )
+
+    def stats(self) -> dict:
+        """
+        Возвращает статистику: на каком размере фото распознаются, среднее время
+        попытки на каждом размере и сэкономленные байты.
+
+        :return: Словарь со статистикой.
+        """
+        return {
+            'photos': self.photos,
+            'decoded': self.decoded,
+            'escalations': self.escalations,
+            'downloaded_bytes': self.downloaded_bytes,
+            'largest_bytes': self.largest_bytes,
+            'saved_bytes': self.largest_bytes - self.downloaded_bytes,
+            'sizes': {
+                label: {
+                    'attempts': attempts,
+                    'hits': self.hits.get(label, 0),
+                    'hit_rate': self.hits.get(label, 0) / attempts,
+                    'avg_ms': self.decode_time[label] / attempts * 1000,
+                }
+                for label, attempts in sorted(self.attempts.items(), key=lambda item: int(item[0]))
+            },
+        }
+
+
+photo_scan_stats = PhotoScanStats()
+register_stats('photo_sizes', photo_scan_stats.stats)
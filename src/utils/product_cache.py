@@ -0,0 +1,262 @@
+"""
+Модуль для кеширования данных о товарах в памяти процесса.
+Этот модуль предоставляет ограниченный по размеру кеш (LRU) с временем жизни
+записей (TTL) для информации о товаре, его атрибутов и количества по магазинам.
+Медленно меняющиеся атрибуты и быстро меняющиеся количество и информация
+о товаре (она содержит цену) хранятся с разным временем жизни.
+Данные хранятся в виде компактных записей из src.utils.models.
+Кроме того, последние полученные данные товара хранятся без времени жизни,
+чтобы показать их, когда API недоступен. Кеш ведет счетчики попаданий,
+промахов и вытеснений и позволяет сбросить данные отдельного товара.
+"""
+
+import logging
+from logging.handlers import RotatingFileHandler
+from cachetools import LRUCache, TTLCache
+
+from configs import config
+from src.utils.models import AttributeGroup, ProductInfo, StoreQuantities
+
+
+logging.basicConfig(level=logging.INFO)
+
+# Установка размера файла логов в 8 МБ
+MAX_BYTES = 8 * 1024 * 1024  # 8 МБ в байтах
+
+# Создание обработчика файлов с ограничением размера и ротацией
+file_handler = RotatingFileHandler(
+    "logs/product_cache_log.log",
+    maxBytes=MAX_BYTES,  # Установка максимального размера файла логов
+    backupCount=30,  # Количество файлов логов, которые будут храниться
+    encoding="utf-8",
+)
+
+# Формат сообщений
+formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(formatter)
+
+# Добавление обработчика в логгер
+logger = logging.getLogger('product_cache_logger')
+logger.addHandler(file_handler)
+
+class CountingTTLCache(TTLCache):
+    """
+    TTL-кеш с вытеснением по LRU, который считает вытесненные записи.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self.evictions = 0
+
+    def popitem(self):
+        """
+        Вытесняет наименее используемую запись и увеличивает счетчик вытеснений.
+        """
+        key, value = super().popitem()
+        self.evictions += 1
+        return key, value
+
+    def clear(self):
+        """
+        Очищает кеш, не учитывая удаленные записи как вытесненные.
+        """
+        evictions = self.evictions
+        super().clear()
+        self.evictions = evictions
+
+
+class ProductCache:
+    """
+    Кеш информации о товарах и их атрибутов по идентификатору товара.
+
+    :param maxsize: Максимальное количество товаров в каждом из кешей.
+    :param price_ttl: Время жизни информации о товаре. API отдает товар одной
+    записью вместе с ценой, поэтому запись живет столько же, сколько цена.
+    :param attributes_ttl: Время жизни атрибутов товара.
+    :param quantity_ttl: Время жизни количества товара по магазинам.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        price_ttl: float,
+        attributes_ttl: float,
+        quantity_ttl: float
+        ):
+        self._info = CountingTTLCache(maxsize, price_ttl)
+        self._attributes = CountingTTLCache(maxsize, attributes_ttl)
+        self._quantity = CountingTTLCache(maxsize, quantity_ttl)
+        self._last_info = LRUCache(maxsize)
+        self._last_attributes = LRUCache(maxsize)
+        self._last_quantity = LRUCache(maxsize)
+        self.fallback_hits = {'info': 0, 'attributes': 0, 'quantity': 0}
+        self.hits = {'info': 0, 'attributes': 0, 'quantity': 0}
+        self.misses = {'info': 0, 'attributes': 0, 'quantity': 0}
+
+    def get_info(self, product_id: str) -> ProductInfo | None:
+        """
+        Возвращает информацию о товаре из кеша.
+
+        :param product_id: Идентификатор товара.
+        :return: Информация о товаре или None, если в кеше ее нет.
+        """
+        product_info = self._info.get(str(product_id))
+        if product_info is None:
+            self.misses['info'] += 1
+        else:
+            self.hits['info'] += 1
+        return product_info
+
+    def set_info(self, product_id: str, product_info: ProductInfo) -> None:
+        """
+        Сохраняет информацию о товаре.
+
+        :param product_id: Идентификатор товара.
+        :param product_info: Информация о товаре, полученная от API.
+        """
+        key = str(product_id)
+        self._info[key] = product_info
+        self._last_info[key] = product_info
+
+    def get_attributes(self, product_id: str) -> tuple[AttributeGroup, ...] | None:
+        """
+        Возвращает атрибуты товара из кеша.
+
+        :param product_id: Идентификатор товара.
+        :return: Атрибуты товара или None, если в кеше их нет.
+        """
+        attributes = self._attributes.get(str(product_id))
+        if attributes is None:
+            self.misses['attributes'] += 1
+        else:
+            self.hits['attributes'] += 1
+        return attributes
+
+    def set_attributes(self, product_id: str, attributes: tuple[AttributeGroup, ...]) -> None:
+        """
+        Сохраняет атрибуты товара.
+
+        :param product_id: Идентификатор товара.
+        :param attributes: Атрибуты товара, полученные от API.
+        """
+        self._attributes[str(product_id)] = attributes
+        self._last_attributes[str(product_id)] = attributes
+
+    def get_quantity(self, product_id: str) -> StoreQuantities | None:
+        """
+        Возвращает количество товара по магазинам из кеша.
+
+        :param product_id: Идентификатор товара.
+        :return: Количество товара или None, если в кеше его нет.
+        """
+        quantity = self._quantity.get(str(product_id))
+        if quantity is None:
+            self.misses['quantity'] += 1
+        else:
+            self.hits['quantity'] += 1
+        return quantity
+
+    def set_quantity(self, product_id: str, quantity: StoreQuantities) -> None:
+        """
+        Сохраняет количество товара по магазинам.
+
+        :param product_id: Идентификатор товара.
+        :param quantity: Количество товара, полученное от API.
+        """
+        self._quantity[str(product_id)] = quantity
+        self._last_quantity[str(product_id)] = quantity
+
+    def get_last_known_info(self, product_id: str) -> ProductInfo | None:
+        """
+        Возвращает последнюю полученную информацию о товаре независимо от ее возраста.
+        Используется, когда API магазина недоступен.
+
+        :param product_id: Идентификатор товара.
+        :return: Информация о товаре или None, если ее нет в кеше.
+        """
+        product_info = self._last_info.get(str(product_id))
+        if product_info is not None:
+            self.fallback_hits['info'] += 1
+        return product_info
+
+    def get_last_known_attributes(self, product_id: str) -> tuple[AttributeGroup, ...] | None:
+        """
+        Возвращает последние полученные атрибуты товара независимо от их возраста.
+        Используется, когда API магазина недоступен.
+
+        :param product_id: Идентификатор товара.
+        :return: Атрибуты товара или None, если их нет в кеше.
+        """
+        attributes = self._last_attributes.get(str(product_id))
+        if attributes is not None:
+            self.fallback_hits['attributes'] += 1
+        return attributes
+
+    def get_last_known_quantity(self, product_id: str) -> StoreQuantities | None:
+        """
+        Возвращает последнее полученное количество товара по магазинам независимо
+        от его возраста. Используется, когда API магазина недоступен.
+
+        :param product_id: Идентификатор товара.
+        :return: Количество товара или None, если его нет в кеше.
+        """
+        quantity = self._last_quantity.get(str(product_id))
+        if quantity is not None:
+            self.fallback_hits['quantity'] += 1
+        return quantity
+
+    def invalidate(self, product_id: str) -> None:
+        """
+        Удаляет из кеша все данные указанного товара.
+
+        :param product_id: Идентификатор товара.
+        """
+        key = str(product_id)
+        self._info.pop(key, None)
+        self._attributes.pop(key, None)
+        self._quantity.pop(key, None)
+        self._last_info.pop(key, None)
+        self._last_attributes.pop(key, None)
+        self._last_quantity.pop(key, None)
+        logger.info("Данные товара %s удалены из кеша", key)
+
+    def clear(self) -> None:
+        """
+        Полностью очищает кеш.
+        """
+        self._info.clear()
+        self._attributes.clear()
+        self._quantity.clear()
+        self._last_info.clear()
+        self._last_attributes.clear()
+        self._last_quantity.clear()
+
+    def stats(self) -> dict:
+        """
+        Возвращает счетчики попаданий, промахов, ответов при недоступном API и вытеснений.
+
+        :return: Словарь со статистикой кеша.
+        """
+        return {
+            'hits': dict(self.hits),
+            'misses': dict(self.misses),
+            'fallback_hits': dict(self.fallback_hits),
+            'evictions': {
+                'info': self._info.evictions,
+                'attributes': self._attributes.evictions,
+                'quantity': self._quantity.evictions,
+            },
+            'size': {
+                'info': len(self._info),
+                'attributes': len(self._attributes),
+                'quantity': len(self._quantity),
+            },
+        }
+
+
+product_cache = ProductCache(
+    maxsize=config.PRODUCT_CACHE_MAXSIZE,
+    price_ttl=config.PRODUCT_PRICE_TTL,
+    attributes_ttl=config.PRODUCT_ATTRIBUTES_TTL,
+    quantity_ttl=config.PRODUCT_QUANTITY_TTL,
+)
@@ -0,0 +1,148 @@
+"""
+Модуль для параллельной загрузки данных о нескольких товарах.
+Этот модуль предоставляет загрузчик "пакетов" товара: информацию о товаре,
+количество по магазинам и атрибуты для N товаров он запрашивает одновременно,
+с ограничением числа параллельных запросов и таймаутом на каждый вызов.
+Количество всех товаров запрашивается одним вызовом get_quantities (пакетно).
+Если один из вызовов завершился ошибкой, остальные данные все равно возвращаются.
+"""
+
+import asyncio
+import logging
+from logging.handlers import RotatingFileHandler
+from typing import Any, Awaitable, Callable
+
+from configs import config
+from src.utils.circuit_breaker import CircuitOpenError
+from src.utils.connect_api import connect_product_attributes_to_id, connect_product_to_id
+from src.utils.quantity_service import get_quantities
+
+
+logging.basicConfig(level=logging.INFO)
+
+# Установка размера файла логов в 8 МБ
+MAX_BYTES = 8 * 1024 * 1024  # 8 МБ в байтах
+
+# Создание обработчика файлов с ограничением размера и ротацией
+file_handler = RotatingFileHandler(
+    "logs/product_loader_log.log",
+    maxBytes=MAX_BYTES,  # Установка максимального размера файла логов
+    backupCount=30,  # Количество файлов логов, которые будут храниться
+    encoding="utf-8",
+)
+
+# Формат сообщений
+formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(formatter)
+
+# Добавление обработчика в логгер
+logger = logging.getLogger('product_loader_logger')
+logger.addHandler(file_handler)
+
+
+async def _limited_call(
+    semaphore: asyncio.Semaphore,
+    fetch: Callable[[str], Awaitable[Any]],
+    product_id: str,
+    timeout: float
+    ) -> Any:
+    """
+    Асинхронно выполняет один вызов API с ограничением параллельности и таймаутом.
+    При ошибке или превышении таймаута возвращает None. CircuitOpenError
+    пробрасывается, чтобы вызывающий код мог отличить недоступность API.
+
+    :param semaphore: Семафор, ограничивающий количество одновременных вызовов.
+    :param fetch: Функция получения данных по идентификатору товара.
+    :param product_id: Идентификатор товара.
+    :param timeout: Таймаут вызова в секундах.
+    :return: Данные от API или None.
+    :raises CircuitOpenError: Если API недоступен и данных в кеше нет.
+    """
+    async with semaphore:
+        try:
+            return await asyncio.wait_for(fetch(product_id), timeout=timeout)
+        except CircuitOpenError:
+            raise
+        except TimeoutError:
+            logger.error(
+                "Вызов %s для товара %s превысил таймаут %s с.",
+                fetch.__name__, product_id, timeout
+                )
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.error(
+                "Вызов %s для товара %s завершился ошибкой: %s",
+                fetch.__name__, product_id, e
+                )
+        return None
+
+async def load_product_bundles(
+    product_ids: list[str],
+    with_info: bool = True,
+    with_quantity: bool = True,
+    with_attributes: bool = False,
+    required: tuple[str, ...] = (),
+    max_concurrency: int = config.PRODUCT_FANOUT_LIMIT,
+    timeout: float = config.PRODUCT_CALL_TIMEOUT
+    ) -> dict[str, dict]:
+    """
+    Асинхронно загружает данные для нескольких товаров одновременно.
+
+    :param product_ids: Идентификаторы товаров.
+    :param with_info: Загружать ли информацию о товаре (цена, изображение, категория).
+    :param with_quantity: Загружать ли количество товара по магазинам.
+    :param with_attributes: Загружать ли атрибуты товара.
+    :param required: Части пакета ('info', 'quantity', 'attributes'), без которых
+    ответ не имеет смысла: если такую часть не удалось получить из-за недоступности
+    API, выбрасывается CircuitOpenError. Остальные части в этом случае равны None.
+    :param max_concurrency: Максимальное количество одновременных запросов.
+    :param timeout: Таймаут каждого отдельного запроса в секундах.
+    :return: Словарь {идентификатор товара: {'info': ..., 'quantity': ..., 'attributes': ...}},
+    где данные, которые не удалось получить, равны None.
+    :raises CircuitOpenError: Если API недоступен для обязательной части пакета.
+    """
+    logger.info(
+        "Выполнение функции load_product_bundles для товаров %s "
+        "(info = %s, quantity = %s, attributes = %s)",
+        product_ids, with_info, with_quantity, with_attributes
+        )
+    fetchers = {}
+    if with_info:
+        fetchers['info'] = connect_product_to_id
+    if with_attributes:
+        fetchers['attributes'] = connect_product_attributes_to_id
+
+    unique_ids = list(dict.fromkeys(str(product_id) for product_id in product_ids))
+    semaphore = asyncio.Semaphore(max_concurrency)
+    calls = [
+        (product_id, part, _limited_call(semaphore, fetch, product_id, timeout))
+        for product_id in unique_ids
+        for part, fetch in fetchers.items()
+    ]
+    parts = asyncio.gather(*(call for _, _, call in calls), return_exceptions=True)
+    quantities = {}
+    if with_quantity:
+        # Количество всех товаров запрашивается одновременно с остальными частями
+        results, quantities = await asyncio.gather(
+            parts,
+            get_quantities(unique_ids, 'quantity' in required, max_concurrency, timeout),
+            return_exceptions=True
+            )
+        if isinstance(quantities, BaseException):
+            raise quantities
+    else:
+        results = await parts
+
+    bundles = {
+        product_id: {'info': None, 'quantity': None, 'attributes': None}
+        for product_id in unique_ids
+    }
+    for (product_id, part, _), result in zip(calls, results):
+        if isinstance(result, BaseException):
+            if part in required or not isinstance(result, CircuitOpenError):
+                raise result
+            logger.warning("Часть %s для товара %s не получена: %s", part, product_id, result)
+            result = None
+        bundles[product_id][part] = result
+    for product_id, quantity in quantities.items():
+        bundles[product_id]['quantity'] = quantity
+    return bundles
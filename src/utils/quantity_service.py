@@ -0,0 +1,148 @@
+"""
+Модуль для получения количества нескольких товаров по магазинам.
+Идентификаторы товаров очищаются от повторов, количество берется из кеша
+product_cache, а для остальных товаров запрашивается одним пакетным
+запросом на каждые QUANTITY_BATCH_SIZE товаров (если задан
+URL_API_QUATITY_BY_PRODUCT_IDS) или одновременными запросами по каждому
+товару с ограничением параллельности. Количество возвращается для всех
+магазинов из STORES, поэтому число запросов не зависит от числа магазинов.
+"""
+
+import asyncio
+import logging
+from logging.handlers import RotatingFileHandler
+
+from configs import config
+from src.utils.circuit_breaker import CircuitOpenError
+from src.utils.connect_api import call_api, get_product_quatity, get_token
+from src.utils.models import StoreQuantities, parse_quantities_by_product
+from src.utils.product_cache import product_cache
+
+
+logging.basicConfig(level=logging.INFO)
+
+# Установка размера файла логов в 8 МБ
+MAX_BYTES = 8 * 1024 * 1024  # 8 МБ в байтах
+
+# Создание обработчика файлов с ограничением размера и ротацией
+file_handler = RotatingFileHandler(
+    "logs/quantity_service_log.log",
+    maxBytes=MAX_BYTES,  # Установка максимального размера файла логов
+    backupCount=30,  # Количество файлов логов, которые будут храниться
+    encoding="utf-8",
+)
+
+# Формат сообщений
+formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(formatter)
+
+# Добавление обработчика в логгер
+logger = logging.getLogger('quantity_service_logger')
+logger.addHandler(file_handler)
+
+
+async def _fetch_batch(product_ids: list[str]) -> dict[str, StoreQuantities]:
+    """
+    Асинхронно запрашивает количество пакета товаров одним запросом
+    и сохраняет полученное количество в кеш.
+
+    :param product_ids: Идентификаторы товаров пакета.
+    :return: Словарь {идентификатор товара: количество по магазинам} для найденных товаров.
+    """
+    params = {
+        'ids': ','.join(product_ids),
+        'token': await get_token()
+    }
+    response = await call_api(
+        config.URL_API_QUATITY_BY_PRODUCT_IDS, params, model=parse_quantities_by_product
+        )
+    if response.status != 200 or not isinstance(response.data, dict):
+        logger.error(
+            "Ошибка пакетного запроса количества %s товаров - %s",
+            len(product_ids), response.status
+            )
+        return {}
+    for product_id, quantity in response.data.items():
+        product_cache.set_quantity(product_id, quantity)
+    return response.data
+
+async def _fetch_one(product_id: str) -> dict[str, StoreQuantities]:
+    """
+    Асинхронно получает количество одного товара через get_product_quatity (с кешем).
+
+    :param product_id: Идентификатор товара.
+    :return: Словарь {идентификатор товара: количество} или пустой словарь.
+    """
+    quantity = await get_product_quatity(product_id)
+    return {product_id: quantity} if quantity is not None else {}
+
+async def get_quantities(
+    product_ids: list[str],
+    raise_unavailable: bool = False,
+    max_concurrency: int = config.PRODUCT_FANOUT_LIMIT,
+    timeout: float = config.PRODUCT_CALL_TIMEOUT
+    ) -> dict[str, StoreQuantities | None]:
+    """
+    Асинхронно получает количество по магазинам для нескольких товаров.
+
+    :param product_ids: Идентификаторы товаров, повторы запрашиваются один раз.
+    :param raise_unavailable: Выбросить CircuitOpenError, если API недоступен,
+    вместо того чтобы вернуть None для товаров без сохраненного количества.
+    Пока API недоступен, для остальных товаров возвращается последнее
+    сохраненное количество.
+    :param max_concurrency: Максимальное количество одновременных запросов.
+    :param timeout: Таймаут каждого запроса в секундах.
+    :return: Словарь {идентификатор товара: количество по магазинам} в порядке
+    product_ids, где количество, которое не удалось получить, равно None.
+    :raises CircuitOpenError: Если raise_unavailable и API количества недоступен.
+    """
+    unique_ids = list(dict.fromkeys(str(product_id) for product_id in product_ids))
+    quantities: dict[str, StoreQuantities | None] = dict.fromkeys(unique_ids)
+    if config.URL_API_QUATITY_BY_PRODUCT_IDS:
+        missing = []
+        for product_id in unique_ids:
+            quantities[product_id] = product_cache.get_quantity(product_id)
+            if quantities[product_id] is None:
+                missing.append(product_id)
+        if not missing:
+            return quantities
+        batch_size = max(config.QUANTITY_BATCH_SIZE, 1)
+        batches = [missing[i:i + batch_size] for i in range(0, len(missing), batch_size)]
+        fetches = [(batch, _fetch_batch(batch)) for batch in batches]
+    else:
+        # get_product_quatity сам берет количество из кеша
+        missing = unique_ids
+        fetches = [([product_id], _fetch_one(product_id)) for product_id in unique_ids]
+    logger.info(
+        "Запрос количества %s из %s товаров, запросов %s",
+        len(missing), len(unique_ids), len(fetches)
+        )
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def limited(fetch):
+        async with semaphore:
+            return await asyncio.wait_for(fetch, timeout=timeout)
+
+    results = await asyncio.gather(
+        *(limited(fetch) for _, fetch in fetches), return_exceptions=True
+        )
+    for (batch, _), result in zip(fetches, results):
+        if isinstance(result, CircuitOpenError):
+            # Пока API недоступен, показывается последнее сохраненное количество
+            last_known = {
+                product_id: quantity for product_id in batch
+                if (quantity := product_cache.get_last_known_quantity(product_id)) is not None
+            }
+            if len(last_known) < len(batch) and raise_unavailable:
+                raise result
+            result = last_known
+        if isinstance(result, BaseException):
+            if not isinstance(result, Exception):
+                raise result
+            logger.error("Количество товаров %s не получено: %r", batch, result)
+            continue
+        for product_id, quantity in result.items():
+            if product_id in quantities:
+                quantities[product_id] = quantity
+    return quantities
@@ -0,0 +1,345 @@
+"""
+Модуль для распределения запросов к API магазина по приоритетам.
+Все запросы к API проходят через общий планировщик, который ограничивает
+количество одновременно выполняемых запросов и частоту запросов к каждому
+эндпоинту. Запросы имеют класс приоритета: запросы пользователей (поиск,
+карточка товара) выполняются раньше проверок дисконтных карт, а те раньше
+фоновых задач (обновление кеша, синхронизация каталога, прогрев).
+Часть слотов зарезервирована за запросами пользователей, а фоновые задачи
+получают только часть частоты запросов эндпоинта и не забирают последние
+токены общего ограничителя частоты, поэтому фоновая работа не задерживает
+ответы пользователям. Приоритет текущей задачи хранится
+в contextvar и наследуется созданными из нее задачами. Планировщик ведет
+метрики глубины очереди и времени ожидания по классам приоритета.
+"""
+
+import asyncio
+from collections import Counter, deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+import heapq
+import itertools
+import logging
+from logging.handlers import RotatingFileHandler
+import math
+import time
+from typing import AsyncIterator, Awaitable, Iterator, TypeVar
+
+from configs import config
+
+
+logging.basicConfig(level=logging.INFO)
+
+# Установка размера файла логов в 8 МБ
+MAX_BYTES = 8 * 1024 * 1024  # 8 МБ в байтах
+
+# Создание обработчика файлов с ограничением размера и ротацией
+file_handler = RotatingFileHandler(
+    "logs/request_scheduler_log.log",
+    maxBytes=MAX_BYTES,  # Установка максимального размера файла логов
+    backupCount=30,  # Количество файлов логов, которые будут храниться
+    encoding="utf-8",
+)
+
+# Формат сообщений
+formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(formatter)
+
+# Добавление обработчика в логгер
+logger = logging.getLogger('request_scheduler_logger')
+logger.addHandler(file_handler)
+
+T = TypeVar('T')
+
+
+class Priority(IntEnum):
+    """
+    Класс приоритета запроса к API. Меньшее значение выполняется раньше.
+    """
+    INTERACTIVE = 0  # Запросы пользователей: поиск, карточка товара
+    CARD = 1  # Проверка и баланс дисконтных карт
+    BACKGROUND = 2  # Обновление кеша, синхронизация каталога, прогрев
+
+
+request_priority: ContextVar[Priority] = ContextVar(
+    'request_priority', default=Priority.INTERACTIVE
+    )
+"""
+Приоритет запросов текущей задачи. По умолчанию запросы считаются запросами пользователей.
+"""
+
+
+@contextmanager
+def priority_scope(priority: Priority) -> Iterator[None]:
+    """
+    Устанавливает приоритет запросов внутри блока with.
+
+    :param priority: Класс приоритета.
+    """
+    token = request_priority.set(priority)
+    try:
+        yield
+    finally:
+        request_priority.reset(token)
+
+async def run_with_priority(priority: Priority, awaitable: Awaitable[T]) -> T:
+    """
+    Асинхронно выполняет awaitable с заданным приоритетом запросов.
+
+    :param priority: Класс приоритета.
+    :param awaitable: Корутина, запросы которой получают приоритет.
+    :return: Результат корутины.
+    """
+    with priority_scope(priority):
+        return await awaitable
+
+
+class TokenBucket:
+    """
+    Ограничитель частоты "ведро с токенами".
+
+    :param rate: Количество запросов в секунду.
+    :param burst: Максимальное количество запросов подряд без ожидания.
+    """
+
+    def __init__(self, rate: float, burst: float | None = None):
+        self.rate = rate
+        self.capacity = max(burst or rate, 1.0)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def delay(self, reserve: float = 0.0) -> float:
+        """
+        Возвращает, сколько секунд осталось до появления свободного токена.
+
+        :param reserve: Сколько токенов должно остаться в ведре после запроса.
+        :return: Время ожидания в секундах, 0 если токен есть.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        needed = 1 + reserve
+        if self.tokens >= needed:
+            return 0.0
+        return (needed - self.tokens) / self.rate
+
+    def take(self) -> None:
+        """
+        Забирает один токен.
+        """
+        self.tokens -= 1
+
+
+class RequestScheduler:
+    """
+    Планировщик запросов к API с приоритетами, ограничением одновременных
+    запросов и частоты запросов к эндпоинтам.
+
+    :param max_in_flight: Максимальное количество одновременно выполняемых запросов.
+    :param reserved_slots: Количество слотов, недоступных фоновым запросам.
+    :param default_rate: Частота запросов к эндпоинту в секунду, 0 - без ограничения.
+    :param endpoint_rates: Частота запросов для отдельных эндпоинтов {адрес: запросов в секунду}.
+    :param background_rate_share: Доля частоты эндпоинта, доступная фоновым запросам.
+    :param reserved_tokens: Сколько токенов ограничителя частоты эндпоинта фоновые
+    запросы оставляют запросам пользователей и проверкам карт.
+    :param window_size: Количество последних ожиданий, по которым считаются процентили.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int,
+        reserved_slots: int,
+        default_rate: float = 0,
+        endpoint_rates: dict[str, float] | None = None,
+        background_rate_share: float = 0.5,
+        reserved_tokens: float = 0,
+        window_size: int = 500
+        ):
+        self.max_in_flight = max_in_flight
+        self.reserved_slots = min(reserved_slots, max_in_flight - 1)
+        self.default_rate = default_rate
+        self.endpoint_rates = endpoint_rates or {}
+        self.background_rate_share = background_rate_share
+        self.reserved_tokens = reserved_tokens
+        self._in_flight = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._buckets: dict[str, TokenBucket] = {}
+        self._background_buckets: dict[str, TokenBucket] = {}
+        self.queue_depth = Counter()
+        self.max_queue_depth = Counter()
+        self.requests = Counter()
+        self._waits = {priority: deque(maxlen=window_size) for priority in Priority}
+        self.max_wait = Counter()
+
+    def _limit(self, priority: Priority) -> int:
+        """
+        Возвращает количество слотов, доступных запросам данного приоритета.
+        """
+        if priority == Priority.BACKGROUND:
+            return self.max_in_flight - self.reserved_slots
+        return self.max_in_flight
+
+    def _bucket(self, buckets: dict[str, TokenBucket], endpoint: str, rate: float) -> TokenBucket:
+        """
+        Возвращает ограничитель частоты эндпоинта, создавая его при первом обращении.
+        """
+        bucket = buckets.get(endpoint)
+        if bucket is None:
+            bucket = buckets[endpoint] = TokenBucket(rate)
+        return bucket
+
+    async def _wait_rate(self, endpoint: str, priority: Priority) -> None:
+        """
+        Асинхронно ждет, пока частота запросов к эндпоинту позволит выполнить запрос.
+        Фоновые запросы дополнительно ограничены долей background_rate_share
+        и берут токен общего ограничителя, только если после этого в нем остается
+        reserved_tokens токенов (но не больше емкости ведра без одного токена),
+        поэтому ожидающие запросы пользователей получают токены раньше фоновых.
+        """
+        rate = self.endpoint_rates.get(endpoint, self.default_rate)
+        if rate <= 0:
+            return
+        shared = self._bucket(self._buckets, endpoint, rate)
+        buckets = [(shared, 0.0)]
+        if priority == Priority.BACKGROUND:
+            buckets = [
+                (shared, min(self.reserved_tokens, shared.capacity - 1)),
+                (self._bucket(
+                    self._background_buckets, endpoint, rate * self.background_rate_share
+                    ), 0.0),
+            ]
+        while True:
+            delay = max(bucket.delay(reserve) for bucket, reserve in buckets)
+            if delay <= 0:
+                for bucket, _ in buckets:
+                    bucket.take()
+                return
+            await asyncio.sleep(delay)
+
+    def _has_waiter_before(self, priority: Priority) -> bool:
+        """
+        Проверяет, ждет ли слот запрос того же или более высокого приоритета.
+        """
+        while self._waiters and self._waiters[0][2].done():
+            heapq.heappop(self._waiters)
+        return bool(self._waiters) and self._waiters[0][0] <= priority
+
+    async def _acquire_slot(self, priority: Priority) -> None:
+        """
+        Асинхронно занимает слот выполнения запроса в порядке приоритета.
+        """
+        if self._in_flight < self._limit(priority) and not self._has_waiter_before(priority):
+            self._in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Слот уже выдан, но ожидание отменено: возвращаем слот
+                self._release_slot()
+            raise
+
+    def _release_slot(self) -> None:
+        """
+        Освобождает слот и передает свободные слоты ожидающим запросам.
+        """
+        self._in_flight -= 1
+        while self._waiters:
+            priority, _, waiter = self._waiters[0]
+            if waiter.done():
+                heapq.heappop(self._waiters)
+                continue
+            if self._in_flight >= self._limit(priority):
+                break
+            heapq.heappop(self._waiters)
+            self._in_flight += 1
+            waiter.set_result(None)
+
+    def _record_wait(self, priority: Priority, wait: float) -> None:
+        """
+        Сохраняет время ожидания запроса.
+        """
+        self.requests[priority.name] += 1
+        self._waits[priority].append(wait)
+        self.max_wait[priority.name] = max(self.max_wait[priority.name], wait)
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        endpoint: str,
+        priority: Priority | None = None,
+        timeout: float | None = None
+        ) -> AsyncIterator[None]:
+        """
+        Асинхронный контекстный менеджер: ждет разрешения на запрос к эндпоинту
+        и занимает слот выполнения до выхода из блока.
+
+        :param endpoint: Адрес эндпоинта.
+        :param priority: Класс приоритета, по умолчанию приоритет текущей задачи.
+        :param timeout: Максимальное время ожидания в секундах.
+        :raises TimeoutError: Если разрешение не получено за timeout секунд.
+        """
+        if priority is None:
+            priority = request_priority.get()
+        started = time.monotonic()
+        self.queue_depth[priority.name] += 1
+        self.max_queue_depth[priority.name] = max(
+            self.max_queue_depth[priority.name], self.queue_depth[priority.name]
+            )
+        try:
+            async with asyncio.timeout(timeout):
+                await self._wait_rate(endpoint, priority)
+                await self._acquire_slot(priority)
+        except TimeoutError:
+            logger.warning(
+                "Запрос %s с приоритетом %s не дождался очереди за %s с",
+                endpoint, priority.name, timeout
+                )
+            raise
+        finally:
+            self.queue_depth[priority.name] -= 1
+        self._record_wait(priority, time.monotonic() - started)
+        try:
+            yield
+        finally:
+            self._release_slot()
+
+    def stats(self) -> dict:
+        """
+        Возвращает занятость слотов, глубину очереди и время ожидания по приоритетам.
+
+        :return: Словарь со статистикой.
+        """
+        wait_ms = {}
+        for priority, waits in self._waits.items():
+            if not waits:
+                continue
+            ordered = sorted(waits)
+            index = max(math.ceil(0.95 * len(ordered)) - 1, 0)
+            wait_ms[priority.name] = {
+                'avg': sum(ordered) / len(ordered) * 1000,
+                'p95': ordered[index] * 1000,
+                'max': self.max_wait[priority.name] * 1000,
+            }
+        return {
+            'in_flight': self._in_flight,
+            'max_in_flight': self.max_in_flight,
+            'queue_depth': dict(self.queue_depth),
+            'max_queue_depth': dict(self.max_queue_depth),
+            'requests': dict(self.requests),
+            'wait_ms': wait_ms,
+        }
+
+
+request_scheduler = RequestScheduler(
+    max_in_flight=config.API_SCHEDULER_MAX_IN_FLIGHT,
+    reserved_slots=config.API_SCHEDULER_RESERVED_SLOTS,
+    default_rate=config.API_SCHEDULER_RATE,
+    endpoint_rates=config.API_SCHEDULER_ENDPOINT_RATES,
+    background_rate_share=config.API_SCHEDULER_BACKGROUND_RATE_SHARE,
+    reserved_tokens=config.API_SCHEDULER_RESERVED_TOKENS,
+)
@@ -0,0 +1,165 @@
+"""
+Модуль кеша распознанных штрихкодов на фото.
+Пользователи часто пересылают или повторно отправляют одно и то же фото
+штрихкода, а у пересланного фото Telegram сохраняет file_unique_id. Кеш
+хранит штрихкод, распознанный на фото, по file_unique_id, поэтому повторное
+фото не скачивается и не распознается. Записи хранятся в памяти (LRU)
+и в базе данных SQLite, поэтому переживают перезапуск бота. Размер кеша
+ограничен SCAN_CACHE_MAXSIZE, давно не использованные записи удаляются.
+Время использования записи при попадании отмечается в памяти и записывается
+в базу данных пакетами, перед удалением лишних записей и при остановке бота.
+Кешируются только успешно распознанные фото.
+"""
+
+import logging
+from logging.handlers import RotatingFileHandler
+import time
+
+from cachetools import LRUCache
+
+from configs import config
+from src.database.process_database_scans import (
+    create_scan_table,
+    load_scans,
+    save_scan,
+    touch_scans,
+    trim_scans,
+)
+from src.utils.stats_reporter import register_stats
+
+
+logging.basicConfig(level=logging.INFO)
+
+# Установка размера файла логов в 8 МБ
+MAX_BYTES = 8 * 1024 * 1024  # 8 МБ в байтах
+
+# Создание обработчика файлов с ограничением размера и ротацией
+file_handler = RotatingFileHandler(
+    "logs/scan_cache_log.log",
+    maxBytes=MAX_BYTES,  # Установка максимального размера файла логов
+    backupCount=30,  # Количество файлов логов, которые будут храниться
+    encoding="utf-8",
+)
+
+# Формат сообщений
+formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(formatter)
+
+# Добавление обработчика в логгер
+logger = logging.getLogger('scan_cache_logger')
+logger.addHandler(file_handler)
+
+TRIM_EVERY = 100
+"""
+Через сколько новых записей удалять из базы данных записи сверх размера кеша.
+"""
+
+TOUCH_FLUSH_EVERY = 100
+"""
+Через сколько отмеченных использований записывать их время в базу данных.
+"""
+
+
+class ScanCache:
+    """
+    Кеш file_unique_id фото - распознанный штрихкод в памяти и в SQLite.
+
+    :param maxsize: Максимальное количество записей.
+    :param db_path: Путь к файлу базы данных.
+    """
+
+    def __init__(self, maxsize: int, db_path: str):
+        self.maxsize = maxsize
+        self.db_path = db_path
+        self._barcodes: LRUCache = LRUCache(maxsize=maxsize)
+        self._loaded = False
+        self._stored_since_trim = 0
+        self._touched: dict[str, float] = {}  # file_unique_id: время использования
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+
+    async def load(self) -> None:
+        """
+        Асинхронно создает таблицу и загружает в память последние использованные записи.
+        """
+        if self._loaded:
+            return
+        self._loaded = True
+        await create_scan_table(self.db_path)
+        scans = await load_scans(self.maxsize, self.db_path) or []
+        # Записи загружаются от давно использованных к недавним, как в LRU
+        for file_unique_id, barcode in scans:
+            self._barcodes[file_unique_id] = barcode
+        logger.info("Загружено распознанных фото: %s", len(scans))
+
+    async def get(self, file_unique_id: str) -> str | None:
+        """
+        Асинхронно возвращает штрихкод, распознанный на фото ранее, и отмечает использование.
+
+        :param file_unique_id: Уникальный идентификатор фото Telegram.
+        :return: Штрихкод или None, если фото еще не распознавалось.
+        """
+        await self.load()
+        barcode = self._barcodes.get(file_unique_id)
+        if barcode is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touched[file_unique_id] = time.time()
+        if len(self._touched) >= TOUCH_FLUSH_EVERY:
+            await self.flush()
+        return barcode
+
+    async def set(self, file_unique_id: str, barcode: str) -> None:
+        """
+        Асинхронно сохраняет штрихкод, распознанный на фото.
+
+        :param file_unique_id: Уникальный идентификатор фото Telegram.
+        :param barcode: Распознанный штрихкод.
+        """
+        await self.load()
+        self._barcodes[file_unique_id] = barcode
+        self.stored += 1
+        await save_scan(file_unique_id, barcode, time.time(), self.db_path)
+        self._touched.pop(file_unique_id, None)
+        self._stored_since_trim += 1
+        if self._stored_since_trim >= TRIM_EVERY:
+            self._stored_since_trim = 0
+            # Отметки использования записываются, чтобы не удалить недавно использованные
+            await self.flush()
+            removed = await trim_scans(self.maxsize, self.db_path)
+            logger.info("Удалено давно не использованных распознанных фото: %s", removed)
+
+    async def flush(self) -> None:
+        """
+        Асинхронно записывает в базу данных время использования записей,
+        отмеченное при попаданиях.
+        """
+        if not self._touched:
+            return
+        touched, self._touched = self._touched, {}
+        await touch_scans(
+            [(last_used, file_unique_id) for file_unique_id, last_used in touched.items()],
+            self.db_path
+            )
+
+    def stats(self) -> dict:
+        """
+        Возвращает счетчики кеша и долю попаданий.
+
+        :return: Словарь со статистикой.
+        """
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._barcodes),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'stored': self.stored,
+        }
+
+
+scan_cache = ScanCache(maxsize=config.SCAN_CACHE_MAXSIZE, db_path=config.SCAN_CACHE_DB_PATH)
+register_stats('scan_cache', scan_cache.stats)
@@ -0,0 +1,194 @@
+"""
+Модуль для кеширования результатов поиска товаров.
+Этот модуль предоставляет нормализацию поисковых запросов и кеш результатов
+поиска со стратегией stale-while-revalidate: устаревшая запись сразу
+возвращается пользователю, а ее обновление выполняется в фоне.
+"""
+
+import asyncio
+import logging
+from logging.handlers import RotatingFileHandler
+import time
+from typing import Any, Awaitable, Callable
+
+from cachetools import LRUCache
+from nltk.stem.snowball import SnowballStemmer
+
+from configs import config
+
+
+logging.basicConfig(level=logging.INFO)
+
+# Установка размера файла логов в 8 МБ
+MAX_BYTES = 8 * 1024 * 1024  # 8 МБ в байтах
+
+# Создание обработчика файлов с ограничением размера и ротацией
+file_handler = RotatingFileHandler(
+    "logs/search_cache_log.log",
+    maxBytes=MAX_BYTES,  # Установка максимального размера файла логов
+    backupCount=30,  # Количество файлов логов, которые будут храниться
+    encoding="utf-8",
+)
+
+# Формат сообщений
+formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(formatter)
+
+# Добавление обработчика в логгер
+logger = logging.getLogger('search_cache_logger')
+logger.addHandler(file_handler)
+
+stemmer = SnowballStemmer('russian')
+
+FRESH = 'fresh'
+STALE = 'stale'
+
+
+def normalize_query(text: str, stemming: bool = config.SEARCH_CACHE_STEMMING) -> str:
+    """
+    Нормализует поисковый запрос для использования в качестве ключа кеша:
+    приводит к нижнему регистру, схлопывает пробелы и, при необходимости,
+    заменяет слова их основами.
+
+    :param text: Текст поискового запроса.
+    :param stemming: Выполнять ли стемминг слов запроса.
+    :return: Нормализованный запрос.
+
+    Пример использования:
+    >>> normalize_query('  Дрель   MAKITA ', stemming=False)
+    'дрель makita'
+    """
+    words = text.casefold().split()
+    if stemming:
+        words = [stemmer.stem(word) for word in words]
+    return ' '.join(words)
+
+
+class SearchCache:
+    """
+    LRU-кеш результатов поиска со стратегией stale-while-revalidate.
+
+    :param maxsize: Максимальное количество запросов в кеше.
+    :param ttl: Время в секундах, в течение которого запись считается свежей.
+    :param stale_ttl: Время в секундах, в течение которого устаревшая запись
+    еще может быть возвращена, пока выполняется ее обновление.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, stale_ttl: float):
+        self._entries = LRUCache(maxsize=maxsize)
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._refreshing: dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.fallback_hits = 0
+
+    def lookup(self, key: str) -> tuple[Any, str | None]:
+        """
+        Ищет результат поиска в кеше.
+
+        :param key: Нормализованный поисковый запрос.
+        :return: Пара (результат, состояние), где состояние - FRESH, STALE
+        или None, если подходящей записи нет.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, stored_at = entry
+            age = time.monotonic() - stored_at
+            if age < self.ttl:
+                self.hits += 1
+                return value, FRESH
+            if age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                return value, STALE
+            # Слишком старая запись не удаляется: она нужна, если API недоступен
+        self.misses += 1
+        return None, None
+
+    def get_last_known(self, key: str) -> Any:
+        """
+        Возвращает последний сохраненный результат поиска независимо от его возраста.
+        Используется, когда API магазина недоступен.
+
+        :param key: Нормализованный поисковый запрос.
+        :return: Результат поиска или None, если его нет в кеше.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self.fallback_hits += 1
+        return entry[0]
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Сохраняет результат поиска в кеш.
+
+        :param key: Нормализованный поисковый запрос.
+        :param value: Результат поиска.
+        """
+        self._entries[key] = (value, time.monotonic())
+
+    def invalidate(self, key: str) -> None:
+        """
+        Удаляет результат поиска из кеша.
+
+        :param key: Нормализованный поисковый запрос.
+        """
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Полностью очищает кеш.
+        """
+        self._entries.clear()
+
+    def refresh_in_background(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> None:
+        """
+        Запускает фоновое обновление записи, если оно еще не выполняется.
+
+        :param key: Нормализованный поисковый запрос.
+        :param fetch: Функция без аргументов, возвращающая корутину с новым результатом.
+        """
+        if key in self._refreshing:
+            return
+        self._refreshing[key] = asyncio.create_task(self._refresh(key, fetch))
+
+    async def _refresh(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> None:
+        """
+        Асинхронно получает новый результат поиска и сохраняет его в кеш.
+        """
+        try:
+            value = await fetch()
+            if value is not None:
+                self.set(key, value)
+                self.refreshes += 1
+                logger.info("Результат поиска по запросу '%s' обновлен в фоне", key)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.error("Ошибка фонового обновления поиска по запросу '%s': %s", key, e)
+        finally:
+            self._refreshing.pop(key, None)
+
+    def stats(self) -> dict:
+        """
+        Возвращает счетчики попаданий, устаревших попаданий, промахов,
+        обновлений и ответов из кеша при недоступном API.
+
+        :return: Словарь со статистикой кеша.
+        """
+        return {
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'refreshes': self.refreshes,
+            'fallback_hits': self.fallback_hits,
+            'size': len(self._entries),
+        }
+
+
+search_cache = SearchCache(
+    maxsize=config.SEARCH_CACHE_MAXSIZE,
+    ttl=config.SEARCH_CACHE_TTL,
+    stale_ttl=config.SEARCH_CACHE_STALE_TTL,
+)
@@ -0,0 +1,70 @@
+"""
+Модуль для объединения одинаковых одновременных запросов (single-flight).
+Если несколько корутин одновременно запрашивают одни и те же данные,
+выполняется только один запрос, а его результат (или исключение)
+получают все ожидающие. Модуль ведет счетчики объединенных вызовов.
+"""
+
+import asyncio
+from collections import Counter
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """
+    Группа одновременных вызовов, объединяемых по ключу.
+    """
+
+    def __init__(self):
+        self._in_flight: dict[Hashable, asyncio.Task] = {}
+        self.calls = Counter()
+        self.deduplicated = Counter()
+
+    async def do(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]],
+        label: str = 'default'
+        ) -> Any:
+        """
+        Асинхронно выполняет fetch или присоединяется к уже выполняющемуся
+        вызову с тем же ключом.
+
+        :param key: Ключ запроса (например, адрес и параметры).
+        :param fetch: Функция без аргументов, возвращающая корутину запроса.
+        :param label: Метка для счетчиков (например, имя эндпоинта).
+        :return: Результат запроса.
+        """
+        self.calls[label] += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(fetch())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.deduplicated[label] += 1
+        # shield не дает отмене одного из ожидающих прервать общий запрос
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        """
+        Удаляет завершенный вызов из списка выполняющихся.
+        """
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Исключение уже передано ожидающим, помечаем его как полученное
+            task.exception()
+
+    def stats(self) -> dict:
+        """
+        Возвращает количество вызовов и объединенных вызовов по меткам.
+
+        :return: Словарь со статистикой.
+        """
+        return {
+            'calls': dict(self.calls),
+            'deduplicated': dict(self.deduplicated),
+            'deduplicated_total': sum(self.deduplicated.values()),
+            'in_flight': len(self._in_flight),
+        }
@@ -0,0 +1,105 @@
+"""
+Модуль периодической записи статистики в лог.
+Модули со счетчиками (этапы распознавания штрихкодов, кеш распознанных фото,
+размеры скачиваемых фото) регистрируют функцию, возвращающую статистику,
+а фоновая задача раз в STATS_LOG_INTERVAL секунд записывает ее
+в stats_reporter_log.log. Модуль не импортирует зарегистрированные модули,
+поэтому статистика не зависит от сервера сброса кеша, а сам модуль
+не тянет за собой их зависимости.
+"""
+
+import asyncio
+import json
+import logging
+from logging.handlers import RotatingFileHandler
+from typing import Callable
+
+from configs import config
+
+
+logging.basicConfig(level=logging.INFO)
+
+# Установка размера файла логов в 8 МБ
+MAX_BYTES = 8 * 1024 * 1024  # 8 МБ в байтах
+
+# Создание обработчика файлов с ограничением размера и ротацией
+file_handler = RotatingFileHandler(
+    "logs/stats_reporter_log.log",
+    maxBytes=MAX_BYTES,  # Установка максимального размера файла логов
+    backupCount=30,  # Количество файлов логов, которые будут храниться
+    encoding="utf-8",
+)
+
+# Формат сообщений
+formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler.setFormatter(formatter)
+
+# Добавление обработчика в логгер
+logger = logging.getLogger('stats_reporter_logger')
+logger.addHandler(file_handler)
+
+_sources: dict[str, Callable[[], dict]] = {}  # Название статистики: функция, возвращающая ее
+_reporter_task: asyncio.Task | None = None  # Фоновая запись статистики
+
+
+def register_stats(name: str, stats: Callable[[], dict]) -> None:
+    """
+    Регистрирует статистику для периодической записи в лог.
+
+    :param name: Название статистики в логе.
+    :param stats: Функция, возвращающая словарь со статистикой.
+    """
+    _sources[name] = stats
+
+def collect_stats() -> dict:
+    """
+    Собирает все зарегистрированные статистики.
+
+    :return: Словарь {название: статистика}.
+    """
+    return {name: stats() for name, stats in _sources.items()}
+
+def log_stats() -> None:
+    """
+    Записывает все зарегистрированные статистики в лог.
+    """
+    for name, stats in collect_stats().items():
+        logger.info("Статистика %s: %s", name, json.dumps(stats, ensure_ascii=False))
+
+async def _stats_reporter() -> None:
+    """
+    Фоновая задача записи статистики раз в STATS_LOG_INTERVAL секунд.
+    """
+    while True:
+        await asyncio.sleep(config.STATS_LOG_INTERVAL)
+        try:
+            log_stats()
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.error("Ошибка записи статистики: %s", e)
+
+def start_stats_reporter() -> None:
+    """
+    Запускает фоновую запись статистики, если STATS_LOG_INTERVAL больше 0.
+    """
+    global _reporter_task  # pylint: disable=global-statement
+    if config.STATS_LOG_INTERVAL <= 0:
+        logger.info("STATS_LOG_INTERVAL = 0, статистика пишется только при остановке бота")
+        return
+    if _reporter_task is None or _reporter_task.done():
+        _reporter_task = asyncio.create_task(_stats_reporter())
+        logger.info("Фоновая запись статистики запущена")
+
+async def stop_stats_reporter() -> None:
+    """
+    Асинхронно останавливает фоновую запись статистики и записывает ее в последний раз.
+    """
+    global _reporter_task  # pylint: disable=global-statement
+    if _reporter_task is not None:
+        _reporter_task.cancel()
+        try:
+            await _reporter_task
+        except asyncio.CancelledError:
+            pass
+        _reporter_task = None
+        logger.info("Фоновая запись статистики остановлена")
+    log_stats()
@@ -0,0 +1,169 @@
+"""
+Тесты поиска по локальной копии каталога. Каталог синхронизируется
+из заглушки API магазина (benchmarks.mock_opencart) во временную базу SQLite.
+
+Запуск из корня репозитория:
+    python -m pytest -q tests
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+
+import pytest
+
+from benchmarks.mock_opencart import ROUTE_SEARCH, MockOpenCart
+from configs import config
+
+# Путь к каталогу задается до импорта модулей, использующих его по умолчанию
+config.CATALOG_DB_PATH = os.path.join(tempfile.mkdtemp(), 'catalog.db')
+
+# pylint: disable=wrong-import-position
+from src.database.process_database_catalog import search_catalog, set_catalog_meta
+from src.utils import connect_api
+from src.utils.catalog_sync import sync_catalog
+from src.utils.http_client import close_session, create_session
+from src.utils.search_cache import search_cache
+
+
+CATALOG_SIZE = 30
+
+
+@pytest.fixture(autouse=True)
+def local_backend(monkeypatch):
+    """
+    Включает поиск по локальному каталогу и очищает каталог и кеш поиска.
+    """
+    monkeypatch.setattr(config, 'SEARCH_BACKEND', 'local')
+    monkeypatch.setattr(config, 'IMAGE_CACHE_PREWARM', False)
+    if os.path.exists(config.CATALOG_DB_PATH):
+        os.remove(config.CATALOG_DB_PATH)
+    search_cache.clear()
+
+def run_with_mock(scenario) -> MockOpenCart:
+    """
+    Запускает заглушку API и выполняет сценарий с общей HTTP-сессией.
+
+    :param scenario: Асинхронная функция, принимающая заглушку.
+    :return: Заглушка API для проверки счетчиков запросов.
+    """
+    mock = MockOpenCart(catalog_size=CATALOG_SIZE)
+    mock.touch_product(1, name='Дрель аккумуляторная Makita')
+    mock.touch_product(2, name='Перфоратор "Зубр" ПСД-800')
+
+    async def run():
+        await mock.start()
+        await create_session()
+        try:
+            await scenario(mock)
+        finally:
+            await close_session()
+            await mock.stop()
+
+    asyncio.run(run())
+    return mock
+
+def test_sync_fills_local_catalog():
+    """
+    Полная синхронизация загружает все товары с первым предложением описания.
+    """
+    async def scenario(_mock):
+        assert await sync_catalog(full=True) == CATALOG_SIZE
+        products = await search_catalog('товар 7')
+        assert products[0]['product_id'] == 7
+        assert products[0]['description'] == 'Описание товара 7.'
+
+    run_with_mock(scenario)
+
+def test_search_by_prefix():
+    """
+    Слова запроса ищутся как префиксы без учета регистра.
+    """
+    async def scenario(_mock):
+        await sync_catalog(full=True)
+        hits = await connect_api.search_local('ДРЕЛ MAK')
+        assert [hit.product_id for hit in hits] == ['1']
+        hits = await connect_api.search_local('перфор')
+        assert [hit.name for hit in hits] == ['Перфоратор "Зубр" ПСД-800']
+
+    run_with_mock(scenario)
+
+def test_search_with_quotes():
+    """
+    Кавычки в запросе не ломают запрос FTS5.
+    """
+    async def scenario(_mock):
+        await sync_catalog(full=True)
+        hits = await connect_api.search_local('"зубр"')
+        assert [hit.product_id for hit in hits] == ['2']
+        hits = await connect_api.search_local('перфоратор "зуб')
+        assert [hit.product_id for hit in hits] == ['2']
+        assert await connect_api.search_local('"') is None
+
+    run_with_mock(scenario)
+
+def test_search_by_model_and_barcode():
+    """
+    Запрос из цифр находит товар по коду или штрихкоду.
+    """
+    async def scenario(_mock):
+        await sync_catalog(full=True)
+        hits = await connect_api.search_local('100005')
+        assert [hit.product_id for hit in hits] == ['5']
+        hits = await connect_api.search_local(str(4810000000000 + 12))
+        assert [hit.product_id for hit in hits] == ['12']
+
+    run_with_mock(scenario)
+
+def test_incremental_sync_updates_search():
+    """
+    Инкрементальная синхронизация загружает только измененный товар.
+    """
+    async def scenario(mock):
+        await sync_catalog(full=True)
+        mock.touch_product(3, name='Шуруповерт Bosch')
+        assert await sync_catalog() == 1
+        hits = await connect_api.search_local('шуруп')
+        assert [hit.product_id for hit in hits] == ['3']
+
+    run_with_mock(scenario)
+
+def test_fresh_catalog_does_not_call_api():
+    """
+    При свежем каталоге поиск не обращается к API.
+    """
+    async def scenario(_mock):
+        await sync_catalog(full=True)
+        hits = await connect_api.connect_search('дрель')
+        assert [hit.product_id for hit in hits] == ['1']
+
+    mock = run_with_mock(scenario)
+    assert mock.route_counts[ROUTE_SEARCH] == 0
+
+def test_empty_catalog_falls_back_to_api():
+    """
+    При пустом каталоге поиск выполняется через API.
+    """
+    async def scenario(_mock):
+        assert await connect_api.search_local('дрель') is None
+        hits = await connect_api.connect_search('дрель')
+        assert [hit.product_id for hit in hits] == ['1']
+
+    mock = run_with_mock(scenario)
+    assert mock.route_counts[ROUTE_SEARCH] == 1
+
+def test_stale_catalog_falls_back_to_api():
+    """
+    При устаревшем каталоге поиск выполняется через API.
+    """
+    async def scenario(_mock):
+        await sync_catalog(full=True)
+        last_sync = time.time() - config.CATALOG_MAX_AGE - 1
+        await set_catalog_meta('last_sync', str(last_sync))
+        assert await connect_api.search_local('дрель') is None
+        hits = await connect_api.connect_search('дрель')
+        assert [hit.product_id for hit in hits] == ['1']
+
+    mock = run_with_mock(scenario)
+    assert mock.route_counts[ROUTE_SEARCH] == 1